@@ -1,3 +1,4 @@
+import os
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
@@ -6,10 +7,18 @@ from flask_bcrypt import Bcrypt
 from config import Config
 from models import db
 from routes import register_routes
+from commands import register_commands
+from jobs import register_jobs
+from utils.scheduler import scheduler
+from utils.tokens import register_jwt_callbacks
+from utils.passwords import password_hasher
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    # overrides for this app only, e.g. a test database
+    if config:
+        app.config.update(config)
 
     # ✅ APPLY CORS FIRST (IMPORTANT)
     CORS(
@@ -22,12 +31,16 @@ def create_app():
 
     # ✅ Extensions
     db.init_app(app)
-    JWTManager(app)
+    jwt = JWTManager(app)
+    register_jwt_callbacks(jwt)
     Bcrypt(app)
+    password_hasher.init_app(app)
     Migrate(app, db)
 
     # ✅ Register routes AFTER CORS
     register_routes(app)
+    register_commands(app)
+    register_jobs(app)
 
     @app.route('/api/health')
     def health():
@@ -38,4 +51,7 @@ def create_app():
 
 if __name__ == "__main__":
     app = create_app()
+    # the debug reloader runs the app in a child process; start the jobs only there
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        scheduler.start()
     app.run(debug=True, port=5000)
@@ -0,0 +1,105 @@
+"""
+Check-in Concurrency Benchmark
+Run: python bench_checkin.py [--employees 500] [--threads 16] [--retries 0.2]
+
+Fires one check-in per employee from parallel threads against a throwaway
+SQLite database, plus a share of client retries (same Idempotency-Key) and
+blind duplicates (no key), then reports throughput, status codes and the
+error rate (5xx responses).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+_fd, DB_PATH = tempfile.mkstemp(suffix='.db')
+os.close(_fd)
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+from app import create_app
+from models import db, User, Employee, Attendance
+from utils.principal import Principal
+from utils.tokens import issue_tokens
+
+def seed_employees(app, count):
+    """Bulk-insert `count` users/employees and return an access token for each"""
+    with app.app_context():
+        db.session.execute(db.insert(User), [
+            {'email': f'bench{i}@company.com', 'password_hash': '!', 'role': 'Employee'}
+            for i in range(count)
+        ])
+        user_ids = [u for (u,) in db.session.query(User.id).order_by(User.id)]
+        db.session.execute(db.insert(Employee), [
+            {
+                'user_id': user_id,
+                'employee_code': f'EMP{i + 1:05d}',
+                'first_name': 'Bench',
+                'last_name': str(i),
+                'date_of_joining': date(2024, 1, 1)
+            }
+            for i, user_id in enumerate(user_ids)
+        ])
+        db.session.commit()
+
+        tokens = []
+        for user_id, employee_id in db.session.query(Employee.user_id, Employee.id).order_by(Employee.id):
+            access_token, _ = issue_tokens(Principal(user_id, 'Employee', True, employee_id))
+            tokens.append(access_token)
+        return tokens
+
+def check_in(app, token, key=None):
+    headers = {'Authorization': f'Bearer {token}'}
+    if key:
+        headers['Idempotency-Key'] = key
+    response = app.test_client().post('/api/attendance/checkin', headers=headers)
+    return response.status_code, response.headers.get('Idempotent-Replayed') == 'true'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--retries', type=float, default=0.2,
+                        help='share of employees that also send a retry and a duplicate')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+    try:
+        tokens = seed_employees(app, args.employees)
+
+        calls = [(token, f'checkin-{i}') for i, token in enumerate(tokens)]
+        retried = random.sample(range(len(tokens)), int(len(tokens) * args.retries))
+        calls += [(tokens[i], f'checkin-{i}') for i in retried]  # retry, same key
+        calls += [(tokens[i], None) for i in retried]            # duplicate, no key
+        random.shuffle(calls)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            results = list(executor.map(lambda call: check_in(app, *call), calls))
+        elapsed = time.perf_counter() - started
+
+        statuses = Counter(status for status, _ in results)
+        replayed = sum(1 for _, was_replayed in results if was_replayed)
+        errors = sum(count for status, count in statuses.items() if status >= 500)
+        with app.app_context():
+            rows = Attendance.query.filter_by(date=date.today()).count()
+
+        print("=" * 60)
+        print(f"CHECK-IN CONCURRENCY ({len(calls)} requests, {args.threads} threads)")
+        print("=" * 60)
+        print(f"throughput : {len(calls) / elapsed:.1f} req/s")
+        print(f"statuses   : {dict(sorted(statuses.items()))}")
+        print(f"replayed   : {replayed}")
+        print(f"error rate : {errors / len(calls):.2%}")
+        print(f"rows       : {rows} attendance rows for {len(tokens)} employees")
+    finally:
+        os.remove(DB_PATH)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Login Throughput Benchmark
+Run: python bench_login.py [--requests 200] [--threads 16]
+
+Measures /api/auth/login throughput for several bcrypt cost factors and
+hashing pool sizes against a throwaway SQLite database.
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+_fd, DB_PATH = tempfile.mkstemp(suffix='.db')
+os.close(_fd)
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+# Measure hashing throughput, not the auth throttles
+os.environ['AUTH_RATE_LIMIT_PER_IP'] = '1000000/1'
+os.environ['AUTH_RATE_LIMIT_PER_SUBJECT'] = '1000000/1'
+os.environ['AUTH_HASHING_CONCURRENCY'] = '1000'
+
+from app import create_app
+from models import db, User, Employee
+from utils.passwords import password_hasher
+
+EMAIL = 'bench@company.com'
+PASSWORD = 'bench123'
+
+COSTS = [10, 12]
+POOL_SIZES = [0, 2, 4, os.cpu_count() or 1]
+
+def seed_user(app):
+    with app.app_context():
+        Employee.query.delete()
+        User.query.delete()
+        user = User(email=EMAIL, role='Employee')
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Employee(
+            user_id=user.id,
+            employee_code='EMP00001',
+            first_name='Bench',
+            last_name='User',
+            date_of_joining=date(2024, 1, 1)
+        ))
+        db.session.commit()
+
+def login(app):
+    response = app.test_client().post('/api/auth/login', json={
+        'email': EMAIL,
+        'password': PASSWORD
+    })
+    return response.status_code
+
+def run(app, cost, pool_size, total, threads):
+    app.config.update(BCRYPT_LOG_ROUNDS=cost, PASSWORD_HASH_POOL_SIZE=pool_size)
+    password_hasher.init_app(app)
+    seed_user(app)
+    login(app)  # warm up the pool
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        statuses = Counter(executor.map(lambda _: login(app), range(total)))
+    elapsed = time.perf_counter() - started
+
+    return total / elapsed, statuses
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+    print("=" * 60)
+    print(f"LOGIN THROUGHPUT ({args.requests} requests, {args.threads} threads)")
+    print("=" * 60)
+    print(f"{'cost':>6} {'pool':>6} {'req/s':>10}  statuses")
+    try:
+        for cost in COSTS:
+            for pool_size in sorted(set(POOL_SIZES)):
+                rate, statuses = run(app, cost, pool_size, args.requests, args.threads)
+                print(f"{cost:>6} {pool_size:>6} {rate:>10.1f}  {dict(statuses)}")
+    finally:
+        password_hasher.shutdown()
+        os.remove(DB_PATH)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import click
+from models import db
+from utils.search import install_search_index
+from utils.departments import rebuild_department_summary
+from utils.counters import reconcile_counters
+from utils.rollups import rebuild_attendance_rollups
+from utils.archive import archive_attendance, archive_cutoff
+from utils.closing import close_day, close_recent_days
+from utils.leave_balances import recompute_leave_balances
+from utils.importer import EmployeeImport, iter_csv_rows, iter_ndjson_rows
+from utils.scheduler import scheduler
+
+def register_commands(app):
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """Create (if missing) and rebuild the employee search index"""
+        with db.engine.begin() as connection:
+            install_search_index(connection)
+        click.echo("✅ Employee search index rebuilt")
+
+    @app.cli.command('rebuild-departments')
+    def rebuild_departments():
+        """Recompute department headcounts from the employees table"""
+        with db.engine.begin() as connection:
+            count = rebuild_department_summary(connection)
+        click.echo(f"✅ Department summary rebuilt ({count} departments)")
+
+    @app.cli.command('rebuild-attendance-rollups')
+    def rebuild_attendance_rollups_command():
+        """Recompute the daily/weekly/monthly/yearly attendance rollups"""
+        with db.engine.begin() as connection:
+            count = rebuild_attendance_rollups(connection)
+        click.echo(f"✅ Attendance rollups rebuilt ({count} rows)")
+
+    @app.cli.command('archive-attendance')
+    @click.option('--months', default=None, type=int,
+                  help='Keep this many whole months hot (default: ATTENDANCE_ARCHIVE_AFTER_MONTHS)')
+    @click.option('--batch-size', default=5000, show_default=True)
+    def archive_attendance_command(months, batch_size):
+        """Move old attendance rows into the per-year archive files"""
+        if months is None:
+            months = app.config['ATTENDANCE_ARCHIVE_AFTER_MONTHS']
+        cutoff = archive_cutoff(months)
+        if cutoff is None:
+            click.echo("Archiving is disabled (months = 0)")
+            return
+        moved = archive_attendance(cutoff, batch_size)
+        if moved is None:
+            click.echo("Another process is archiving; try again later")
+            return
+        click.echo(f"✅ Archived {moved} attendance records dated before {cutoff}")
+
+    @app.cli.command('close-attendance-days')
+    @click.option('--date', 'day', default=None, type=click.DateTime(formats=['%Y-%m-%d']),
+                  help='Close only this day (default: the last ATTENDANCE_CLOSE_LOOKBACK_DAYS days)')
+    def close_attendance_days(day):
+        """Mark missing attendance Absent/Weekend/Holiday and check out open check-ins"""
+        if day:
+            result = close_day(day.date())
+            results = [result] if result else None
+        else:
+            results = close_recent_days(app.config['ATTENDANCE_CLOSE_LOOKBACK_DAYS'])
+        if results is None:
+            click.echo("Another process is closing attendance days; try again later")
+            return
+        for result in results:
+            click.echo(f"   {result['date']}: {result['filled']} marked {result['status']}, "
+                       f"{result['closed']} check-ins closed")
+        click.echo(f"✅ Closed {len(results)} attendance days")
+
+    @app.cli.command('reconcile-counters')
+    @click.option('--checkin-days', default=None, type=int,
+                  help='Days of check-in counters to recount (default: COUNTER_RECONCILE_CHECKIN_DAYS)')
+    def reconcile_counters_command(checkin_days):
+        """Recount the admin dashboard counters and fix any drift"""
+        if checkin_days is None:
+            checkin_days = app.config['COUNTER_RECONCILE_CHECKIN_DAYS']
+        drift = reconcile_counters(checkin_days)
+        for name, (stored, actual) in sorted(drift.items()):
+            click.echo(f"   {name}: {stored} -> {actual}")
+        click.echo(f"✅ Counters reconciled ({len(drift)} corrected)")
+
+    @app.cli.command('recompute-leave-balances')
+    def recompute_leave_balances_command():
+        """Rebuild the leave balance ledger from leave requests and fix any drift"""
+        drift = recompute_leave_balances()
+        for (employee_id, year, leave_type), (stored, actual) in drift.items():
+            click.echo(f"   employee {employee_id} {year} {leave_type}: {stored} -> {actual}")
+        click.echo(f"✅ Leave balances recomputed ({len(drift)} corrected)")
+
+    @app.cli.command('import-employees')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+                  help='Input format (default: from the file extension)')
+    @click.option('--batch-size', default=500, show_default=True)
+    def import_employees(path, fmt, batch_size):
+        """Bulk import employees from a CSV or NDJSON file"""
+        fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = iter_csv_rows(f) if fmt == 'csv' else iter_ndjson_rows(f)
+            summary = EmployeeImport(batch_size=batch_size).run(rows)
+
+        click.echo(f"✅ Imported {summary['imported']} employees, {summary['failed']} failed")
+        for error in summary['errors']:
+            click.echo(f"   row {error['row']}: {error['error']}")
+
+    @app.cli.command('run-jobs')
+    def run_jobs():
+        """Run the periodic jobs in this process until interrupted"""
+        click.echo(f"✅ Running jobs: {', '.join(scheduler.job_names()) or 'none enabled'}")
+        scheduler.run_forever()
@@ -17,6 +17,86 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=8)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
+    # Principal cache (user/role/employee lookups per request)
+    PRINCIPAL_CACHE_SIZE = int(os.getenv('PRINCIPAL_CACHE_SIZE', 4096))
+    PRINCIPAL_CACHE_TTL = int(os.getenv('PRINCIPAL_CACHE_TTL', 60))
+    
+    # Token revocation index is reloaded from the DB at most this often
+    TOKEN_REVOCATION_SYNC_SECONDS = int(os.getenv('TOKEN_REVOCATION_SYNC_SECONDS', 30))
+    
+    # Password hashing: bcrypt cost and process pool size (0 = hash inline).
+    # The pool is opt-in; its processes are spawned when the app is created
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_POOL_SIZE = int(os.getenv('PASSWORD_HASH_POOL_SIZE', 0))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32))
+    
+    # Auth endpoint throttling ("<requests>/<seconds>" per token bucket)
+    AUTH_RATE_LIMIT_PER_IP = os.getenv('AUTH_RATE_LIMIT_PER_IP', '30/60')
+    AUTH_RATE_LIMIT_PER_SUBJECT = os.getenv('AUTH_RATE_LIMIT_PER_SUBJECT', '5/60')
+    AUTH_HASHING_CONCURRENCY = int(os.getenv('AUTH_HASHING_CONCURRENCY', 8))
+    
+    # Cached totals for cursor-paginated listings (?include_total=true)
+    PAGINATION_COUNT_CACHE_TTL = int(os.getenv('PAGINATION_COUNT_CACHE_TTL', 60))
+    
+    # Employee codes are reserved from the sequences table in blocks per process
+    EMPLOYEE_CODE_BLOCK_SIZE = int(os.getenv('EMPLOYEE_CODE_BLOCK_SIZE', 20))
+    
+    # Department directory
+    DEPARTMENT_CACHE_TTL = int(os.getenv('DEPARTMENT_CACHE_TTL', 300))
+    
+    # Bulk employee import
+    IMPORT_MAX_REPORTED_ERRORS = int(os.getenv('IMPORT_MAX_REPORTED_ERRORS', 1000))
+    
+    # Admin dashboard counters and their periodic reconciliation (0 = off)
+    COUNTER_RECONCILE_SECONDS = int(os.getenv('COUNTER_RECONCILE_SECONDS', 3600))
+    COUNTER_RECONCILE_CHECKIN_DAYS = int(os.getenv('COUNTER_RECONCILE_CHECKIN_DAYS', 7))
+    
+    # Periodic jobs: started by `python app.py` only when set; or run them with `flask run-jobs`
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'false').lower() == 'true'
+    # Jobs that must not overlap hold a lease this long,
+    # renewed as they make progress; a crashed holder's lease expires
+    JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 600))
+    
+    # Idempotency-Key replay window for attendance punches
+    IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 86400))
+    
+    # Daily attendance board summary cache (seconds)
+    ATTENDANCE_BOARD_CACHE_TTL = int(os.getenv('ATTENDANCE_BOARD_CACHE_TTL', 5))
+    
+    # Monthly attendance report: check-ins after this time (HH:MM) count as late
+    ATTENDANCE_LATE_AFTER = os.getenv('ATTENDANCE_LATE_AFTER', '09:30')
+    ATTENDANCE_REPORT_CHUNK_SIZE = int(os.getenv('ATTENDANCE_REPORT_CHUNK_SIZE', 1000))
+    
+    # Largest batch accepted by POST /api/attendance/manual/bulk
+    ATTENDANCE_BULK_MAX_ROWS = int(os.getenv('ATTENDANCE_BULK_MAX_ROWS', 5000))
+    
+    # Attendance archive: rows older than N whole months move to per-year
+    # SQLite files (relative paths are under the instance folder; 0 = off)
+    ATTENDANCE_ARCHIVE_DIR = os.getenv('ATTENDANCE_ARCHIVE_DIR', 'attendance_archive')
+    ATTENDANCE_ARCHIVE_AFTER_MONTHS = int(os.getenv('ATTENDANCE_ARCHIVE_AFTER_MONTHS', 0))
+    ATTENDANCE_ARCHIVE_SECONDS = int(os.getenv('ATTENDANCE_ARCHIVE_SECONDS', 86400))
+    
+    # Nightly close of attendance days: missing rows become Absent/Weekend/
+    # Holiday and open check-ins are checked out (scheduler interval, 0 = off)
+    ATTENDANCE_CLOSE_SECONDS = int(os.getenv('ATTENDANCE_CLOSE_SECONDS', 3600))
+    ATTENDANCE_CLOSE_LOOKBACK_DAYS = int(os.getenv('ATTENDANCE_CLOSE_LOOKBACK_DAYS', 3))
+    ATTENDANCE_AUTO_CHECKOUT = os.getenv('ATTENDANCE_AUTO_CHECKOUT', '18:00')
+    WEEKEND_DAYS = [int(d) for d in os.getenv('WEEKEND_DAYS', '5,6').split(',') if d.strip()]
+    
+    # Approved leave is written as Leave attendance rows; these days are skipped
+    LEAVE_SKIP_WEEKENDS = os.getenv('LEAVE_SKIP_WEEKENDS', 'true').lower() == 'true'
+    LEAVE_SKIP_HOLIDAYS = os.getenv('LEAVE_SKIP_HOLIDAYS', 'true').lower() == 'true'
+    
+    # Leave policies (quotas, accrual) are cached in-process for this many seconds
+    LEAVE_POLICY_CACHE_TTL = int(os.getenv('LEAVE_POLICY_CACHE_TTL', 300))
+    
+    # Team leave calendar: longest window served and iCalendar render cache (seconds)
+    LEAVE_CALENDAR_MAX_DAYS = int(os.getenv('LEAVE_CALENDAR_MAX_DAYS', 366))
+    LEAVE_CALENDAR_CACHE_TTL = int(os.getenv('LEAVE_CALENDAR_CACHE_TTL', 300))
+    
+    # Largest batch accepted by POST /api/leaves/review/bulk
+    LEAVE_BULK_REVIEW_MAX_ITEMS = int(os.getenv('LEAVE_BULK_REVIEW_MAX_ITEMS', 500))
+    
     # App
     SECRET_KEY = os.getenv('SECRET_KEY', 'app-secret-key')
     DEBUG = os.getenv('DEBUG', True)
\ No newline at end of file
@@ -0,0 +1,29 @@
+from utils.scheduler import scheduler
+from utils.counters import reconcile_counters
+from utils.idempotency import purge_expired_keys
+from utils.archive import archive_attendance, archive_cutoff
+from utils.closing import close_recent_days
+
+def register_jobs(app):
+    scheduler.init_app(app)
+    scheduler.add_job(
+        'reconcile-counters',
+        app.config['COUNTER_RECONCILE_SECONDS'],
+        lambda: reconcile_counters(app.config['COUNTER_RECONCILE_CHECKIN_DAYS'])
+    )
+    scheduler.add_job(
+        'purge-idempotency-keys',
+        app.config['IDEMPOTENCY_KEY_TTL'],
+        lambda: purge_expired_keys(app.config['IDEMPOTENCY_KEY_TTL'])
+    )
+    scheduler.add_job(
+        'close-attendance-days',
+        app.config['ATTENDANCE_CLOSE_SECONDS'],
+        lambda: close_recent_days(app.config['ATTENDANCE_CLOSE_LOOKBACK_DAYS'])
+    )
+    if app.config['ATTENDANCE_ARCHIVE_AFTER_MONTHS'] > 0:
+        scheduler.add_job(
+            'archive-attendance',
+            app.config['ATTENDANCE_ARCHIVE_SECONDS'],
+            lambda: archive_attendance(archive_cutoff(app.config['ATTENDANCE_ARCHIVE_AFTER_MONTHS']))
+        )
@@ -0,0 +1,60 @@
+"""add hot filter indexes
+
+Revision ID: 4104f63be087
+Revises: 
+Create Date: 2026-10-18 06:45:58.176513
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4104f63be087'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (table, index name, columns) - kept in step with the models' __table_args__
+INDEXES = [
+    ('leave_requests', 'ix_leave_requests_employee_status_start', ['employee_id', 'status', 'start_date']),
+    ('leave_requests', 'ix_leave_requests_employee_created', ['employee_id', 'created_at']),
+    ('leave_requests', 'ix_leave_requests_status_created', ['status', 'created_at']),
+    ('leave_requests', 'ix_leave_requests_created', ['created_at', 'id']),
+    ('notifications', 'ix_notifications_employee_read_created', ['employee_id', 'is_read', 'created_at']),
+    ('payroll', 'ix_payroll_year_month_status', ['year', 'month', 'payment_status']),
+    ('payroll', 'ix_payroll_employee_period', ['employee_id', 'year', 'month']),
+    ('payroll', 'ix_payroll_status', ['payment_status']),
+    ('employees', 'ix_employees_department', ['department']),
+    ('users', 'ix_users_role_active', ['role', 'is_active']),
+    ('attendance', 'ix_attendance_date_status', ['date', 'status']),
+]
+
+
+def _existing_indexes():
+    """{table: {index names}} for the tables that exist
+
+    The schema itself is created by db.create_all(), which already builds
+    these indexes on new databases, so only the missing ones are added.
+    """
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    return {
+        table: {index['name'] for index in inspector.get_indexes(table)}
+        for table in {table for table, _, _ in INDEXES} & tables
+    }
+
+
+def upgrade():
+    existing = _existing_indexes()
+    for table, name, columns in INDEXES:
+        if table in existing and name not in existing[table]:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    existing = _existing_indexes()
+    for table, name, columns in reversed(INDEXES):
+        if name in existing.get(table, ()):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,47 @@
+"""add leave calendar indexes
+
+Revision ID: 5bf80669da6b
+Revises: 4104f63be087
+Create Date: 2026-10-18 06:52:53.475790
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5bf80669da6b'
+down_revision = '4104f63be087'
+branch_labels = None
+depends_on = None
+
+
+# (table, index name, columns) - kept in step with the models' __table_args__
+INDEXES = [
+    ('leave_requests', 'ix_leave_requests_status_start_end', ['status', 'start_date', 'end_date']),
+    ('leave_requests', 'ix_leave_requests_total_days', ['total_days']),
+]
+
+
+def _existing_indexes():
+    """{table: {index names}} for the tables that exist (see 4104f63be087)"""
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    return {
+        table: {index['name'] for index in inspector.get_indexes(table)}
+        for table in {table for table, _, _ in INDEXES} & tables
+    }
+
+
+def upgrade():
+    existing = _existing_indexes()
+    for table, name, columns in INDEXES:
+        if table in existing and name not in existing[table]:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    existing = _existing_indexes()
+    for table, name, columns in reversed(INDEXES):
+        if name in existing.get(table, ()):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,147 @@
+"""add derived and job tables
+
+Revision ID: ad3ae03bfb5b
+Revises: 5bf80669da6b
+Create Date: 2026-10-18 07:10:24.551879
+
+"""
+from datetime import date, timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ad3ae03bfb5b'
+down_revision = '5bf80669da6b'
+branch_labels = None
+depends_on = None
+
+
+LEAVE_TYPES = ('Casual', 'Sick', 'Earned', 'Maternity', 'Paternity', 'Unpaid')
+
+
+# (table, columns and constraints) - kept in step with the models
+TABLES = [
+    ('token_revocations', lambda: [
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False, unique=True),
+        sa.Column('revoked_at', sa.DateTime(), nullable=False, index=True),
+        sa.Column('reason', sa.String(50)),
+    ]),
+    ('sequences', lambda: [
+        sa.Column('name', sa.String(50), primary_key=True),
+        sa.Column('next_value', sa.BigInteger(), nullable=False),
+    ]),
+    ('counters', lambda: [
+        sa.Column('name', sa.String(64), primary_key=True),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime()),
+    ]),
+    ('department_summaries', lambda: [
+        sa.Column('department', sa.String(50), primary_key=True),
+        sa.Column('employee_count', sa.Integer(), nullable=False),
+        sa.Column('headcount', sa.Integer(), nullable=False),
+        sa.Column('full_time', sa.Integer(), nullable=False),
+        sa.Column('part_time', sa.Integer(), nullable=False),
+        sa.Column('contract', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime()),
+    ]),
+    ('idempotency_keys', lambda: [
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('key', sa.String(64), nullable=False),
+        sa.Column('endpoint', sa.String(100), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=False),
+        sa.Column('response_body', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), index=True),
+        sa.UniqueConstraint('user_id', 'key', name='unique_user_idempotency_key'),
+    ]),
+    ('attendance_rollups', lambda: [
+        sa.Column('employee_id', sa.Integer(), sa.ForeignKey('employees.id'), primary_key=True),
+        sa.Column('period', sa.Enum('day', 'week', 'month', 'year', name='rollup_period'), primary_key=True),
+        sa.Column('period_start', sa.Date(), primary_key=True),
+        sa.Column('days', sa.Integer(), nullable=False),
+        sa.Column('present', sa.Integer(), nullable=False),
+        sa.Column('absent', sa.Integer(), nullable=False),
+        sa.Column('half_day', sa.Integer(), nullable=False),
+        sa.Column('leave', sa.Integer(), nullable=False),
+        sa.Column('work_hours', sa.Numeric(8, 2), nullable=False),
+        sa.Column('updated_at', sa.DateTime()),
+    ]),
+    ('attendance_archive_segments', lambda: [
+        sa.Column('year', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('path', sa.String(255), nullable=False),
+        sa.Column('first_date', sa.Date(), nullable=False),
+        sa.Column('last_date', sa.Date(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime()),
+    ]),
+    ('holidays', lambda: [
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('date', sa.Date(), nullable=False, unique=True),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('created_at', sa.DateTime()),
+    ]),
+    ('leave_policies', lambda: [
+        sa.Column('leave_type', sa.Enum(*LEAVE_TYPES), primary_key=True),
+        sa.Column('annual_quota', sa.Integer()),
+        sa.Column('accrual', sa.Enum('Yearly', 'Monthly', name='leave_accrual'), nullable=False),
+        sa.Column('updated_at', sa.DateTime()),
+    ]),
+    ('leave_balances', lambda: [
+        sa.Column('employee_id', sa.Integer(), sa.ForeignKey('employees.id'), primary_key=True),
+        sa.Column('year', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('leave_type', sa.Enum(*LEAVE_TYPES), primary_key=True),
+        sa.Column('used', sa.Integer(), nullable=False),
+        sa.Column('pending', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime()),
+    ]),
+    ('job_leases', lambda: [
+        sa.Column('name', sa.String(64), primary_key=True),
+        sa.Column('holder', sa.String(64), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('acquired_at', sa.DateTime()),
+    ]),
+]
+
+
+def _existing_tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _seed(connection):
+    """Fill the derived tables from the source tables, and build the search index
+
+    Uses the app's own rebuild helpers on the migration's connection, so the
+    data matches what `flask rebuild-*` / `reconcile-counters` would write.
+    Each of them replaces or corrects rows, so re-running is harmless.
+    """
+    from utils.counters import recount_counters
+    from utils.departments import rebuild_department_summary
+    from utils.rollups import rebuild_attendance_rollups
+    from utils.leave_balances import rebuild_leave_balances
+    from utils.search import install_search_index
+
+    recount_counters(connection, date.today() - timedelta(days=7))
+    rebuild_department_summary(connection)
+    rebuild_attendance_rollups(connection)
+    rebuild_leave_balances(connection)
+    install_search_index(connection)
+
+
+def upgrade():
+    existing = _existing_tables()
+    if 'employees' not in existing:
+        # New database: db.create_all() builds the whole schema
+        return
+    for table, columns in TABLES:
+        if table not in existing:
+            op.create_table(table, *columns())
+    _seed(op.get_bind())
+
+
+def downgrade():
+    existing = _existing_tables()
+    for table, _ in reversed(TABLES):
+        if table in existing:
+            op.drop_table(table)
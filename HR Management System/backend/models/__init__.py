@@ -7,4 +7,15 @@ from .employee import Employee
 from .attendance import Attendance
 from .leave import LeaveRequest
 from .payroll import Payroll
-from .notification import Notification
\ No newline at end of file
+from .notification import Notification
+from .token_revocation import TokenRevocation
+from .sequence import Sequence
+from .department_summary import DepartmentSummary
+from .counter import StatCounter
+from .idempotency_key import IdempotencyKey
+from .attendance_rollup import AttendanceRollup
+from .archive_segment import ArchiveSegment
+from .holiday import Holiday
+from .leave_policy import LeavePolicy
+from .leave_balance import LeaveBalance
+from .job_lease import JobLease
\ No newline at end of file
@@ -0,0 +1,22 @@
+from . import db
+from datetime import datetime
+
+class ArchiveSegment(db.Model):
+    __tablename__ = 'attendance_archive_segments'
+    
+    year = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(255), nullable=False)
+    first_date = db.Column(db.Date, nullable=False)
+    last_date = db.Column(db.Date, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'year': self.year,
+            'path': self.path,
+            'first_date': self.first_date.isoformat() if self.first_date else None,
+            'last_date': self.last_date.isoformat() if self.last_date else None,
+            'row_count': self.row_count,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
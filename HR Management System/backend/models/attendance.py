@@ -21,6 +21,8 @@ class Attendance(db.Model):
     # Unique constraint: one record per employee per day
     __table_args__ = (
         db.UniqueConstraint('employee_id', 'date', name='unique_employee_date'),
+        # Per-day work (board, closing, check-in counters); covers status counts
+        db.Index('ix_attendance_date_status', 'date', 'status'),
     )
     
     def calculate_work_hours(self):
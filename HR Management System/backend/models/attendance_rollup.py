@@ -0,0 +1,29 @@
+from . import db
+from datetime import datetime
+
+class AttendanceRollup(db.Model):
+    __tablename__ = 'attendance_rollups'
+    
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), primary_key=True)
+    period = db.Column(db.Enum('day', 'week', 'month', 'year', name='rollup_period'), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+    days = db.Column(db.Integer, nullable=False, default=0)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+    half_day = db.Column(db.Integer, nullable=False, default=0)
+    leave = db.Column(db.Integer, nullable=False, default=0)
+    work_hours = db.Column(db.Numeric(8, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'employee_id': self.employee_id,
+            'period': self.period,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'total_days': self.days,
+            'present': self.present,
+            'absent': self.absent,
+            'half_days': self.half_day,
+            'leaves': self.leave,
+            'total_hours': float(self.work_hours or 0)
+        }
@@ -0,0 +1,25 @@
+from . import db
+from datetime import datetime
+
+class DepartmentSummary(db.Model):
+    __tablename__ = 'department_summaries'
+    
+    department = db.Column(db.String(50), primary_key=True)
+    employee_count = db.Column(db.Integer, nullable=False, default=0)
+    headcount = db.Column(db.Integer, nullable=False, default=0)
+    full_time = db.Column(db.Integer, nullable=False, default=0)
+    part_time = db.Column(db.Integer, nullable=False, default=0)
+    contract = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'department': self.department,
+            'employee_count': self.employee_count,
+            'headcount': self.headcount,
+            'employment_types': {
+                'Full-time': self.full_time,
+                'Part-time': self.part_time,
+                'Contract': self.contract
+            }
+        }
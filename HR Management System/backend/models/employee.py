@@ -13,7 +13,7 @@ class Employee(db.Model):
     date_of_birth = db.Column(db.Date)
     gender = db.Column(db.Enum('Male', 'Female', 'Other'))
     address = db.Column(db.Text)
-    department = db.Column(db.String(50))
+    department = db.Column(db.String(50), index=True)
     designation = db.Column(db.String(50))
     date_of_joining = db.Column(db.Date, nullable=False)
     employment_type = db.Column(db.Enum('Full-time', 'Part-time', 'Contract'), default='Full-time')
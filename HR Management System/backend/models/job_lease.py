@@ -0,0 +1,18 @@
+from . import db
+from datetime import datetime
+
+class JobLease(db.Model):
+    __tablename__ = 'job_leases'
+    
+    name = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(64), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    acquired_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None
+        }
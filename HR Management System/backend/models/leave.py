@@ -27,6 +27,17 @@ class LeaveRequest(db.Model):
     # Relationship for reviewer
     reviewer = db.relationship('Employee', foreign_keys=[reviewed_by], backref='reviewed_leaves')
     
+    # Hot filters: overlap/balance checks, my-leaves, pending queue, admin listing,
+    # and the team calendar's bounded start_date range (see utils/leave_calendar.py)
+    __table_args__ = (
+        db.Index('ix_leave_requests_employee_status_start', 'employee_id', 'status', 'start_date'),
+        db.Index('ix_leave_requests_employee_created', 'employee_id', 'created_at'),
+        db.Index('ix_leave_requests_status_created', 'status', 'created_at'),
+        db.Index('ix_leave_requests_created', 'created_at', 'id'),
+        db.Index('ix_leave_requests_status_start_end', 'status', 'start_date', 'end_date'),
+        db.Index('ix_leave_requests_total_days', 'total_days'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
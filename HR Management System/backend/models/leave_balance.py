@@ -0,0 +1,16 @@
+from . import db
+from datetime import datetime
+
+class LeaveBalance(db.Model):
+    """Leave days per employee, year and type, kept in step with leave_requests"""
+    __tablename__ = 'leave_balances'
+    
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    leave_type = db.Column(
+        db.Enum('Casual', 'Sick', 'Earned', 'Maternity', 'Paternity', 'Unpaid'),
+        primary_key=True
+    )
+    used = db.Column(db.Integer, nullable=False, default=0)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
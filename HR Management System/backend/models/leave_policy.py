@@ -0,0 +1,22 @@
+from . import db
+from datetime import datetime
+
+class LeavePolicy(db.Model):
+    __tablename__ = 'leave_policies'
+    
+    leave_type = db.Column(
+        db.Enum('Casual', 'Sick', 'Earned', 'Maternity', 'Paternity', 'Unpaid'),
+        primary_key=True
+    )
+    annual_quota = db.Column(db.Integer)  # NULL = unlimited
+    # Yearly: the whole quota from January 1st; Monthly: 1/12 of it per started month
+    accrual = db.Column(db.Enum('Yearly', 'Monthly', name='leave_accrual'), nullable=False, default='Yearly')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'leave_type': self.leave_type,
+            'annual_quota': self.annual_quota,
+            'accrual': self.accrual,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
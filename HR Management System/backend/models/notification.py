@@ -17,6 +17,11 @@ class Notification(db.Model):
     reference_type = db.Column(db.String(50))  # Table name
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Unread counts and the per-employee feed
+    __table_args__ = (
+        db.Index('ix_notifications_employee_read_created', 'employee_id', 'is_read', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -30,6 +30,9 @@ class Payroll(db.Model):
     # Unique constraint: one payroll per employee per month
     __table_args__ = (
         db.UniqueConstraint('employee_id', 'month', 'year', name='unique_employee_month_year'),
+        db.Index('ix_payroll_year_month_status', 'year', 'month', 'payment_status'),
+        db.Index('ix_payroll_employee_period', 'employee_id', 'year', 'month'),
+        db.Index('ix_payroll_status', 'payment_status'),
     )
     
     def calculate_salary(self):
@@ -0,0 +1,13 @@
+from . import db
+
+class Sequence(db.Model):
+    __tablename__ = 'sequences'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=1)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'next_value': self.next_value
+        }
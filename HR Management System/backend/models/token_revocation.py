@@ -0,0 +1,19 @@
+from . import db
+from datetime import datetime
+
+class TokenRevocation(db.Model):
+    __tablename__ = 'token_revocations'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), unique=True, nullable=False)
+    # Tokens issued (iat) before this instant are rejected
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    reason = db.Column(db.String(50))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None,
+            'reason': self.reason
+        }
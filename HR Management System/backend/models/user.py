@@ -1,5 +1,5 @@
 from . import db
-from flask_bcrypt import generate_password_hash, check_password_hash
+from utils.passwords import password_hasher
 from datetime import datetime
 
 class User(db.Model):
@@ -16,11 +16,19 @@ class User(db.Model):
     # Relationship
     employee = db.relationship('Employee', backref='user', uselist=False, lazy=True)
     
+    # Admin user listing filters
+    __table_args__ = (
+        db.Index('ix_users_role_active', 'role', 'is_active'),
+    )
+    
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         return {
@@ -1,118 +1,119 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Employee, Attendance
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from models import db, Employee, Attendance, Holiday
 from utils.decorators import admin_required
+from utils.principal import current_principal
+from utils.serializers import attendance_serializer
+from utils.http_cache import row_validator, collection_validator, make_validator, not_modified, with_validators
+from utils.attendance_board import SUMMARY_KEYS, board_summary, board_rows
+from utils.archive import cold_segments, archived_rows, archived_dict, segments_version
+from utils.attendance_report import iter_chunks, iter_csv, matrix_rows, department_totals
+from utils.bulk_attendance import BulkAttendance
+from utils.idempotency import request_key, replay, remember
+from utils.punches import punch_in, punch_out
+from utils.rollups import PERIODS, period_bounds, read_rollup
+import calendar
 from datetime import datetime, date, timedelta
 
 attendance_bp = Blueprint('attendance', __name__)
 
-@attendance_bp.route('/checkin', methods=['POST'])
-@jwt_required()
-def check_in():
-    """Mark attendance check-in"""
+def _punch(endpoint, punch, rejection, message):
+    """Check-in/check-out fast path: one guarded write per punch, Idempotency-Key aware"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
-        if not employee:
+        if not principal or not principal.employee_id:
             return jsonify({'error': 'Employee not found'}), 404
         
-        today = date.today()
+        employee_id = principal.employee_id
         
-        existing = Attendance.query.filter_by(
-            employee_id=employee.id,
-            date=today
-        ).first()
+        try:
+            key = request_key()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if existing and existing.check_in:
-            return jsonify({'error': 'Already checked in today'}), 400
+        if key:
+            replayed = replay(principal.user_id, key, endpoint)
+            if replayed:
+                return replayed
         
-        if existing:
-            existing.check_in = datetime.now().time()
-            existing.status = 'Present'
-        else:
-            existing = Attendance(
-                employee_id=employee.id,
-                date=today,
-                check_in=datetime.now().time(),
-                status='Present'
-            )
-            db.session.add(existing)
+        today = date.today()
         
+        if not punch(employee_id, today, datetime.now().time()):
+            db.session.rollback()
+            # A concurrent retry carrying the same key may have just punched
+            replayed = replay(principal.user_id, key, endpoint) if key else None
+            return replayed or (jsonify({'error': rejection(employee_id, today)}), 400)
+        
+        attendance = Attendance.query.options(joinedload(Attendance.employee))\
+            .filter_by(employee_id=employee_id, date=today).one()
+        body = {
+            'message': message,
+            'attendance': attendance.to_dict()
+        }
+        
+        if key:
+            remember(principal.user_id, key, endpoint, body)
         db.session.commit()
         
-        return jsonify({
-            'message': 'Check-in successful',
-            'attendance': existing.to_dict()
-        }), 200
+        return jsonify(body), 200
         
+    except IntegrityError:
+        # Lost the race to store the same Idempotency-Key
+        db.session.rollback()
+        replayed = replay(principal.user_id, key, endpoint)
+        return replayed or (jsonify({'error': 'Request already in progress'}), 409)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _checkout_rejection(employee_id, day):
+    attendance = Attendance.query.filter_by(employee_id=employee_id, date=day).first()
+    if attendance and attendance.check_out:
+        return 'Already checked out today'
+    return 'No check-in found for today'
+
+@attendance_bp.route('/checkin', methods=['POST'])
+@jwt_required()
+def check_in():
+    """Mark attendance check-in"""
+    return _punch('attendance.checkin', punch_in,
+                  lambda employee_id, day: 'Already checked in today', 'Check-in successful')
+
 @attendance_bp.route('/checkout', methods=['POST'])
 @jwt_required()
 def check_out():
     """Mark attendance check-out"""
-    try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
-        
-        if not employee:
-            return jsonify({'error': 'Employee not found'}), 404
-        
-        today = date.today()
-        
-        attendance = Attendance.query.filter_by(
-            employee_id=employee.id,
-            date=today
-        ).first()
-        
-        if not attendance or not attendance.check_in:
-            return jsonify({'error': 'No check-in found for today'}), 400
-        
-        if attendance.check_out:
-            return jsonify({'error': 'Already checked out today'}), 400
-        
-        attendance.check_out = datetime.now().time()
-        attendance.calculate_work_hours()
-        
-        if attendance.work_hours and attendance.work_hours < 4:
-            attendance.status = 'Half-day'
-        
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Check-out successful',
-            'attendance': attendance.to_dict()
-        }), 200
-        
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+    return _punch('attendance.checkout', punch_out, _checkout_rejection, 'Check-out successful')
 
 @attendance_bp.route('/today', methods=['GET'])
 @jwt_required()
 def get_today_attendance():
     """Get today's attendance for logged-in user"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
-        if not employee:
+        if not principal or not principal.employee_id:
             return jsonify({'error': 'Employee not found'}), 404
         
-        attendance = Attendance.query.filter_by(
-            employee_id=employee.id,
-            date=date.today()
-        ).first()
+        employee_id = principal.employee_id
         
-        return jsonify({
+        row, validator = row_validator(
+            db.select(Attendance.id, Attendance.updated_at, Employee.updated_at)
+            .join(Employee, Employee.id == Attendance.employee_id)
+            .where(Attendance.employee_id == employee_id, Attendance.date == date.today())
+        )
+        cached = not_modified(validator)
+        if cached:
+            return cached
+        
+        attendance = Attendance.query.get(row.id) if row else None
+        
+        return with_validators(jsonify({
             'attendance': attendance.to_dict() if attendance else None
-        }), 200
+        }), validator), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -122,32 +123,53 @@ def get_today_attendance():
 def get_my_attendance_history():
     """Get attendance history for logged-in user"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
-        if not employee:
+        if not principal or not principal.employee_id:
             return jsonify({'error': 'Employee not found'}), 404
         
+        employee_id = principal.employee_id
+        
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
-        
-        query = Attendance.query.filter_by(employee_id=employee.id)
-        
-        if start_date:
-            query = query.filter(Attendance.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-        if end_date:
-            query = query.filter(Attendance.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+        start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
         
         if not start_date and not end_date:
-            thirty_days_ago = date.today() - timedelta(days=30)
-            query = query.filter(Attendance.date >= thirty_days_ago)
-        
-        attendances = query.order_by(Attendance.date.desc()).all()
-        
-        return jsonify({
-            'attendances': [att.to_dict() for att in attendances]
-        }), 200
+            start = date.today() - timedelta(days=30)
+        
+        query = Attendance.query.filter_by(employee_id=employee_id)
+        if start:
+            query = query.filter(Attendance.date >= start)
+        if end:
+            query = query.filter(Attendance.date <= end)
+        
+        # Older ranges are served from the archive files as well
+        segments = cold_segments(start, end)
+        
+        validator = collection_validator(query, Attendance.updated_at, extra=segments_version(segments))
+        cached = not_modified(validator)
+        if cached:
+            return cached
+        
+        fields = attendance_serializer.requested_fields()
+        attendances = attendance_serializer.eager(query, fields)\
+            .order_by(Attendance.date.desc()).all()
+        records = attendance_serializer.dump_many(attendances, fields)
+        
+        if segments:
+            hot_dates = {a.date for a in attendances}
+            employee = db.session.get(Employee, employee_id)
+            name = f"{employee.first_name} {employee.last_name}" if employee else None
+            archived = [archived_dict(row, name) for row in archived_rows(segments, [employee_id], start, end)
+                        if row.date not in hot_dates]
+            if fields is not None:
+                archived = [{k: v for k, v in record.items() if k in fields} for record in archived]
+            records = sorted(records + archived, key=lambda record: record.get('date') or '', reverse=True)
+        
+        return with_validators(jsonify({
+            'attendances': records
+        }), validator), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -157,67 +179,162 @@ def get_my_attendance_history():
 def get_weekly_summary():
     """Get weekly attendance summary"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
-        if not employee:
+        if not principal or not principal.employee_id:
             return jsonify({'error': 'Employee not found'}), 404
         
-        today = date.today()
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-        
-        attendances = Attendance.query.filter(
-            Attendance.employee_id == employee.id,
-            Attendance.date >= week_start,
-            Attendance.date <= week_end
-        ).all()
+        employee_id = principal.employee_id
+        week_start, week_end = period_bounds('week', date.today())
+        rollup = read_rollup(employee_id, 'week', week_start)
         
         summary = {
             'week_start': week_start.isoformat(),
             'week_end': week_end.isoformat(),
-            'total_days': len(attendances),
-            'present': sum(1 for a in attendances if a.status == 'Present'),
-            'absent': sum(1 for a in attendances if a.status == 'Absent'),
-            'half_days': sum(1 for a in attendances if a.status == 'Half-day'),
-            'leaves': sum(1 for a in attendances if a.status == 'Leave'),
-            'total_hours': sum(float(a.work_hours or 0) for a in attendances),
-            'daily_records': [att.to_dict() for att in attendances]
+            'total_days': rollup['total_days'],
+            'present': rollup['present'],
+            'absent': rollup['absent'],
+            'half_days': rollup['half_days'],
+            'leaves': rollup['leaves'],
+            'total_hours': rollup['total_hours']
         }
         
+        if request.args.get('include_records', 'true').lower() == 'true':
+            attendances = attendance_serializer.eager(Attendance.query).filter(
+                Attendance.employee_id == employee_id,
+                Attendance.date >= week_start,
+                Attendance.date <= week_end
+            ).order_by(Attendance.date).all()
+            summary['daily_records'] = attendance_serializer.dump_many(attendances)
+        
         return jsonify(summary), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@attendance_bp.route('/summary', methods=['GET'])
+@jwt_required()
+def get_attendance_summary():
+    """Attendance totals for the day/week/month/year containing ?date (own, or ?employee_id for admins)"""
+    try:
+        principal = current_principal()
+        
+        if not principal:
+            return jsonify({'error': 'User not found'}), 404
+        
+        period = request.args.get('period', 'week')
+        if period not in PERIODS:
+            return jsonify({'error': 'Invalid period'}), 400
+        
+        day = datetime.strptime(request.args.get('date', date.today().isoformat()), '%Y-%m-%d').date()
+        
+        employee_id = request.args.get('employee_id', type=int)
+        if employee_id and employee_id != principal.employee_id:
+            if principal.role not in ('Admin', 'HR'):
+                return jsonify({'error': 'Access denied'}), 403
+        else:
+            employee_id = principal.employee_id
+        
+        if not employee_id:
+            return jsonify({'error': 'Employee not found'}), 404
+        
+        return jsonify(read_rollup(employee_id, period, day)), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @attendance_bp.route('/all', methods=['GET'])
 @jwt_required()
 @admin_required
 def get_all_attendance():
-    """Get all employees attendance - Admin only"""
+    """Daily attendance board for all active employees, absentees included - Admin only"""
     try:
         date_str = request.args.get('date', date.today().isoformat())
         query_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         department = request.args.get('department')
+        status = request.args.get('status')
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(request.args.get('per_page', 100, type=int), 500)
         
-        query = Attendance.query.filter_by(date=query_date)
+        if status and status not in SUMMARY_KEYS:
+            return jsonify({'error': 'Invalid status'}), 400
         
-        if department:
-            query = query.join(Employee).filter(Employee.department == department)
+        summary, version = board_summary(query_date, department)
+        validator = make_validator(version)
+        cached = not_modified(validator)
+        if cached:
+            return cached
         
-        attendances = query.all()
+        total = summary[SUMMARY_KEYS[status]] if status else summary['total']
         
-        return jsonify({
+        return with_validators(jsonify({
             'date': date_str,
-            'attendances': [att.to_dict() for att in attendances],
-            'summary': {
-                'total': len(attendances),
-                'present': sum(1 for a in attendances if a.status == 'Present'),
-                'absent': sum(1 for a in attendances if a.status == 'Absent'),
-                'on_leave': sum(1 for a in attendances if a.status == 'Leave')
-            }
-        }), 200
+            'attendances': board_rows(query_date, department, status, page, per_page),
+            'summary': summary,
+            'total': total,
+            'pages': -(-total // per_page),
+            'current_page': page
+        }), validator), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@attendance_bp.route('/reports/monthly', methods=['GET'])
+@jwt_required()
+@admin_required
+def monthly_report():
+    """Employee x day attendance matrix for a month, as paged JSON or streamed CSV - Admin only"""
+    try:
+        today = date.today()
+        year = request.args.get('year', today.year, type=int)
+        month = request.args.get('month', today.month, type=int)
+        department = request.args.get('department')
+        
+        if not 1 <= month <= 12 or not 1 <= year <= 9999:
+            return jsonify({'error': 'Invalid year or month'}), 400
+        
+        late_after = datetime.strptime(current_app.config['ATTENDANCE_LATE_AFTER'], '%H:%M').time()
+        chunk_size = current_app.config['ATTENDANCE_REPORT_CHUNK_SIZE']
+        
+        if request.args.get('format') == 'csv':
+            filename = f"attendance-{year}-{month:02d}{'-' + department if department else ''}.csv"
+            return Response(
+                stream_with_context(iter_csv(year, month, late_after, department, chunk_size)),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+            )
+        
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(request.args.get('per_page', 100, type=int), 500)
+        
+        last_day = date(year, month, calendar.monthrange(year, month)[1])
+        query = Employee.query.filter(Employee.date_of_joining <= last_day)
+        if department:
+            query = query.filter(Employee.department == department)
+        total = query.count()
+        
+        employees = []
+        for chunk in iter_chunks(year, month, late_after, department, per_page,
+                                 offset=(page - 1) * per_page, limit=per_page):
+            employees.extend(matrix_rows(chunk))
+        
+        result = {
+            'year': year,
+            'month': month,
+            'days': calendar.monthrange(year, month)[1],
+            'employees': employees,
+            'total': total,
+            'pages': -(-total // per_page),
+            'current_page': page
+        }
+        if request.args.get('include_departments', 'false').lower() == 'true':
+            result['departments'] = department_totals(
+                iter_chunks(year, month, late_after, department, chunk_size)
+            )
+        
+        return jsonify(result), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -271,6 +388,103 @@ def manual_attendance():
             'attendance': existing.to_dict()
         }), 200
         
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@attendance_bp.route('/manual/bulk', methods=['POST'])
+@jwt_required()
+@admin_required
+def bulk_manual_attendance():
+    """Manual attendance for many employee-dates in one transaction - Admin only"""
+    try:
+        data = request.get_json()
+        records = data.get('records') if isinstance(data, dict) else data
+        
+        if not isinstance(records, list) or not records:
+            return jsonify({'error': 'records must be a non-empty list'}), 400
+        
+        max_rows = current_app.config['ATTENDANCE_BULK_MAX_ROWS']
+        if len(records) > max_rows:
+            return jsonify({'error': f'At most {max_rows} records per request'}), 413
+        
+        summary = BulkAttendance(records).run()
+        db.session.commit()
+        
+        return jsonify({
+            'message': f"Recorded {summary['created'] + summary['updated']} attendance entries",
+            **summary
+        }), 200
+        
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Attendance changed concurrently, please retry'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@attendance_bp.route('/holidays', methods=['GET'])
+@jwt_required()
+def get_holidays():
+    """Holiday calendar for a year"""
+    try:
+        year = request.args.get('year', date.today().year, type=int)
+        holidays = Holiday.query.filter(
+            Holiday.date >= date(year, 1, 1),
+            Holiday.date <= date(year, 12, 31)
+        ).order_by(Holiday.date).all()
+        
+        return jsonify({'holidays': [h.to_dict() for h in holidays]}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@attendance_bp.route('/holidays', methods=['POST'])
+@jwt_required()
+@admin_required
+def add_holiday():
+    """Add a day to the holiday calendar - Admin only"""
+    try:
+        data = request.get_json()
+        
+        for field in ['date', 'name']:
+            if not data.get(field):
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        holiday_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        if Holiday.query.filter_by(date=holiday_date).first():
+            return jsonify({'error': 'A holiday already exists on that date'}), 400
+        
+        holiday = Holiday(date=holiday_date, name=data['name'])
+        db.session.add(holiday)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Holiday added successfully',
+            'holiday': holiday.to_dict()
+        }), 201
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@attendance_bp.route('/holidays/<int:id>', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def delete_holiday(id):
+    """Remove a day from the holiday calendar - Admin only"""
+    try:
+        holiday = db.session.get(Holiday, id)
+        if not holiday:
+            return jsonify({'error': 'Holiday not found'}), 404
+        
+        db.session.delete(holiday)
+        db.session.commit()
+        
+        return jsonify({'message': 'Holiday deleted successfully'}), 200
+        
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
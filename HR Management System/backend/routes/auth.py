@@ -1,15 +1,23 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import (
-    create_access_token, create_refresh_token, 
-    jwt_required, get_jwt_identity
+    create_access_token, jwt_required, get_jwt_identity
 )
 from models import db, User, Employee
 from utils.helpers import generate_employee_code
+from utils.passwords import HasherBusy
+from utils.rate_limit import auth_rate_limited, auth_limiter_stats
+from utils.decorators import admin_required
+from utils.principal import Principal, load_principal, invalidate_principal
+from utils.tokens import issue_tokens, principal_claims
 from datetime import datetime
 from flask_cors import cross_origin
 auth_bp = Blueprint('auth', __name__)
 
+def _user_from_token():
+    return f"user:{get_jwt_identity()}"
+
 @auth_bp.route('/register', methods=['POST'])
+@auth_rate_limited()
 def register():
     """Register new user and create employee profile"""
     try:
@@ -23,6 +31,9 @@ def register():
         if User.query.filter_by(email=data['email']).first():
             return jsonify({'error': 'Email already registered'}), 409
         
+        # Reserve the code before any writes: the allocator commits on its own connection
+        employee_code = generate_employee_code()
+        
         user = User(
             email=data['email'],
             role=data.get('role', 'Employee')
@@ -33,7 +44,7 @@ def register():
         
         employee = Employee(
             user_id=user.id,
-            employee_code=generate_employee_code(),
+            employee_code=employee_code,
             first_name=data['first_name'],
             last_name=data['last_name'],
             phone=data.get('phone'),
@@ -48,9 +59,9 @@ def register():
         db.session.add(employee)
         db.session.commit()
         
-        # ✅ FIX: Convert user.id to string
-        access_token = create_access_token(identity=str(user.id))
-        refresh_token = create_refresh_token(identity=str(user.id))
+        access_token, refresh_token = issue_tokens(
+            Principal(user.id, user.role, user.is_active, employee.id)
+        )
         
         return jsonify({
             'message': 'Registration successful',
@@ -60,11 +71,15 @@ def register():
             'refresh_token': refresh_token
         }), 201
         
+    except HasherBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Server busy, please retry shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 @auth_bp.route('/login', methods=['POST'])
 @cross_origin()
+@auth_rate_limited()
 def login():
     """Login user"""
     try:
@@ -81,12 +96,19 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Account is deactivated'}), 403
         
-        # ✅ FIX: Convert user.id to string
-        access_token = create_access_token(identity=str(user.id))
-        refresh_token = create_refresh_token(identity=str(user.id))
+        # Upgrade hashes created with a different cost factor
+        if user.password_needs_rehash():
+            try:
+                user.set_password(data['password'])
+                db.session.commit()
+            except HasherBusy:
+                pass  # best effort, retried on a later login
         
         employee = Employee.query.filter_by(user_id=user.id).first()
-        print("LOGIN API HIT")
+        
+        access_token, refresh_token = issue_tokens(
+            Principal(user.id, user.role, user.is_active, employee.id if employee else None)
+        )
 
         return jsonify({
             'message': 'Login successful',
@@ -96,6 +118,9 @@ def login():
             'refresh_token': refresh_token
         }), 200
         
+    except HasherBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Server busy, please retry shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -103,9 +128,22 @@ def login():
 @jwt_required(refresh=True)
 def refresh():
     """Refresh access token"""
-    user_id = get_jwt_identity()
-    # ✅ user_id is already string from token
-    access_token = create_access_token(identity=user_id)
+    user_id = int(get_jwt_identity())
+    
+    # Re-read role/employee so the new access token carries current claims
+    invalidate_principal(user_id)
+    principal = load_principal(user_id)
+    
+    if not principal:
+        return jsonify({'error': 'User not found'}), 404
+    
+    if not principal.is_active:
+        return jsonify({'error': 'Account is deactivated'}), 403
+    
+    access_token = create_access_token(
+        identity=str(user_id),
+        additional_claims=principal_claims(principal)
+    )
     return jsonify({'access_token': access_token}), 200
 
 @auth_bp.route('/me', methods=['GET'])
@@ -128,6 +166,7 @@ def get_current_user():
 
 @auth_bp.route('/change-password', methods=['PUT'])
 @jwt_required()
+@auth_rate_limited(subject=_user_from_token)
 def change_password():
     """Change user password"""
     try:
@@ -147,6 +186,16 @@ def change_password():
         
         return jsonify({'message': 'Password changed successfully'}), 200
         
+    except HasherBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Server busy, please retry shortly'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/limits', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_limiter_stats():
+    """Rate limiter and hashing concurrency counters - Admin only"""
+    return jsonify(auth_limiter_stats()), 200
@@ -1,8 +1,20 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import codecs
+import json
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import jwt_required
 from models import db, User, Employee
 from utils.decorators import admin_required
-from datetime import datetime
+from utils.principal import current_principal, invalidate_principal
+from utils.tokens import revoke_user_tokens
+from utils.search import employee_search_filter, search_employees
+from utils.pagination import keyset_paginate, cached_count, InvalidCursor
+from utils.serializers import employee_serializer
+from utils.importer import EmployeeImport, iter_csv_rows, iter_ndjson_rows
+from utils.passwords import HasherBusy
+from utils.departments import department_summary
+from utils.counters import read_counters, checkins_key
+from utils.http_cache import row_validator, collection_validator, body_validator, not_modified, with_validators
+from datetime import datetime, date
 
 employee_bp = Blueprint('employee', __name__)
 
@@ -16,6 +28,7 @@ def get_all_employees():
         per_page = request.args.get('per_page', 10, type=int)
         department = request.args.get('department')
         search = request.args.get('search')
+        fields = employee_serializer.requested_fields()
         
         query = Employee.query
         
@@ -23,40 +36,94 @@ def get_all_employees():
             query = query.filter(Employee.department == department)
         
         if search:
-            query = query.filter(
-                db.or_(
-                    Employee.first_name.ilike(f'%{search}%'),
-                    Employee.last_name.ilike(f'%{search}%'),
-                    Employee.employee_code.ilike(f'%{search}%')
-                )
+            query = query.filter(employee_search_filter(search))
+        
+        # Opt-in keyset pagination: ?cursor= (empty for the first page)
+        if 'cursor' in request.args:
+            result = keyset_paginate(
+                employee_serializer.eager(query, fields), [Employee.id],
+                request.args.get('cursor'), min(per_page, 100)
             )
+            response = {
+                'employees': employee_serializer.dump_many(result.items, fields),
+                'next_cursor': result.next_cursor,
+                'prev_cursor': result.prev_cursor
+            }
+            if request.args.get('include_total', 'false').lower() == 'true':
+                response['total'] = cached_count(query, ('employees', department, search))
+            validator = body_validator(response)
+            cached = not_modified(validator)
+            if cached:
+                return cached
+            return with_validators(jsonify(response), validator), 200
         
-        employees = query.paginate(page=page, per_page=per_page)
+        validator = collection_validator(
+            query.join(User, User.id == Employee.user_id), Employee.updated_at, User.updated_at
+        )
+        cached = not_modified(validator)
+        if cached:
+            return cached
         
-        return jsonify({
-            'employees': [emp.to_dict() for emp in employees.items],
+        employees = employee_serializer.eager(query, fields).paginate(page=page, per_page=per_page)
+        
+        return with_validators(jsonify({
+            'employees': employee_serializer.dump_many(employees.items, fields),
             'total': employees.total,
             'pages': employees.pages,
             'current_page': page
+        }), validator), 200
+        
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@employee_bp.route('/search', methods=['GET'])
+@jwt_required()
+@admin_required
+def search_directory():
+    """Search-as-you-type over the employee directory - Admin only"""
+    try:
+        term = request.args.get('q', '')
+        limit = min(request.args.get('limit', 10, type=int), 50)
+        department = request.args.get('department')
+        
+        return jsonify({
+            'query': term,
+            'results': search_employees(term, limit=limit, department=department)
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _employee_version(criterion):
+    """Columns an employee's to_dict() depends on changing with: its own and its user's updated_at"""
+    return db.select(Employee.id, Employee.updated_at, User.updated_at)\
+        .join(User, User.id == Employee.user_id).where(criterion)
+
 @employee_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_employee(id):
     """Get employee by ID"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        employee = Employee.query.get_or_404(id)
+        principal = current_principal()
+        
+        if not principal:
+            return jsonify({'error': 'User not found'}), 404
         
-        if user.role == 'Employee' and employee.user_id != user_id:
+        if principal.role == 'Employee' and id != principal.employee_id:
             return jsonify({'error': 'Access denied'}), 403
         
-        return jsonify({'employee': employee.to_dict()}), 200
+        row, validator = row_validator(_employee_version(Employee.id == id))
+        if row is None:
+            return jsonify({'error': 'Employee not found'}), 404
+        
+        cached = not_modified(validator)
+        if cached:
+            return cached
+        
+        employee = Employee.query.get(id)
+        return with_validators(jsonify({'employee': employee.to_dict()}), validator), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -66,14 +133,21 @@ def get_employee(id):
 def get_own_profile():
     """Get logged-in user's employee profile"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
-        if not employee:
+        if not principal or not principal.employee_id:
             return jsonify({'error': 'Employee profile not found'}), 404
         
-        return jsonify({'employee': employee.to_dict()}), 200
+        row, validator = row_validator(_employee_version(Employee.id == principal.employee_id))
+        if row is None:
+            return jsonify({'error': 'Employee profile not found'}), 404
+        
+        cached = not_modified(validator)
+        if cached:
+            return cached
+        
+        employee = Employee.query.get(principal.employee_id)
+        return with_validators(jsonify({'employee': employee.to_dict()}), validator), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -83,9 +157,8 @@ def get_own_profile():
 def update_own_profile():
     """Update own profile - limited fields"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
+        employee = Employee.query.get(principal.employee_id) if principal and principal.employee_id else None
         
         if not employee:
             return jsonify({'error': 'Employee profile not found'}), 404
@@ -130,11 +203,17 @@ def update_employee(id):
                 else:
                     setattr(employee, field, data[field])
         
-        if 'role' in data and employee.user:
+        role_changed = False
+        if 'role' in data and employee.user and employee.user.role != data['role']:
             employee.user.role = data['role']
+            revoke_user_tokens(employee.user_id, reason='role_changed')
+            role_changed = True
         
         db.session.commit()
         
+        if role_changed:
+            invalidate_principal(employee.user_id)
+        
         return jsonify({
             'message': 'Employee updated successfully',
             'employee': employee.to_dict()
@@ -154,8 +233,10 @@ def delete_employee(id):
         
         if employee.user:
             employee.user.is_active = False
+            revoke_user_tokens(employee.user_id, reason='deactivated')
         
         db.session.commit()
+        invalidate_principal(employee.user_id)
         
         return jsonify({'message': 'Employee deactivated successfully'}), 200
         
@@ -163,17 +244,52 @@ def delete_employee(id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@employee_bp.route('/import', methods=['POST'])
+@jwt_required()
+@admin_required
+def import_employees():
+    """Bulk import employees from streamed CSV or NDJSON - Admin only"""
+    try:
+        fmt = request.args.get('format')
+        if not fmt:
+            fmt = 'ndjson' if 'json' in (request.mimetype or '') else 'csv'
+        if fmt not in ('csv', 'ndjson'):
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+        
+        # Read the body line by line instead of buffering the whole upload
+        lines = codecs.iterdecode(request.stream, 'utf-8-sig')
+        rows = iter_csv_rows(lines) if fmt == 'csv' else iter_ndjson_rows(lines)
+        
+        importer = EmployeeImport(
+            batch_size=request.args.get('batch_size', 500, type=int),
+            max_reported_errors=current_app.config.get('IMPORT_MAX_REPORTED_ERRORS', 1000)
+        )
+        summary = importer.run(rows)
+        
+        return jsonify({
+            'message': f"Imported {summary['imported']} employees",
+            **summary
+        }), 200
+        
+    except HasherBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Server busy, please retry shortly'}), 503, {'Retry-After': '1'}
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @employee_bp.route('/departments', methods=['GET'])
 @jwt_required()
 def get_departments():
-    """Get list of all departments"""
-    departments = db.session.query(Employee.department).distinct().all()
+    """Get list of all departments with headcounts"""
+    summary = department_summary()
     return jsonify({
-        'departments': [d[0] for d in departments if d[0]]
+        'departments': [d['department'] for d in summary],
+        'summary': summary
     }), 200
 from flask_jwt_extended import jwt_required
 from utils.decorators import admin_required
-from models import User, Employee, Attendance
+from models import User, Employee
 from flask import jsonify
 
 # =========================
@@ -186,16 +302,74 @@ from flask import jsonify
 @jwt_required()
 @admin_required
 def admin_list_users():
-    users = User.query.all()
-    return jsonify({
-        'users': [u.to_dict() for u in users]
-    }), 200
+    """List users, optionally paginated or streamed as NDJSON - Admin only"""
+    try:
+        role = request.args.get('role')
+        is_active = request.args.get('is_active')
+        per_page = min(request.args.get('per_page', 50, type=int), 500)
+        
+        query = User.query
+        if role:
+            query = query.filter(User.role == role)
+        if is_active is not None:
+            query = query.filter(User.is_active == (is_active.lower() == 'true'))
+        
+        # ?format=ndjson streams one user per line through a server-side cursor
+        if request.args.get('format') == 'ndjson':
+            batch_size = min(request.args.get('batch_size', 1000, type=int), 10000)
+            
+            def generate():
+                users = db.session.execute(
+                    query.order_by(User.id).statement.execution_options(yield_per=batch_size)
+                ).scalars()
+                for user in users:
+                    yield json.dumps(user.to_dict()) + '\n'
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        if 'cursor' in request.args:
+            result = keyset_paginate(query, [User.id], request.args.get('cursor'), per_page)
+            return jsonify({
+                'users': [u.to_dict() for u in result.items],
+                'next_cursor': result.next_cursor,
+                'prev_cursor': result.prev_cursor
+            }), 200
+        
+        if 'page' in request.args:
+            page = request.args.get('page', 1, type=int)
+            users = query.order_by(User.id).paginate(page=page, per_page=per_page, error_out=False)
+            return jsonify({
+                'users': [u.to_dict() for u in users.items],
+                'total': users.total,
+                'pages': users.pages,
+                'current_page': page
+            }), 200
+        
+        users = query.order_by(User.id).all()
+        return jsonify({
+            'users': [u.to_dict() for u in users]
+        }), 200
+        
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 @employee_bp.route('/admin/stats', methods=['GET'])
 @jwt_required()
 @admin_required
 def admin_stats():
+    """Dashboard counters, read from the counters table - Admin only"""
+    todays_checkins = checkins_key(date.today())
+    counters = read_counters([
+        'users', 'employees', 'attendance_records', 'active_users',
+        todays_checkins, 'pending_leaves', 'unprocessed_payrolls'
+    ])
     return jsonify({
-        'total_users': User.query.count(),
-        'total_employees': Employee.query.count(),
-        'total_attendance_records': Attendance.query.count()
+        'total_users': counters['users'],
+        'total_employees': counters['employees'],
+        'total_attendance_records': counters['attendance_records'],
+        'active_users': counters['active_users'],
+        'todays_checkins': counters[todays_checkins],
+        'pending_leaves': counters['pending_leaves'],
+        'unprocessed_payrolls': counters['unprocessed_payrolls']
     }), 200
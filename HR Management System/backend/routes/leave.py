@@ -1,9 +1,18 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Employee, LeaveRequest, Attendance
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy.exc import IntegrityError
+from models import db, Employee, LeaveRequest, LeavePolicy
 from utils.decorators import admin_required
+from utils.principal import current_principal
 from utils.helpers import create_notification
-from datetime import datetime, timedelta
+from utils.leave_days import mark_leave_days
+from utils.leave_balances import read_balance, load_policies, save_policy
+from utils.leave_calendar import overlapping, occupancy, cached_ical
+from utils.bulk_leave_review import BulkLeaveReview
+from utils.pagination import keyset_paginate, cached_count, InvalidCursor
+from utils.serializers import leave_serializer
+from utils.http_cache import row_validator, collection_validator, body_validator, not_modified, with_validators
+from datetime import datetime, date, timedelta
 
 leave_bp = Blueprint('leave', __name__)
 
@@ -12,13 +21,13 @@ leave_bp = Blueprint('leave', __name__)
 def apply_leave():
     """Apply for leave"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
-        if not employee:
+        if not principal or not principal.employee_id:
             return jsonify({'error': 'Employee not found'}), 404
         
+        employee_id = principal.employee_id
+        
         data = request.get_json()
         
         required = ['leave_type', 'start_date', 'end_date', 'reason']
@@ -35,7 +44,7 @@ def apply_leave():
         total_days = (end_date - start_date).days + 1
         
         overlapping = LeaveRequest.query.filter(
-            LeaveRequest.employee_id == employee.id,
+            LeaveRequest.employee_id == employee_id,
             LeaveRequest.status.in_(['Pending', 'Approved']),
             LeaveRequest.start_date <= end_date,
             LeaveRequest.end_date >= start_date
@@ -45,7 +54,7 @@ def apply_leave():
             return jsonify({'error': 'Leave dates overlap with existing request'}), 400
         
         leave = LeaveRequest(
-            employee_id=employee.id,
+            employee_id=employee_id,
             leave_type=data['leave_type'],
             start_date=start_date,
             end_date=end_date,
@@ -70,25 +79,32 @@ def apply_leave():
 def get_my_leaves():
     """Get logged-in user's leave requests"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
-        if not employee:
+        if not principal or not principal.employee_id:
             return jsonify({'error': 'Employee not found'}), 404
         
+        employee_id = principal.employee_id
+        
         status = request.args.get('status')
         
-        query = LeaveRequest.query.filter_by(employee_id=employee.id)
+        query = LeaveRequest.query.filter_by(employee_id=employee_id)
         
         if status:
             query = query.filter_by(status=status)
         
-        leaves = query.order_by(LeaveRequest.created_at.desc()).all()
+        validator = collection_validator(query, LeaveRequest.updated_at)
+        cached = not_modified(validator)
+        if cached:
+            return cached
         
-        return jsonify({
-            'leaves': [leave.to_dict() for leave in leaves]
-        }), 200
+        fields = leave_serializer.requested_fields()
+        leaves = leave_serializer.eager(query, fields)\
+            .order_by(LeaveRequest.created_at.desc()).all()
+        
+        return with_validators(jsonify({
+            'leaves': leave_serializer.dump_many(leaves, fields)
+        }), validator), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -98,17 +114,31 @@ def get_my_leaves():
 def get_leave(id):
     """Get leave request by ID"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        leave = LeaveRequest.query.get_or_404(id)
+        principal = current_principal()
+        
+        if not principal:
+            return jsonify({'error': 'User not found'}), 404
+        
+        reviewer = db.aliased(Employee)
+        row, validator = row_validator(
+            db.select(LeaveRequest.employee_id, LeaveRequest.updated_at, Employee.updated_at, reviewer.updated_at)
+            .join(Employee, Employee.id == LeaveRequest.employee_id)
+            .outerjoin(reviewer, reviewer.id == LeaveRequest.reviewed_by)
+            .where(LeaveRequest.id == id)
+        )
+        
+        if row is None:
+            return jsonify({'error': 'Leave request not found'}), 404
         
-        if user.role == 'Employee':
-            employee = Employee.query.filter_by(user_id=user_id).first()
-            if leave.employee_id != employee.id:
-                return jsonify({'error': 'Access denied'}), 403
+        if principal.role == 'Employee' and row.employee_id != principal.employee_id:
+            return jsonify({'error': 'Access denied'}), 403
+        
+        cached = not_modified(validator)
+        if cached:
+            return cached
         
-        return jsonify({'leave': leave.to_dict()}), 200
+        leave = LeaveRequest.query.get(id)
+        return with_validators(jsonify({'leave': leave.to_dict()}), validator), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -118,13 +148,14 @@ def get_leave(id):
 def cancel_leave(id):
     """Cancel own leave request"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
+        
+        if not principal or not principal.employee_id:
+            return jsonify({'error': 'Employee not found'}), 404
         
         leave = LeaveRequest.query.get_or_404(id)
         
-        if leave.employee_id != employee.id:
+        if leave.employee_id != principal.employee_id:
             return jsonify({'error': 'Access denied'}), 403
         
         if leave.status != 'Pending':
@@ -148,11 +179,13 @@ def cancel_leave(id):
 def get_pending_leaves():
     """Get all pending leave requests - Admin only"""
     try:
-        leaves = LeaveRequest.query.filter_by(status='Pending')\
+        fields = leave_serializer.requested_fields()
+        leaves = leave_serializer.eager(LeaveRequest.query, fields)\
+            .filter_by(status='Pending')\
             .order_by(LeaveRequest.created_at.asc()).all()
         
         return jsonify({
-            'leaves': [leave.to_dict() for leave in leaves]
+            'leaves': leave_serializer.dump_many(leaves, fields)
         }), 200
         
     except Exception as e:
@@ -168,6 +201,7 @@ def get_all_leaves():
         department = request.args.get('department')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        fields = leave_serializer.requested_fields()
         
         query = LeaveRequest.query
         
@@ -175,18 +209,46 @@ def get_all_leaves():
             query = query.filter_by(status=status)
         
         if department:
-            query = query.join(Employee).filter(Employee.department == department)
-        
-        leaves = query.order_by(LeaveRequest.created_at.desc())\
+            query = query.join(Employee, LeaveRequest.employee_id == Employee.id)\
+                .filter(Employee.department == department)
+        
+        # Opt-in keyset pagination: ?cursor= (empty for the first page)
+        if 'cursor' in request.args:
+            result = keyset_paginate(
+                leave_serializer.eager(query, fields), [LeaveRequest.created_at, LeaveRequest.id],
+                request.args.get('cursor'), min(per_page, 100), descending=True
+            )
+            response = {
+                'leaves': leave_serializer.dump_many(result.items, fields),
+                'next_cursor': result.next_cursor,
+                'prev_cursor': result.prev_cursor
+            }
+            if request.args.get('include_total', 'false').lower() == 'true':
+                response['total'] = cached_count(query, ('leaves', status, department))
+            validator = body_validator(response)
+            cached = not_modified(validator)
+            if cached:
+                return cached
+            return with_validators(jsonify(response), validator), 200
+        
+        validator = collection_validator(query, LeaveRequest.updated_at)
+        cached = not_modified(validator)
+        if cached:
+            return cached
+        
+        leaves = leave_serializer.eager(query, fields)\
+            .order_by(LeaveRequest.created_at.desc())\
             .paginate(page=page, per_page=per_page)
         
-        return jsonify({
-            'leaves': [leave.to_dict() for leave in leaves.items],
+        return with_validators(jsonify({
+            'leaves': leave_serializer.dump_many(leaves.items, fields),
             'total': leaves.total,
             'pages': leaves.pages,
             'current_page': page
-        }), 200
+        }), validator), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -196,9 +258,7 @@ def get_all_leaves():
 def review_leave(id):
     """Approve or reject leave - Admin only"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        admin_employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
         leave = LeaveRequest.query.get_or_404(id)
         data = request.get_json()
@@ -214,28 +274,11 @@ def review_leave(id):
         
         leave.status = data['status']
         leave.review_comment = data.get('comment')
-        leave.reviewed_by = admin_employee.id if admin_employee else None
+        leave.reviewed_by = principal.employee_id
         leave.reviewed_at = datetime.utcnow()
         
         if data['status'] == 'Approved':
-            current_date = leave.start_date
-            while current_date <= leave.end_date:
-                attendance = Attendance.query.filter_by(
-                    employee_id=leave.employee_id,
-                    date=current_date
-                ).first()
-                
-                if attendance:
-                    attendance.status = 'Leave'
-                else:
-                    attendance = Attendance(
-                        employee_id=leave.employee_id,
-                        date=current_date,
-                        status='Leave'
-                    )
-                    db.session.add(attendance)
-                
-                current_date += timedelta(days=1)
+            mark_leave_days(leave.employee_id, leave.start_date, leave.end_date)
         
         create_notification(
             employee_id=leave.employee_id,
@@ -243,7 +286,8 @@ def review_leave(id):
             message=f'Your {leave.leave_type} leave from {leave.start_date} to {leave.end_date} has been {data["status"].lower()}.',
             notification_type='Leave',
             reference_id=leave.id,
-            reference_type='leave_requests'
+            reference_type='leave_requests',
+            commit=False
         )
         
         db.session.commit()
@@ -257,49 +301,177 @@ def review_leave(id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@leave_bp.route('/review/bulk', methods=['POST'])
+@jwt_required()
+@admin_required
+def bulk_review_leaves():
+    """Approve or reject many leave requests in one transaction - Admin only"""
+    try:
+        principal = current_principal()
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else data
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'items must be a non-empty list'}), 400
+        
+        max_items = current_app.config['LEAVE_BULK_REVIEW_MAX_ITEMS']
+        if len(items) > max_items:
+            return jsonify({'error': f'At most {max_items} items per request'}), 413
+        
+        summary = BulkLeaveReview(items, principal.employee_id).run()
+        db.session.commit()
+        
+        return jsonify({
+            'message': f"Reviewed {summary['approved'] + summary['rejected']} leave requests",
+            **summary
+        }), 200
+        
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Attendance changed concurrently, please retry'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @leave_bp.route('/balance', methods=['GET'])
 @jwt_required()
 def get_leave_balance():
     """Get leave balance for current user"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
-        if not employee:
+        if not principal or not principal.employee_id:
             return jsonify({'error': 'Employee not found'}), 404
         
-        leave_quotas = {
-            'Casual': 12,
-            'Sick': 12,
-            'Earned': 15,
-            'Maternity': 180,
-            'Paternity': 15,
-            'Unpaid': 999
-        }
-        
-        current_year = datetime.now().year
-        approved_leaves = LeaveRequest.query.filter(
-            LeaveRequest.employee_id == employee.id,
-            LeaveRequest.status == 'Approved',
-            db.extract('year', LeaveRequest.start_date) == current_year
-        ).all()
-        
-        used_leaves = {}
-        for leave in approved_leaves:
-            leave_type = leave.leave_type
-            used_leaves[leave_type] = used_leaves.get(leave_type, 0) + leave.total_days
-        
-        balance = {}
-        for leave_type, quota in leave_quotas.items():
-            used = used_leaves.get(leave_type, 0)
-            balance[leave_type] = {
-                'total': quota if quota != 999 else 'Unlimited',
-                'used': used,
-                'remaining': (quota - used) if quota != 999 else 'Unlimited'
-            }
+        employee_id = principal.employee_id
+        
+        year = request.args.get('year', datetime.now().year, type=int)
+        balance = read_balance(employee_id, year)
+        
+        return jsonify({'balance': balance, 'year': year}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@leave_bp.route('/policies', methods=['GET'])
+@jwt_required()
+def get_leave_policies():
+    """Leave quotas and accrual rules per leave type"""
+    try:
+        policies = load_policies()
+        return jsonify({
+            'policies': [dict(policy, leave_type=leave_type) for leave_type, policy in policies.items()]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@leave_bp.route('/policies/<leave_type>', methods=['PUT'])
+@jwt_required()
+@admin_required
+def update_leave_policy(leave_type):
+    """Set the quota and accrual rule for a leave type - Admin only"""
+    try:
+        data = request.get_json()
         
-        return jsonify({'balance': balance}), 200
+        if leave_type not in LeavePolicy.leave_type.type.enums:
+            return jsonify({'error': 'Invalid leave type'}), 400
+        
+        if 'annual_quota' not in data:
+            return jsonify({'error': 'annual_quota is required'}), 400
+        
+        quota = data['annual_quota']
+        if quota is not None and (not isinstance(quota, int) or isinstance(quota, bool) or quota < 0):
+            return jsonify({'error': 'annual_quota must be a non-negative integer or null'}), 400
+        
+        accrual = data.get('accrual', 'Yearly')
+        if accrual not in ('Yearly', 'Monthly'):
+            return jsonify({'error': 'accrual must be Yearly or Monthly'}), 400
+        
+        save_policy(leave_type, quota, accrual)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Leave policy updated successfully',
+            'policy': db.session.get(LeavePolicy, leave_type).to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _calendar_window():
+    """(start, end, statuses, department) from the query string; raises ValueError"""
+    today = date.today()
+    start = request.args.get('start')
+    end = request.args.get('end')
+    start = datetime.strptime(start, '%Y-%m-%d').date() if start else today.replace(day=1)
+    end = datetime.strptime(end, '%Y-%m-%d').date() if end else \
+        (start.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    
+    if end < start:
+        raise ValueError('end cannot be before start')
+    if (end - start).days + 1 > current_app.config['LEAVE_CALENDAR_MAX_DAYS']:
+        raise ValueError(f"Window cannot exceed {current_app.config['LEAVE_CALENDAR_MAX_DAYS']} days")
+    
+    statuses = ['Approved']
+    if request.args.get('include_pending', 'false').lower() == 'true':
+        statuses.append('Pending')
+    return start, end, statuses, request.args.get('department')
+
+@leave_bp.route('/calendar', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_leave_calendar():
+    """Who is out between start and end (default: this month) - Admin only"""
+    try:
+        try:
+            start, end, statuses, department = _calendar_window()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = overlapping(start, end, statuses, department)
+        validator = collection_validator(query, LeaveRequest.updated_at)
+        cached = not_modified(validator)
+        if cached:
+            return cached
+        
+        fields = leave_serializer.requested_fields()
+        leaves = leave_serializer.eager(query, fields)\
+            .order_by(LeaveRequest.start_date, LeaveRequest.id).all()
+        
+        return with_validators(jsonify({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'leaves': leave_serializer.dump_many(leaves, fields),
+            'occupancy': occupancy(leaves, start, end)
+        }), validator), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@leave_bp.route('/calendar.ics', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_leave_calendar_ics():
+    """The team leave calendar as an iCalendar feed - Admin only"""
+    try:
+        try:
+            start, end, statuses, department = _calendar_window()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = overlapping(start, end, statuses, department)
+        validator = collection_validator(query, LeaveRequest.updated_at)
+        cached = not_modified(validator)
+        if cached:
+            return cached
+        
+        body = cached_ical(validator, lambda: query.order_by(LeaveRequest.start_date, LeaveRequest.id).all(),
+                           request.host)
+        response = Response(body, mimetype='text/calendar')
+        response.headers['Content-Disposition'] = 'inline; filename="leave-calendar.ics"'
+        return with_validators(response, validator), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
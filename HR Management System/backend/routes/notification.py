@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Employee, Notification
+from flask_jwt_extended import jwt_required
+from models import db, Notification
+from utils.principal import current_principal
 
 notification_bp = Blueprint('notification', __name__)
 
@@ -9,17 +10,17 @@ notification_bp = Blueprint('notification', __name__)
 def get_notifications():
     """Get logged-in user's notifications"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
-        if not employee:
+        if not principal or not principal.employee_id:
             return jsonify({'error': 'Employee not found'}), 404
         
+        employee_id = principal.employee_id
+        
         unread_only = request.args.get('unread_only', 'false').lower() == 'true'
         limit = request.args.get('limit', 50, type=int)
         
-        query = Notification.query.filter_by(employee_id=employee.id)
+        query = Notification.query.filter_by(employee_id=employee_id)
         
         if unread_only:
             query = query.filter_by(is_read=False)
@@ -28,7 +29,7 @@ def get_notifications():
             .limit(limit).all()
         
         unread_count = Notification.query.filter_by(
-            employee_id=employee.id,
+            employee_id=employee_id,
             is_read=False
         ).count()
         
@@ -45,13 +46,14 @@ def get_notifications():
 def mark_as_read(id):
     """Mark notification as read"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
+        
+        if not principal or not principal.employee_id:
+            return jsonify({'error': 'Employee not found'}), 404
         
         notification = Notification.query.get_or_404(id)
         
-        if notification.employee_id != employee.id:
+        if notification.employee_id != principal.employee_id:
             return jsonify({'error': 'Access denied'}), 403
         
         notification.is_read = True
@@ -68,12 +70,13 @@ def mark_as_read(id):
 def mark_all_as_read():
     """Mark all notifications as read"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
+        
+        if not principal or not principal.employee_id:
+            return jsonify({'error': 'Employee not found'}), 404
         
         Notification.query.filter_by(
-            employee_id=employee.id,
+            employee_id=principal.employee_id,
             is_read=False
         ).update({'is_read': True})
         
@@ -90,13 +93,14 @@ def mark_all_as_read():
 def delete_notification(id):
     """Delete notification"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
+        
+        if not principal or not principal.employee_id:
+            return jsonify({'error': 'Employee not found'}), 404
         
         notification = Notification.query.get_or_404(id)
         
-        if notification.employee_id != employee.id:
+        if notification.employee_id != principal.employee_id:
             return jsonify({'error': 'Access denied'}), 403
         
         db.session.delete(notification)
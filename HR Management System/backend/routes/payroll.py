@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Employee, Payroll
+from flask_jwt_extended import jwt_required
+from models import db, Employee, Payroll
 from utils.decorators import admin_required
+from utils.principal import current_principal
 from utils.helpers import create_notification
+from utils.pagination import keyset_paginate, cached_count, cached_value, InvalidCursor
+from utils.serializers import payroll_serializer
+from utils.http_cache import row_validator, collection_validator, body_validator, not_modified, with_validators
 from datetime import datetime
 
 payroll_bp = Blueprint('payroll', __name__)
@@ -12,23 +16,28 @@ payroll_bp = Blueprint('payroll', __name__)
 def get_my_payroll():
     """Get logged-in user's payroll history"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        employee = Employee.query.filter_by(user_id=user_id).first()
+        principal = current_principal()
         
-        if not employee:
+        if not principal or not principal.employee_id:
             return jsonify({'error': 'Employee not found'}), 404
         
+        employee_id = principal.employee_id
+        
         year = request.args.get('year', datetime.now().year, type=int)
+        fields = payroll_serializer.requested_fields()
         
-        payrolls = Payroll.query.filter_by(
-            employee_id=employee.id,
-            year=year
-        ).order_by(Payroll.month.desc()).all()
+        query = Payroll.query.filter_by(employee_id=employee_id, year=year)
         
-        return jsonify({
-            'payrolls': [p.to_dict() for p in payrolls]
-        }), 200
+        validator = collection_validator(query, Payroll.updated_at)
+        cached = not_modified(validator)
+        if cached:
+            return cached
+        
+        payrolls = payroll_serializer.eager(query, fields).order_by(Payroll.month.desc()).all()
+        
+        return with_validators(jsonify({
+            'payrolls': payroll_serializer.dump_many(payrolls, fields)
+        }), validator), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -38,17 +47,29 @@ def get_my_payroll():
 def get_payslip(id):
     """Get specific payslip"""
     try:
-        # ✅ FIX: Convert string to int
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        payroll = Payroll.query.get_or_404(id)
+        principal = current_principal()
+        
+        if not principal:
+            return jsonify({'error': 'User not found'}), 404
+        
+        row, validator = row_validator(
+            db.select(Payroll.employee_id, Payroll.updated_at, Employee.updated_at)
+            .join(Employee, Employee.id == Payroll.employee_id)
+            .where(Payroll.id == id)
+        )
         
-        if user.role == 'Employee':
-            employee = Employee.query.filter_by(user_id=user_id).first()
-            if payroll.employee_id != employee.id:
-                return jsonify({'error': 'Access denied'}), 403
+        if row is None:
+            return jsonify({'error': 'Payroll not found'}), 404
         
-        return jsonify({'payroll': payroll.to_dict()}), 200
+        if principal.role == 'Employee' and row.employee_id != principal.employee_id:
+            return jsonify({'error': 'Access denied'}), 403
+        
+        cached = not_modified(validator)
+        if cached:
+            return cached
+        
+        payroll = Payroll.query.get(id)
+        return with_validators(jsonify({'payroll': payroll.to_dict()}), validator), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -65,6 +86,7 @@ def get_all_payroll():
         status = request.args.get('status')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        fields = payroll_serializer.requested_fields()
         
         query = Payroll.query.filter_by(year=year)
         
@@ -77,24 +99,57 @@ def get_all_payroll():
         if status:
             query = query.filter_by(payment_status=status)
         
-        payrolls = query.paginate(page=page, per_page=per_page)
-        
-        all_payrolls = query.all()
-        total_gross = sum(float(p.gross_salary or 0) for p in all_payrolls)
-        total_net = sum(float(p.net_salary or 0) for p in all_payrolls)
+        def payroll_summary():
+            total_gross, total_net, total_employees = query.order_by(None).with_entities(
+                db.func.sum(Payroll.gross_salary),
+                db.func.sum(Payroll.net_salary),
+                db.func.count(Payroll.id)
+            ).one()
+            return {
+                'total_gross_salary': float(total_gross or 0),
+                'total_net_salary': float(total_net or 0),
+                'total_employees': total_employees
+            }
         
-        return jsonify({
-            'payrolls': [p.to_dict() for p in payrolls.items],
+        # Opt-in keyset pagination: ?cursor= (empty for the first page)
+        if 'cursor' in request.args:
+            result = keyset_paginate(
+                payroll_serializer.eager(query, fields), [Payroll.id],
+                request.args.get('cursor'), min(per_page, 100)
+            )
+            response = {
+                'payrolls': payroll_serializer.dump_many(result.items, fields),
+                'next_cursor': result.next_cursor,
+                'prev_cursor': result.prev_cursor
+            }
+            if request.args.get('include_total', 'false').lower() == 'true':
+                cache_key = ('payroll', year, month, department, status)
+                response['total'] = cached_count(query, cache_key)
+                response['summary'] = cached_value(cache_key + ('summary',), payroll_summary)
+            validator = body_validator(response)
+            cached = not_modified(validator)
+            if cached:
+                return cached
+            return with_validators(jsonify(response), validator), 200
+        
+        validator = collection_validator(query, Payroll.updated_at)
+        cached = not_modified(validator)
+        if cached:
+            return cached
+        
+        summary = payroll_summary()
+        payrolls = payroll_serializer.eager(query, fields).paginate(page=page, per_page=per_page)
+        
+        return with_validators(jsonify({
+            'payrolls': payroll_serializer.dump_many(payrolls.items, fields),
             'total': payrolls.total,
             'pages': payrolls.pages,
             'current_page': page,
-            'summary': {
-                'total_gross_salary': total_gross,
-                'total_net_salary': total_net,
-                'total_employees': len(all_payrolls)
-            }
-        }), 200
+            'summary': summary
+        }), validator), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,109 @@
+"""
+Attendance Archive Tests
+Run: python -m pytest test_archive.py
+
+Moves old attendance into the per-year archive files of a throwaway
+SQLite database and checks that rollups, counters and archived reads
+still describe every row, and that only the lease holder archives.
+"""
+import shutil
+import tempfile
+import unittest
+from datetime import date, time, timedelta
+
+from models import db, User, Employee, Attendance, ArchiveSegment, StatCounter
+from testing import AppTestCase, rollup_rows
+from utils.archive import archive_attendance, archived_rows, cold_segments, LEASE
+from utils.leases import acquire_lease, release_lease
+from utils.rollups import read_rollup, rebuild_attendance_rollups
+
+START = date(2023, 12, 18)
+CUTOFF = date(2024, 2, 1)
+STATUSES = ('Present', 'Absent', 'Half-day', 'Leave')
+
+
+class ArchiveTest(AppTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.archive_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.archive_dir, ignore_errors=True)
+
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        # a fresh directory per test: archive engines are cached per file path
+        self.app.config['ATTENDANCE_ARCHIVE_DIR'] = tempfile.mkdtemp(dir=self.archive_dir)
+        self.employee_ids = []
+        for i in range(1, 3):
+            user = User(email=f'archive{i}@company.com', password_hash='!', role='Employee')
+            db.session.add(user)
+            db.session.flush()
+            employee = Employee(user_id=user.id, employee_code=f'EMP{i:05d}', first_name='Archive',
+                                last_name=str(i), department='Engineering', date_of_joining=date(2023, 1, 1))
+            db.session.add(employee)
+            db.session.flush()
+            self.employee_ids.append(employee.id)
+
+        for n in range(70):
+            day = START + timedelta(days=n)
+            for employee_id in self.employee_ids:
+                attendance = Attendance(employee_id=employee_id, date=day, status=STATUSES[(n + employee_id) % 4],
+                                        check_in=time(9, 0), check_out=time(17, 0) if n % 3 else time(12, 30))
+                attendance.calculate_work_hours()
+                db.session.add(attendance)
+        db.session.commit()
+
+    def test_rollups_survive_archiving(self):
+        before = rollup_rows()
+        january = read_rollup(self.employee_ids[0], 'month', date(2024, 1, 15))
+        hot = Attendance.query.count()
+
+        moved = archive_attendance(CUTOFF, batch_size=25)
+
+        old = (CUTOFF - START).days * len(self.employee_ids)
+        self.assertEqual(moved, old)
+        self.assertEqual(Attendance.query.count(), hot - old)
+        self.assertEqual(Attendance.query.filter(Attendance.date < CUTOFF).count(), 0)
+        self.assertEqual(db.session.get(StatCounter, 'attendance_records').value, hot - old)
+
+        self.assertEqual(rollup_rows(), before)
+        self.assertEqual(read_rollup(self.employee_ids[0], 'month', date(2024, 1, 15)), january)
+
+        # a rebuild keeps the archived days' rollups and regroups them unchanged
+        with db.engine.begin() as connection:
+            rebuild_attendance_rollups(connection)
+        self.assertEqual(rollup_rows(), before)
+
+    def test_archived_rows_stay_readable(self):
+        archive_attendance(CUTOFF)
+
+        segments = cold_segments(date(2023, 12, 1), date(2024, 1, 31))
+        self.assertEqual([s.year for s in segments], [2023, 2024])
+        self.assertEqual(sum(s.row_count for s in segments), (CUTOFF - START).days * len(self.employee_ids))
+        rows = archived_rows(segments, [self.employee_ids[0]], date(2023, 12, 30), date(2024, 1, 2))
+        self.assertEqual([r.date for r in rows], [date(2023, 12, 30) + timedelta(days=n) for n in range(4)])
+
+    def test_rerun_moves_nothing(self):
+        archive_attendance(CUTOFF)
+        segments = {s.year: s.row_count for s in ArchiveSegment.query}
+
+        self.assertEqual(archive_attendance(CUTOFF), 0)
+        self.assertEqual({s.year: s.row_count for s in ArchiveSegment.query}, segments)
+
+    def test_only_the_lease_holder_archives(self):
+        token = acquire_lease(LEASE)
+        try:
+            self.assertIsNone(archive_attendance(CUTOFF))
+            self.assertEqual(ArchiveSegment.query.count(), 0)
+        finally:
+            release_lease(LEASE, token)
+        self.assertGreater(archive_attendance(CUTOFF), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Token Revocation Tests
+Run: python -m pytest test_auth_tokens.py
+
+Checks on a throwaway SQLite database that revoked access tokens are
+refused, whether the revocation is committed in this process or reaches
+it through the periodic index sync, and that /api/auth/refresh re-reads
+the user: a deactivated user gets 403, a new role lands in the new token.
+"""
+import unittest
+from datetime import date, datetime
+
+from flask_jwt_extended import decode_token
+from models import db, User, Employee, TokenRevocation
+from testing import AppTestCase
+from utils import principal, tokens
+from utils.principal import Principal
+from utils.tokens import issue_tokens, revoke_user_tokens
+
+
+class TokenRevocationTest(AppTestCase):
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        self.reset_indexes()
+        ids = []
+        for i, role in enumerate(('Admin', 'Employee'), 1):
+            user = User(email=f'token{i}@company.com', password_hash='!', role=role)
+            db.session.add(user)
+            db.session.flush()
+            employee = Employee(user_id=user.id, employee_code=f'EMP{i:05d}', first_name='Token',
+                                last_name=str(i), department='Engineering', date_of_joining=date(2024, 1, 1))
+            db.session.add(employee)
+            db.session.flush()
+            ids.append((user.id, employee.id))
+        db.session.commit()
+        (admin_user, admin_employee), (self.user_id, self.employee_id) = ids
+        self.admin = self.bearer(issue_tokens(Principal(admin_user, 'Admin', True, admin_employee))[0])
+        self.access, self.refresh = issue_tokens(Principal(self.user_id, 'Employee', True, self.employee_id))
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        super().tearDown()
+        self.reset_indexes()
+
+    def reset_indexes(self):
+        # process-wide state, shared with every other app in this process
+        tokens._revoked.clear()
+        tokens._synced_at = None
+        principal._cache = None
+
+    def bearer(self, token):
+        return {'Authorization': f'Bearer {token}'}
+
+    def me(self, token):
+        return self.client.get('/api/auth/me', headers=self.bearer(token)).status_code
+
+    def revoke_elsewhere(self, revoked_at):
+        """Write a revocation the way another process would, bypassing this process's index"""
+        with db.engine.begin() as connection:
+            connection.execute(TokenRevocation.__table__.insert().values(
+                user_id=self.user_id, revoked_at=revoked_at, reason='test'))
+
+    def issued_at(self, token, offset=0):
+        return datetime.utcfromtimestamp(decode_token(token)['iat'] + offset)
+
+    def test_revocation_applies_on_commit(self):
+        self.assertEqual(self.me(self.access), 200)
+
+        revoke_user_tokens(self.user_id)
+        db.session.rollback()
+        self.assertEqual(self.me(self.access), 200)
+
+        revoke_user_tokens(self.user_id)
+        db.session.commit()
+        self.assertEqual(self.me(self.access), 401)
+
+    def test_revocation_from_another_process_applies_after_sync(self):
+        self.assertEqual(self.me(self.access), 200)
+        self.revoke_elsewhere(self.issued_at(self.access))
+
+        # the index is reloaded at most every TOKEN_REVOCATION_SYNC_SECONDS
+        self.assertEqual(self.me(self.access), 200)
+        tokens._synced_at = None
+        self.assertEqual(self.me(self.access), 401)
+        # refresh tokens are exempt; /refresh checks the user itself
+        refreshed = self.client.post('/api/auth/refresh', headers=self.bearer(self.refresh))
+        self.assertEqual(refreshed.status_code, 200)
+
+    def test_tokens_issued_after_the_revocation_pass(self):
+        self.revoke_elsewhere(self.issued_at(self.access, offset=-1))
+
+        self.assertEqual(self.me(self.access), 200)
+
+    def test_deactivated_user_cannot_refresh(self):
+        response = self.client.delete(f'/api/employees/{self.employee_id}', headers=self.admin)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.me(self.access), 401)
+        refreshed = self.client.post('/api/auth/refresh', headers=self.bearer(self.refresh))
+        self.assertEqual(refreshed.status_code, 403)
+        self.assertEqual(refreshed.get_json(), {'error': 'Account is deactivated'})
+
+    def test_refresh_carries_the_new_role(self):
+        response = self.client.put(f'/api/employees/{self.employee_id}', json={'role': 'Admin'},
+                                   headers=self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.me(self.access), 401)
+
+        refreshed = self.client.post('/api/auth/refresh', headers=self.bearer(self.refresh))
+
+        self.assertEqual(refreshed.status_code, 200)
+        claims = decode_token(refreshed.get_json()['access_token'])
+        self.assertEqual((claims['role'], claims['employee_id']), ('Admin', self.employee_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
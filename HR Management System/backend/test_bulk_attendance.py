@@ -0,0 +1,98 @@
+"""
+Bulk Manual Attendance Tests
+Run: python -m pytest test_bulk_attendance.py
+
+Applies BulkAttendance batches against a throwaway SQLite database and
+checks per-row conflict handling together with the counters and rollups
+the bulk path maintains outside the ORM.
+"""
+import unittest
+from datetime import date, time, timedelta
+
+from models import db, User, Employee, Attendance, StatCounter
+from testing import AppTestCase, rollup_rows
+from utils.bulk_attendance import BulkAttendance
+from utils.rollups import rebuild_attendance_rollups
+
+DAY = date.today() - timedelta(days=2)
+
+
+class BulkAttendanceTest(AppTestCase):
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        self.employee_ids = []
+        for i in range(1, 4):
+            user = User(email=f'bulk{i}@company.com', password_hash='!', role='Employee')
+            db.session.add(user)
+            db.session.flush()
+            employee = Employee(user_id=user.id, employee_code=f'EMP{i:05d}', first_name='Bulk',
+                                last_name=str(i), department='Engineering', date_of_joining=date(2024, 1, 1))
+            db.session.add(employee)
+            db.session.flush()
+            self.employee_ids.append(employee.id)
+        db.session.add(Attendance(employee_id=self.employee_ids[0], date=DAY, check_in=time(9, 0),
+                                  status='Present'))
+        db.session.commit()
+
+    def run_bulk(self, rows):
+        summary = BulkAttendance(rows).run()
+        db.session.commit()
+        return summary
+
+    def test_conflicting_rows_fail_individually(self):
+        first, second, _ = self.employee_ids
+        summary = self.run_bulk([
+            {'employee_id': second, 'date': DAY.isoformat(), 'status': 'Present', 'check_in': '09:00'},
+            {'employee_id': second, 'date': DAY.isoformat(), 'status': 'Absent'},
+            {'employee_id': 9999, 'date': DAY.isoformat(), 'status': 'Present'},
+            {'employee_id': second, 'date': 'yesterday', 'status': 'Present'},
+            {'employee_id': second, 'date': DAY.isoformat(), 'status': 'Sleeping'},
+            {'employee_id': first, 'date': DAY.isoformat(), 'status': 'Present', 'check_out': '08:00'},
+        ])
+
+        self.assertEqual((summary['created'], summary['updated'], summary['failed']), (1, 0, 5))
+        results = summary['results']
+        self.assertEqual(results[0], 'created')
+        self.assertEqual(results[1], {'error': 'Duplicate of row 0'})
+        self.assertEqual(results[2], {'error': 'Employee not found'})
+        self.assertIn('date', results[3]['error'])
+        self.assertIn('status must be one of', results[4]['error'])
+        # the stored 09:00 check-in is later than the new check-out
+        self.assertEqual(results[5], {'error': 'check_out is before check_in'})
+
+        existing = Attendance.query.filter_by(employee_id=first, date=DAY).one()
+        self.assertIsNone(existing.check_out)
+
+    def test_existing_row_keeps_check_in(self):
+        first = self.employee_ids[0]
+        summary = self.run_bulk([
+            {'employee_id': first, 'date': DAY.isoformat(), 'status': 'Present', 'check_out': '17:30'},
+        ])
+
+        self.assertEqual(summary['results'], ['updated'])
+        row = Attendance.query.filter_by(employee_id=first, date=DAY).one()
+        self.assertEqual((row.check_in, row.check_out, float(row.work_hours)), (time(9, 0), time(17, 30), 8.5))
+
+    def test_counters_and_rollups_follow_the_batch(self):
+        first, second, third = self.employee_ids
+        rows = [
+            {'employee_id': first, 'date': DAY.isoformat(), 'status': 'Half-day', 'check_out': '12:00'},
+            {'employee_id': second, 'date': DAY.isoformat(), 'status': 'Absent'},
+            {'employee_id': third, 'date': DAY.isoformat(), 'status': 'Present', 'check_in': '08:00',
+             'check_out': '16:15'},
+            {'employee_id': third, 'date': (DAY - timedelta(days=1)).isoformat(), 'status': 'Leave'},
+            {'employee_id': third, 'date': (DAY - timedelta(days=1)).isoformat(), 'status': 'Present'},
+        ]
+        self.run_bulk(rows)
+
+        counter = db.session.get(StatCounter, 'attendance_records')
+        self.assertEqual(counter.value, Attendance.query.count())
+        maintained = rollup_rows()
+        with db.engine.begin() as connection:
+            rebuild_attendance_rollups(connection)
+        self.assertEqual(maintained, rollup_rows())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Bulk Leave Review Tests
+Run: python -m pytest test_bulk_leave_review.py
+
+Posts mixed batches to /api/leaves/review/bulk on a throwaway SQLite
+database and checks that bad items fail one by one while the rest are
+applied together with their attendance rows, notifications, counters,
+rollups and ledger entries.
+"""
+import unittest
+from datetime import date
+
+from models import db, User, Employee, Attendance, LeaveRequest, Notification, StatCounter
+from testing import AppTestCase, rollup_rows
+from utils.leave_balances import recompute_leave_balances
+from utils.principal import Principal
+from utils.rollups import rebuild_attendance_rollups
+from utils.tokens import issue_tokens
+
+FRIDAY = date(2025, 6, 13)
+MONDAY = date(2025, 6, 16)
+
+
+class BulkLeaveReviewTest(AppTestCase):
+    config = {'LEAVE_SKIP_WEEKENDS': True, 'WEEKEND_DAYS': [5, 6]}
+
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        ids = []
+        for i, role in enumerate(('Admin', 'Employee', 'Employee'), 1):
+            user = User(email=f'review{i}@company.com', password_hash='!', role=role)
+            db.session.add(user)
+            db.session.flush()
+            employee = Employee(user_id=user.id, employee_code=f'EMP{i:05d}', first_name='Review',
+                                last_name=str(i), department='Engineering', date_of_joining=date(2024, 1, 1))
+            db.session.add(employee)
+            db.session.flush()
+            ids.append((user.id, employee.id))
+        (admin_user, self.reviewer), (_, self.first), (_, self.second) = ids
+
+        def leave(employee_id, start, end, status='Pending'):
+            request = LeaveRequest(employee_id=employee_id, leave_type='Casual', start_date=start, end_date=end,
+                                   total_days=(end - start).days + 1, reason='Test', status=status)
+            db.session.add(request)
+            db.session.flush()
+            return request.id
+
+        self.across_weekend = leave(self.first, FRIDAY, MONDAY)
+        self.to_reject = leave(self.second, FRIDAY, FRIDAY)
+        self.approved = leave(self.second, date(2025, 5, 5), date(2025, 5, 5), status='Approved')
+        self.untouched = leave(self.second, date(2025, 7, 1), date(2025, 7, 2))
+        # the leave overwrites a row that already exists for one of its days
+        db.session.add(Attendance(employee_id=self.first, date=MONDAY, status='Absent'))
+        db.session.commit()
+
+        token = issue_tokens(Principal(admin_user, 'Admin', True, self.reviewer))[0]
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client = self.app.test_client()
+
+    def review(self, items):
+        return self.client.post('/api/leaves/review/bulk', json={'items': items}, headers=self.headers)
+
+    def test_partial_failures_are_reported_per_item(self):
+        response = self.review([
+            {'id': self.across_weekend, 'status': 'Approved', 'comment': 'Enjoy'},
+            {'id': self.to_reject, 'status': 'Rejected'},
+            {'id': self.approved, 'status': 'Rejected'},
+            {'id': 999999, 'status': 'Approved'},
+            {'id': self.untouched, 'status': 'Maybe'},
+            {'id': self.across_weekend, 'status': 'Rejected'},
+            'approve everything',
+            {'id': str(self.untouched), 'status': 'Approved'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual((body['approved'], body['rejected'], body['failed']), (1, 1, 6))
+        self.assertEqual(body['results'], [
+            {'id': self.across_weekend, 'status': 'Approved'},
+            {'id': self.to_reject, 'status': 'Rejected'},
+            {'id': self.approved, 'error': 'Can only review pending requests'},
+            {'id': 999999, 'error': 'Leave request not found'},
+            {'id': self.untouched, 'error': 'status must be Approved or Rejected'},
+            {'id': self.across_weekend, 'error': 'Duplicate of item 0'},
+            {'id': None, 'error': 'Expected a JSON object'},
+            {'id': str(self.untouched), 'error': 'id must be an integer'},
+        ])
+
+        statuses = {leave.id: leave.status for leave in LeaveRequest.query}
+        self.assertEqual(statuses, {self.across_weekend: 'Approved', self.to_reject: 'Rejected',
+                                    self.approved: 'Approved', self.untouched: 'Pending'})
+        approved = db.session.get(LeaveRequest, self.across_weekend)
+        self.assertEqual((approved.reviewed_by, approved.review_comment), (self.reviewer, 'Enjoy'))
+
+    def test_approved_ranges_and_derived_rows(self):
+        self.review([
+            {'id': self.across_weekend, 'status': 'Approved'},
+            {'id': self.to_reject, 'status': 'Rejected'},
+            {'id': self.approved, 'status': 'Rejected'},
+        ])
+
+        rows = {(a.employee_id, a.date): a.status for a in Attendance.query}
+        # weekend days are skipped and the existing Monday row becomes Leave
+        self.assertEqual(rows, {(self.first, FRIDAY): 'Leave', (self.first, MONDAY): 'Leave'})
+        notified = sorted((n.reference_id, n.title) for n in Notification.query)
+        self.assertEqual(notified, sorted([(self.across_weekend, 'Leave Approved'),
+                                           (self.to_reject, 'Leave Rejected')]))
+
+        self.assertEqual(db.session.get(StatCounter, 'attendance_records').value, len(rows))
+        self.assertEqual(db.session.get(StatCounter, 'pending_leaves').value,
+                         LeaveRequest.query.filter_by(status='Pending').count())
+        self.assertEqual(recompute_leave_balances(), {})
+        maintained = rollup_rows()
+        with db.engine.begin() as connection:
+            rebuild_attendance_rollups(connection)
+        self.assertEqual(maintained, rollup_rows())
+
+    def test_all_failures_write_nothing(self):
+        response = self.review([{'id': self.approved, 'status': 'Approved'}, {'id': 999999, 'status': 'Rejected'}])
+
+        self.assertEqual(response.get_json()['failed'], 2)
+        self.assertEqual(Notification.query.count(), 0)
+        self.assertEqual(Attendance.query.count(), 1)
+
+    def test_empty_batch_is_rejected(self):
+        self.assertEqual(self.review([]).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Attendance Day Close Tests
+Run: python -m pytest test_closing.py
+
+Runs the nightly close against a throwaway SQLite database and checks who
+gets filled in and with which status, the auto check-out, re-runs, the
+job lease and the counters and rollups the set-based writes maintain.
+"""
+import unittest
+from datetime import date, time
+
+from models import db, User, Employee, Attendance, Holiday, StatCounter
+from testing import AppTestCase, rollup_rows
+from utils.closing import close_day, close_recent_days, AUTO_FILL_NOTE, AUTO_CLOSE_NOTE, LEASE
+from utils.leases import acquire_lease, release_lease
+from utils.rollups import rebuild_attendance_rollups
+
+WEDNESDAY = date(2025, 3, 5)
+HOLIDAY = date(2025, 3, 6)
+SATURDAY = date(2025, 3, 8)
+
+
+class CloseDayTest(AppTestCase):
+    config = {'ATTENDANCE_AUTO_CHECKOUT': '18:00'}
+
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        self.employees = {}
+        for name, active, joined in [
+            ('open', True, date(2024, 1, 1)),
+            ('done', True, date(2024, 1, 1)),
+            ('missing', True, date(2024, 1, 1)),
+            ('inactive', False, date(2024, 1, 1)),
+            ('joiner', True, date(2025, 4, 1)),
+        ]:
+            user = User(email=f'{name}@company.com', password_hash='!', role='Employee', is_active=active)
+            db.session.add(user)
+            db.session.flush()
+            employee = Employee(user_id=user.id, employee_code=f'EMP-{name}', first_name=name.title(),
+                                last_name='Close', department='Engineering', date_of_joining=joined)
+            db.session.add(employee)
+            db.session.flush()
+            self.employees[name] = employee.id
+
+        db.session.add(Attendance(employee_id=self.employees['open'], date=WEDNESDAY, check_in=time(9, 0),
+                                  status='Present'))
+        done = Attendance(employee_id=self.employees['done'], date=WEDNESDAY, check_in=time(9, 0),
+                          check_out=time(17, 0), status='Present')
+        done.calculate_work_hours()
+        db.session.add_all([done, Holiday(date=HOLIDAY, name='Founders Day')])
+        db.session.commit()
+
+    def rows(self, day):
+        return {a.employee_id: a for a in Attendance.query.filter_by(date=day)}
+
+    def test_close_fills_and_checks_out(self):
+        result = close_day(WEDNESDAY)
+
+        self.assertEqual(result, {'date': WEDNESDAY.isoformat(), 'status': 'Absent', 'closed': 1, 'filled': 1})
+        rows = self.rows(WEDNESDAY)
+        self.assertEqual(set(rows), {self.employees['open'], self.employees['done'], self.employees['missing']})
+
+        closed = rows[self.employees['open']]
+        self.assertEqual((closed.check_out, float(closed.work_hours), closed.notes), (time(18, 0), 9.0, AUTO_CLOSE_NOTE))
+        filled = rows[self.employees['missing']]
+        self.assertEqual((filled.status, filled.check_in, filled.notes), ('Absent', None, AUTO_FILL_NOTE))
+        self.assertEqual(float(rows[self.employees['done']].work_hours), 8.0)
+
+    def test_rerun_writes_nothing(self):
+        close_day(WEDNESDAY)
+        self.assertEqual(close_day(WEDNESDAY),
+                         {'date': WEDNESDAY.isoformat(), 'status': 'Absent', 'closed': 0, 'filled': 0})
+
+    def test_holiday_and_weekend_status(self):
+        self.assertEqual(close_day(HOLIDAY)['status'], 'Holiday')
+        self.assertEqual(close_day(SATURDAY)['status'], 'Weekend')
+        self.assertEqual({a.status for a in self.rows(HOLIDAY).values()}, {'Holiday'})
+        self.assertEqual(len(self.rows(SATURDAY)), 3)
+
+    def test_counters_and_rollups_match(self):
+        close_recent_days(5, today=SATURDAY)
+
+        counter = db.session.get(StatCounter, 'attendance_records')
+        self.assertEqual(counter.value, Attendance.query.count())
+        maintained = rollup_rows()
+        with db.engine.begin() as connection:
+            rebuild_attendance_rollups(connection)
+        self.assertEqual(maintained, rollup_rows())
+
+    def test_only_the_lease_holder_closes(self):
+        token = acquire_lease(LEASE)
+        try:
+            self.assertIsNone(close_day(WEDNESDAY))
+            self.assertIsNone(close_recent_days(3, today=SATURDAY))
+            self.assertEqual(len(self.rows(WEDNESDAY)), 2)
+        finally:
+            release_lease(LEASE, token)
+        self.assertEqual(close_day(WEDNESDAY)['filled'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Admin Counter Tests
+Run: python -m pytest test_counters.py
+
+Writes users, employees, attendance, leave and payroll through the ORM on
+a throwaway SQLite database and checks that the after_flush deltas keep
+every counter equal to a count of its table: across several flushes, on
+rollback, for rows moving between counters, and when a counter has no row.
+"""
+import unittest
+from datetime import date, time, timedelta
+
+from models import db, User, Employee, Attendance, LeaveRequest, Payroll, StatCounter
+from testing import AppTestCase
+from utils.counters import checkins_key, read_counters, reconcile_counters, recount_counters
+
+TODAY = date.today()
+YESTERDAY = TODAY - timedelta(days=1)
+
+
+class CounterTest(AppTestCase):
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        self.employee_ids = []
+        for i in range(1, 4):
+            user = User(email=f'count{i}@company.com', password_hash='!', role='Employee')
+            db.session.add(user)
+            db.session.flush()
+            employee = Employee(user_id=user.id, employee_code=f'EMP{i:05d}', first_name='Count',
+                                last_name=str(i), department='Engineering', date_of_joining=date(2024, 1, 1))
+            db.session.add(employee)
+            db.session.flush()
+            self.employee_ids.append(employee.id)
+        db.session.commit()
+
+    def counters(self):
+        db.session.expire_all()
+        return {c.name: c.value for c in StatCounter.query}
+
+    def assertCountersMatchTables(self):
+        with db.engine.begin() as connection:
+            drift = recount_counters(connection, TODAY - timedelta(days=7))
+        # counters nothing has written yet have no row
+        self.assertEqual({name: values for name, values in drift.items() if values[0] is not None}, {})
+
+    def test_deltas_from_several_flushes_commit_together(self):
+        first, second, third = self.employee_ids
+        db.session.add(Attendance(employee_id=first, date=TODAY, check_in=time(9, 0), status='Present'))
+        db.session.flush()
+        db.session.add(Attendance(employee_id=second, date=TODAY, status='Absent'))
+        db.session.add(LeaveRequest(employee_id=third, leave_type='Casual', start_date=TODAY, end_date=TODAY,
+                                    total_days=1, reason='Test', status='Pending'))
+        db.session.flush()
+        db.session.add(Payroll(employee_id=first, month=TODAY.month, year=TODAY.year, basic_salary=1000,
+                               payment_status='Pending'))
+        db.session.commit()
+
+        counters = self.counters()
+        self.assertEqual((counters['users'], counters['active_users'], counters['employees']), (3, 3, 3))
+        self.assertEqual(counters['attendance_records'], 2)
+        self.assertEqual(counters[checkins_key(TODAY)], 1)
+        self.assertEqual((counters['pending_leaves'], counters['unprocessed_payrolls']), (1, 1))
+        self.assertCountersMatchTables()
+
+    def test_rolled_back_flushes_leave_counters_alone(self):
+        before = self.counters()
+        db.session.add(Attendance(employee_id=self.employee_ids[0], date=TODAY, check_in=time(9, 0),
+                                  status='Present'))
+        db.session.flush()
+        User.query.filter_by(email='count1@company.com').one().is_active = False
+        db.session.flush()
+        db.session.rollback()
+
+        self.assertEqual(self.counters(), before)
+        self.assertCountersMatchTables()
+
+    def test_updates_move_rows_between_counters(self):
+        first = self.employee_ids[0]
+        attendance = Attendance(employee_id=first, date=YESTERDAY, status='Leave')
+        leave = LeaveRequest(employee_id=first, leave_type='Casual', start_date=TODAY, end_date=TODAY,
+                             total_days=1, reason='Test', status='Pending')
+        payroll = Payroll(employee_id=first, month=TODAY.month, year=TODAY.year, basic_salary=1000,
+                          payment_status='Pending')
+        db.session.add_all([attendance, leave, payroll])
+        db.session.commit()
+
+        attendance.check_in = time(9, 0)
+        attendance.status = 'Present'
+        db.session.commit()
+        self.assertEqual(self.counters()[checkins_key(YESTERDAY)], 1)
+
+        attendance.date = TODAY
+        leave.status = 'Approved'
+        payroll.payment_status = 'Paid'
+        User.query.filter_by(email='count2@company.com').one().is_active = False
+        db.session.commit()
+
+        counters = self.counters()
+        self.assertEqual((counters[checkins_key(YESTERDAY)], counters[checkins_key(TODAY)]), (0, 1))
+        self.assertEqual((counters['pending_leaves'], counters['unprocessed_payrolls']), (0, 0))
+        self.assertEqual((counters['users'], counters['active_users']), (3, 2))
+        self.assertCountersMatchTables()
+
+    def test_deletes_decrement(self):
+        first = self.employee_ids[0]
+        attendance = Attendance(employee_id=first, date=TODAY, check_in=time(9, 0), status='Present')
+        db.session.add(attendance)
+        db.session.commit()
+
+        db.session.delete(attendance)
+        db.session.commit()
+
+        counters = self.counters()
+        self.assertEqual((counters['attendance_records'], counters[checkins_key(TODAY)]), (0, 0))
+        self.assertCountersMatchTables()
+
+    def test_missing_counter_rows_are_counted_not_started_from_a_delta(self):
+        for employee_id in self.employee_ids:
+            db.session.add(Attendance(employee_id=employee_id, date=YESTERDAY, status='Present'))
+        db.session.commit()
+        # an upgraded database: the rows exist, the counters do not
+        StatCounter.query.delete()
+        db.session.commit()
+
+        db.session.add(Attendance(employee_id=self.employee_ids[0], date=TODAY, status='Present'))
+        db.session.commit()
+
+        self.assertEqual(self.counters(), {'attendance_records': 4})
+        self.assertEqual(read_counters(['users', 'employees', 'pending_leaves']),
+                         {'users': 3, 'employees': 3, 'pending_leaves': 0})
+        self.assertEqual(self.counters()['users'], 3)
+
+    def test_reconcile_corrects_drift(self):
+        db.session.get(StatCounter, 'employees').value = 10
+        db.session.commit()
+
+        drift = reconcile_counters()
+
+        self.assertEqual(drift['employees'], (10, 3))
+        self.assertEqual(self.counters()['employees'], 3)
+        self.assertEqual(reconcile_counters(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Bulk Employee Import Tests
+Run: python -m pytest test_importer.py
+
+Streams CSV and NDJSON imports into a throwaway SQLite database and checks
+that bad rows are reported one by one, including rows that only fail in
+the database, while every other row is imported with its counters and
+department headcounts.
+"""
+import json
+import unittest
+from datetime import date
+
+from models import db, User, Employee, DepartmentSummary, Sequence
+from testing import AppTestCase
+from utils import helpers
+from utils.counters import recount_counters
+from utils.departments import rebuild_department_summary
+from utils.importer import EmployeeImport, iter_ndjson_rows
+from utils.principal import Principal
+from utils.tokens import issue_tokens
+
+
+def person(n, **overrides):
+    return dict({'email': f'import{n}@company.com', 'password': 'secret123', 'first_name': 'Import',
+                 'last_name': str(n), 'date_of_joining': '2025-01-01', 'department': 'Engineering'}, **overrides)
+
+
+def ndjson(rows):
+    return [row if isinstance(row, str) else json.dumps(row) for row in rows]
+
+
+class EmployeeImportTest(AppTestCase):
+    config = {'BCRYPT_LOG_ROUNDS': 4}
+
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        helpers._employee_codes = None
+        admin = User(email='import-admin@company.com', password_hash='!', role='Admin')
+        db.session.add(admin)
+        db.session.flush()
+        db.session.add(Employee(user_id=admin.id, employee_code='EMP00001', first_name='Import', last_name='Admin',
+                                department='Engineering', date_of_joining=date(2024, 1, 1)))
+        db.session.commit()
+        self.headers = {'Authorization': f'Bearer {issue_tokens(Principal(admin.id, "Admin", True, None))[0]}'}
+
+    def run_import(self, rows, batch_size=500):
+        return EmployeeImport(batch_size=batch_size).run(iter_ndjson_rows(ndjson(rows)))
+
+    def emails(self):
+        return sorted(user.email for user in User.query if user.email != 'import-admin@company.com')
+
+    def assertDerivedRowsMatch(self):
+        summaries = {(s.department, s.employee_count, s.headcount, s.full_time) for s in DepartmentSummary.query}
+        with db.engine.begin() as connection:
+            drift = recount_counters(connection, date.today())
+            rebuild_department_summary(connection)
+        # counters nothing has written yet have no row
+        self.assertEqual({name: values for name, values in drift.items() if values[0] is not None}, {})
+        db.session.expire_all()
+        self.assertEqual(summaries,
+                         {(s.department, s.employee_count, s.headcount, s.full_time) for s in DepartmentSummary.query})
+
+    def test_bad_rows_are_reported_one_by_one(self):
+        summary = self.run_import([
+            person(1),
+            '{"email": ',
+            person(2, first_name=''),
+            '["not", "an", "object"]',
+            person(1, last_name='Again'),
+            person(3, password='123'),
+            person(4, date_of_joining='01/02/2025'),
+            person(5, role='Owner'),
+            {**person(6), 'email': 'import-admin@company.com'},
+            person(7, department='Sales', employment_type='Contract'),
+        ], batch_size=3)
+
+        self.assertEqual((summary['imported'], summary['failed']), (2, 8))
+        self.assertEqual([(e['row'], e['error']) for e in summary['errors']], [
+            (2, summary['errors'][0]['error']),
+            (3, 'first_name is required'),
+            (4, 'Expected a JSON object'),
+            (5, 'Duplicate email in import'),
+            (6, 'Password must be at least 6 characters'),
+            (7, 'date_of_joining must be YYYY-MM-DD'),
+            (8, 'role must be one of Employee, HR, Admin'),
+            (9, 'Email already registered'),
+        ])
+        self.assertTrue(summary['errors'][0]['error'].startswith('Invalid JSON'))
+        self.assertEqual(self.emails(), ['import1@company.com', 'import7@company.com'])
+        self.assertDerivedRowsMatch()
+
+    def test_a_row_failing_in_the_database_does_not_sink_its_batch(self):
+        # the sequence is behind an existing code, so one reserved code collides
+        db.session.add(Sequence(name='employee_code', next_value=2))
+        user = User(email='taken@company.com', password_hash='!', role='Employee')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Employee(user_id=user.id, employee_code='EMP00003', first_name='Taken', last_name='Code',
+                                department='Engineering', date_of_joining=date(2024, 1, 1)))
+        db.session.commit()
+
+        summary = self.run_import([person(n) for n in range(1, 5)])
+
+        self.assertEqual((summary['imported'], summary['failed']), (3, 1))
+        self.assertEqual(summary['errors'][0]['row'], 2)
+        self.assertIn('employee_code', summary['errors'][0]['error'])
+        self.assertEqual(self.emails(), ['import1@company.com', 'import3@company.com', 'import4@company.com',
+                                         'taken@company.com'])
+        # the failed row left no user behind
+        self.assertEqual(User.query.count(), Employee.query.count())
+        self.assertDerivedRowsMatch()
+
+    def test_csv_upload_through_the_endpoint(self):
+        body = '\n'.join([
+            'email,password,first_name,last_name,date_of_joining,department,employment_type',
+            'csv1@company.com,secret123,Csv,One,2025-02-01,Sales,Part-time',
+            'csv2@company.com,secret123,Csv,Two,2025-02-30,Sales,Full-time',
+            'csv3@company.com,secret123,Csv,Three,2025-02-01,Support,',
+        ])
+        response = self.app.test_client().post('/api/employees/import?format=csv', data=body,
+                                               headers=self.headers, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()
+        self.assertEqual((result['imported'], result['failed']), (2, 1))
+        self.assertEqual(result['errors'], [{'row': 2, 'error': 'date_of_joining must be YYYY-MM-DD'}])
+        imported = {e.user.email: (e.department, e.employment_type, e.employee_code[:3]) for e in Employee.query}
+        self.assertEqual(imported['csv1@company.com'], ('Sales', 'Part-time', 'EMP'))
+        self.assertEqual(imported['csv3@company.com'], ('Support', 'Full-time', 'EMP'))
+        self.assertTrue(User.query.filter_by(email='csv1@company.com').one().check_password('secret123'))
+        self.assertDerivedRowsMatch()
+
+    def test_reported_errors_are_capped(self):
+        importer = EmployeeImport(batch_size=10, max_reported_errors=3)
+
+        summary = importer.run(iter_ndjson_rows(ndjson([person(n, password='x') for n in range(6)])))
+
+        self.assertEqual((summary['failed'], len(summary['errors']), summary['errors_truncated']), (6, 3, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
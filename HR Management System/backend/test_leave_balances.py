@@ -0,0 +1,136 @@
+"""
+Leave Balance Ledger Tests
+Run: python -m pytest test_leave_balances.py
+
+Drives leave requests through their lifecycle on a throwaway SQLite
+database and checks the incrementally maintained ledger against a full
+recompute from leave_requests, including the lazy seed for ledgers that
+predate their rows.
+"""
+import unittest
+from datetime import date
+
+from models import db, User, Employee, LeaveRequest, LeaveBalance
+from testing import AppTestCase
+from utils import leave_balances
+from utils.leave_balances import read_balance, recompute_leave_balances
+
+
+def leave(employee_id, leave_type, start, end, status='Pending'):
+    return LeaveRequest(employee_id=employee_id, leave_type=leave_type, start_date=start, end_date=end,
+                        total_days=(end - start).days + 1, reason='Test', status=status)
+
+
+def ledger():
+    return {
+        (row.employee_id, row.year, row.leave_type): (row.used, row.pending)
+        for row in LeaveBalance.query
+        if row.used or row.pending
+    }
+
+
+class LeaveBalanceTest(AppTestCase):
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        leave_balances._seeded.clear()
+        self.employee_ids = []
+        for i in range(1, 3):
+            user = User(email=f'ledger{i}@company.com', password_hash='!', role='Employee')
+            db.session.add(user)
+            db.session.flush()
+            employee = Employee(user_id=user.id, employee_code=f'EMP{i:05d}', first_name='Ledger',
+                                last_name=str(i), department='Engineering', date_of_joining=date(2024, 1, 1))
+            db.session.add(employee)
+            db.session.flush()
+            self.employee_ids.append(employee.id)
+        db.session.commit()
+
+    def assertLedgerMatchesRequests(self):
+        self.assertEqual(recompute_leave_balances(), {})
+
+    def test_lifecycle_keeps_ledger_in_step(self):
+        first, second = self.employee_ids
+        casual = leave(first, 'Casual', date(2025, 3, 3), date(2025, 3, 5))
+        sick = leave(first, 'Sick', date(2025, 4, 1), date(2025, 4, 1))
+        other = leave(second, 'Casual', date(2025, 3, 3), date(2025, 3, 4))
+        db.session.add_all([casual, sick, other])
+        db.session.commit()
+        self.assertEqual(ledger(), {
+            (first, 2025, 'Casual'): (0, 3),
+            (first, 2025, 'Sick'): (0, 1),
+            (second, 2025, 'Casual'): (0, 2),
+        })
+
+        casual.status = 'Approved'
+        sick.status = 'Rejected'
+        other.end_date = date(2025, 3, 7)
+        db.session.commit()
+        self.assertEqual(ledger(), {
+            (first, 2025, 'Casual'): (3, 0),
+            (second, 2025, 'Casual'): (0, 5),
+        })
+
+        other.leave_type = 'Earned'
+        db.session.delete(casual)
+        db.session.commit()
+        self.assertEqual(ledger(), {(second, 2025, 'Earned'): (0, 5)})
+        self.assertLedgerMatchesRequests()
+
+    def test_leave_across_new_year_splits_by_year(self):
+        first = self.employee_ids[0]
+        db.session.add(leave(first, 'Earned', date(2024, 12, 30), date(2025, 1, 2), status='Approved'))
+        db.session.commit()
+
+        self.assertEqual(ledger(), {(first, 2024, 'Earned'): (2, 0), (first, 2025, 'Earned'): (2, 0)})
+        self.assertEqual(read_balance(first, 2025, today=date(2025, 6, 1))['Earned']['used'], 2)
+        self.assertLedgerMatchesRequests()
+
+    def test_rolled_back_changes_leave_no_trace(self):
+        first = self.employee_ids[0]
+        db.session.add(leave(first, 'Casual', date(2025, 5, 5), date(2025, 5, 6)))
+        db.session.flush()
+        db.session.rollback()
+
+        self.assertEqual(ledger(), {})
+        self.assertLedgerMatchesRequests()
+
+    def test_recompute_corrects_drift(self):
+        first = self.employee_ids[0]
+        db.session.add(leave(first, 'Casual', date(2025, 2, 3), date(2025, 2, 4), status='Approved'))
+        db.session.commit()
+        db.session.get(LeaveBalance, (first, 2025, 'Casual')).used = 7
+        db.session.add(LeaveBalance(employee_id=first, year=2025, leave_type='Sick', used=1, pending=0))
+        db.session.commit()
+
+        drift = recompute_leave_balances()
+
+        self.assertEqual(drift, {
+            (first, 2025, 'Casual'): ((7, 0), (2, 0)),
+            (first, 2025, 'Sick'): ((1, 0), (0, 0)),
+        })
+        db.session.expire_all()
+        self.assertEqual(ledger(), {(first, 2025, 'Casual'): (2, 0)})
+
+    def test_first_read_seeds_leave_that_predates_the_ledger(self):
+        first = self.employee_ids[0]
+        db.session.add_all([
+            leave(first, 'Casual', date(2025, 2, 3), date(2025, 2, 5), status='Approved'),
+            leave(first, 'Sick', date(2025, 3, 3), date(2025, 3, 3)),
+        ])
+        db.session.commit()
+        # an upgraded database: no ledger rows, then one new request adds a partial row
+        LeaveBalance.query.delete()
+        db.session.commit()
+        db.session.add(leave(first, 'Casual', date(2025, 4, 7), date(2025, 4, 7)))
+        db.session.commit()
+
+        balance = read_balance(first, 2025, today=date(2025, 6, 1))
+
+        self.assertEqual((balance['Casual']['used'], balance['Casual']['pending']), (3, 1))
+        self.assertEqual((balance['Sick']['used'], balance['Sick']['pending']), (0, 1))
+        self.assertLedgerMatchesRequests()
+
+
+if __name__ == '__main__':
+    unittest.main()
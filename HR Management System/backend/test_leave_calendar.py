@@ -0,0 +1,109 @@
+"""
+Team Leave Calendar Tests
+Run: python -m pytest test_leave_calendar.py
+
+Checks the bounded overlap query against a plain interval test, the daily
+occupancy counts, and conditional GETs of /api/leaves/calendar on a
+throwaway SQLite database.
+"""
+import unittest
+from datetime import date, timedelta
+
+from models import db, User, Employee, LeaveRequest
+from testing import AppTestCase
+from utils.leave_calendar import overlapping, occupancy
+from utils.principal import Principal
+from utils.tokens import issue_tokens
+
+START = date(2025, 6, 9)
+END = date(2025, 6, 15)
+
+# (employee index, start, end, status)
+LEAVES = [
+    (0, date(2025, 5, 1), date(2025, 6, 30), 'Approved'),    # long, starts well before the window
+    (0, date(2025, 6, 1), date(2025, 6, 9), 'Approved'),     # ends on the first day
+    (1, date(2025, 6, 15), date(2025, 6, 20), 'Approved'),   # starts on the last day
+    (1, date(2025, 6, 10), date(2025, 6, 11), 'Pending'),
+    (1, date(2025, 6, 1), date(2025, 6, 8), 'Approved'),     # ends the day before
+    (2, date(2025, 6, 16), date(2025, 6, 18), 'Approved'),   # starts the day after
+    (2, date(2025, 6, 12), date(2025, 6, 12), 'Rejected'),
+    (2, date(2025, 6, 12), date(2025, 6, 13), 'Approved'),
+]
+
+
+class LeaveCalendarTest(AppTestCase):
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        self.employee_ids = []
+        for i, department in enumerate(('Engineering', 'Engineering', 'Sales'), 1):
+            user = User(email=f'calendar{i}@company.com', password_hash='!', role='Employee')
+            db.session.add(user)
+            db.session.flush()
+            employee = Employee(user_id=user.id, employee_code=f'EMP{i:05d}', first_name='Calendar',
+                                last_name=str(i), department=department, date_of_joining=date(2024, 1, 1))
+            db.session.add(employee)
+            db.session.flush()
+            self.employee_ids.append(employee.id)
+        for index, start, end, status in LEAVES:
+            db.session.add(LeaveRequest(employee_id=self.employee_ids[index], leave_type='Casual',
+                                        start_date=start, end_date=end, total_days=(end - start).days + 1,
+                                        reason='Test', status=status))
+        admin = User(email='calendar-admin@company.com', password_hash='!', role='Admin')
+        db.session.add(admin)
+        db.session.commit()
+        self.headers = {'Authorization': f'Bearer {issue_tokens(Principal(admin.id, "Admin", True, None))[0]}'}
+        self.client = self.app.test_client()
+
+    def expected(self, statuses, department=None):
+        """Plain interval overlap, computed without the bounded query"""
+        ids = [
+            leave.id for leave in LeaveRequest.query.all()
+            if leave.status in statuses and leave.start_date <= END and leave.end_date >= START
+            and (department is None or leave.employee.department == department)
+        ]
+        return sorted(ids)
+
+    def test_overlap_matches_plain_interval_test(self):
+        for statuses in (('Approved',), ('Approved', 'Pending')):
+            with self.subTest(statuses=statuses):
+                found = sorted(leave.id for leave in overlapping(START, END, statuses))
+                self.assertEqual(found, self.expected(statuses))
+        found = sorted(leave.id for leave in overlapping(START, END, ('Approved',), 'Sales'))
+        self.assertEqual(found, self.expected(('Approved',), 'Sales'))
+
+    def test_occupancy_counts_people_out_per_day(self):
+        leaves = overlapping(START, END, ('Approved',)).all()
+        expected = [
+            sum(1 for leave in leaves if leave.start_date <= START + timedelta(days=n) <= leave.end_date)
+            for n in range((END - START).days + 1)
+        ]
+        self.assertEqual(occupancy(leaves, START, END), expected)
+        self.assertEqual(occupancy(leaves, START, END), [2, 1, 1, 2, 2, 1, 2])
+
+    def test_calendar_revalidates_until_a_leave_changes(self):
+        url = f'/api/leaves/calendar?start={START}&end={END}'
+        first = self.client.get(url, headers=self.headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.get_json()['occupancy'], [2, 1, 1, 2, 2, 1, 2])
+        etag = first.headers['ETag']
+
+        again = self.client.get(url, headers=dict(self.headers, **{'If-None-Match': etag}))
+        self.assertEqual(again.status_code, 304)
+
+        pending = LeaveRequest.query.filter_by(status='Pending').one()
+        pending.status = 'Approved'
+        db.session.commit()
+
+        changed = self.client.get(url, headers=dict(self.headers, **{'If-None-Match': etag}))
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+        self.assertEqual(changed.get_json()['occupancy'], [2, 2, 2, 2, 2, 1, 2])
+
+    def test_window_is_validated(self):
+        response = self.client.get(f'/api/leaves/calendar?start={END}&end={START}', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
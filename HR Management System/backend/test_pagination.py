@@ -0,0 +1,125 @@
+"""
+Keyset Pagination Tests
+Run: python -m pytest test_pagination.py
+
+Walks cursor pages forwards and back on a throwaway SQLite database, with
+many rows sharing a sort key, and checks that every row is listed exactly
+once and in the same order as a plain ORDER BY.
+"""
+import unittest
+from datetime import date, datetime, timedelta
+
+from models import db, User, Employee, LeaveRequest
+from testing import AppTestCase
+from utils.pagination import keyset_paginate, InvalidCursor
+from utils.principal import Principal
+from utils.tokens import issue_tokens
+
+CREATED = datetime(2025, 6, 1, 9, 0)
+
+
+class KeysetPaginationTest(AppTestCase):
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        admin = User(email='pages-admin@company.com', password_hash='!', role='Admin')
+        db.session.add(admin)
+        db.session.flush()
+        self.employee_ids = []
+        for i in range(1, 8):
+            user = User(email=f'pages{i}@company.com', password_hash='!', role='Employee')
+            db.session.add(user)
+            db.session.flush()
+            employee = Employee(user_id=user.id, employee_code=f'EMP{i:05d}', first_name='Page',
+                                last_name=str(i), department='Engineering', date_of_joining=date(2024, 1, 1))
+            db.session.add(employee)
+            db.session.flush()
+            self.employee_ids.append(employee.id)
+        # 17 leaves over 4 distinct timestamps, so pages split runs of ties
+        for n in range(17):
+            db.session.add(LeaveRequest(employee_id=self.employee_ids[n % 7], leave_type='Casual',
+                                        start_date=date(2025, 7, 1), end_date=date(2025, 7, 1), total_days=1,
+                                        reason='Test', status='Pending',
+                                        created_at=CREATED + timedelta(minutes=n % 4)))
+        db.session.commit()
+        self.headers = {'Authorization': f'Bearer {issue_tokens(Principal(admin.id, "Admin", True, None))[0]}'}
+        self.client = self.app.test_client()
+
+    def walk(self, fetch):
+        """Follow next cursors to the end, then prev cursors back to the start
+
+        `fetch(cursor)` returns (ids, next_cursor, prev_cursor). Returns the
+        forward pages and the backward pages (in the order they were read).
+        """
+        forward, cursor = [], None
+        while True:
+            ids, next_cursor, prev_cursor = fetch(cursor)
+            self.assertEqual(prev_cursor is None, cursor is None)
+            forward.append((ids, prev_cursor))
+            if next_cursor is None:
+                break
+            cursor = next_cursor
+
+        backward, cursor = [], forward[-1][1]
+        while cursor is not None:
+            ids, _, cursor = fetch(cursor)
+            backward.append(ids)
+        return [ids for ids, _ in forward], backward
+
+    def assertWalk(self, fetch, expected, per_page):
+        forward, backward = self.walk(fetch)
+        self.assertEqual([i for page in forward for i in page], expected)
+        self.assertTrue(all(len(page) == per_page for page in forward[:-1]))
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_descending_with_tied_created_at(self):
+        expected = [leave.id for leave in LeaveRequest.query.order_by(
+            LeaveRequest.created_at.desc(), LeaveRequest.id.desc())]
+        columns = [LeaveRequest.created_at, LeaveRequest.id]
+
+        for per_page in (1, 3, 4, 5, 17, 20):
+            with self.subTest(per_page=per_page):
+                def fetch(cursor):
+                    page = keyset_paginate(LeaveRequest.query, columns, cursor, per_page, descending=True)
+                    return [leave.id for leave in page.items], page.next_cursor, page.prev_cursor
+                self.assertWalk(fetch, expected, per_page)
+
+    def test_ascending_with_tied_created_at(self):
+        expected = [leave.id for leave in LeaveRequest.query.order_by(
+            LeaveRequest.created_at, LeaveRequest.id)]
+
+        def fetch(cursor):
+            page = keyset_paginate(LeaveRequest.query, [LeaveRequest.created_at, LeaveRequest.id], cursor, 4)
+            return [leave.id for leave in page.items], page.next_cursor, page.prev_cursor
+        self.assertWalk(fetch, expected, 4)
+
+    def test_leave_listing_pages(self):
+        expected = [leave.id for leave in LeaveRequest.query.order_by(
+            LeaveRequest.created_at.desc(), LeaveRequest.id.desc())]
+
+        def fetch(cursor):
+            response = self.client.get('/api/leaves/all', headers=self.headers,
+                                       query_string={'cursor': cursor or '', 'per_page': 5, 'fields': 'id'})
+            self.assertEqual(response.status_code, 200)
+            body = response.get_json()
+            return [leave['id'] for leave in body['leaves']], body['next_cursor'], body['prev_cursor']
+        self.assertWalk(fetch, expected, 5)
+
+    def test_employee_listing_pages(self):
+        def fetch(cursor):
+            response = self.client.get('/api/employees/', headers=self.headers,
+                                       query_string={'cursor': cursor or '', 'per_page': 3})
+            self.assertEqual(response.status_code, 200)
+            body = response.get_json()
+            return [employee['id'] for employee in body['employees']], body['next_cursor'], body['prev_cursor']
+        self.assertWalk(fetch, sorted(self.employee_ids), 3)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            keyset_paginate(LeaveRequest.query, [LeaveRequest.created_at, LeaveRequest.id], 'not-a-cursor')
+        response = self.client.get('/api/leaves/all?cursor=not-a-cursor', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
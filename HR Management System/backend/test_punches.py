@@ -0,0 +1,134 @@
+"""
+Check-in/Check-out Tests
+Run: python -m pytest test_punches.py
+
+Punches through /api/attendance/checkin and /checkout on a throwaway
+SQLite database and checks the one-open-punch guards, Idempotency-Key
+replays, and the rows and counters each punch leaves behind.
+"""
+import unittest
+from datetime import date, datetime, time, timedelta
+
+from models import db, User, Employee, Attendance, IdempotencyKey, StatCounter
+from testing import AppTestCase
+from utils.counters import checkins_key
+from utils.principal import Principal
+from utils.punches import punch_in, punch_out
+from utils.tokens import issue_tokens
+
+TODAY = date.today()
+
+
+class PunchTest(AppTestCase):
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        user = User(email='punch@company.com', password_hash='!', role='Employee')
+        db.session.add(user)
+        db.session.flush()
+        employee = Employee(user_id=user.id, employee_code='EMP00001', first_name='Punch', last_name='Test',
+                            department='Engineering', date_of_joining=date(2024, 1, 1))
+        db.session.add(employee)
+        db.session.commit()
+        self.user_id, self.employee_id = user.id, employee.id
+        token = issue_tokens(Principal(user.id, 'Employee', True, employee.id))[0]
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client = self.app.test_client()
+
+    def punch(self, action, key=None):
+        headers = dict(self.headers, **{'Idempotency-Key': key}) if key else self.headers
+        return self.client.post(f'/api/attendance/{action}', headers=headers)
+
+    def rows(self):
+        return Attendance.query.filter_by(employee_id=self.employee_id).all()
+
+    def counter(self, name):
+        db.session.expire_all()
+        counter = db.session.get(StatCounter, name)
+        return counter.value if counter else 0
+
+    def test_replayed_key_returns_the_stored_response(self):
+        first = self.punch('checkin', key='punch-1')
+        again = self.punch('checkin', key='punch-1')
+
+        self.assertEqual((first.status_code, again.status_code), (200, 200))
+        self.assertEqual(again.get_json(), first.get_json())
+        self.assertEqual(again.headers.get('Idempotent-Replayed'), 'true')
+        self.assertNotIn('Idempotent-Replayed', first.headers)
+        self.assertEqual(len(self.rows()), 1)
+        self.assertEqual(IdempotencyKey.query.count(), 1)
+        self.assertEqual(self.counter(checkins_key(TODAY)), 1)
+        self.assertEqual(self.counter('attendance_records'), 1)
+
+    def test_key_reused_for_another_endpoint_is_rejected(self):
+        self.punch('checkin', key='punch-1')
+
+        response = self.punch('checkout', key='punch-1')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertIsNone(self.rows()[0].check_out)
+
+    def test_malformed_key_is_rejected(self):
+        response = self.punch('checkin', key='k' * 65)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.rows(), [])
+
+    def test_expired_key_is_forgotten(self):
+        self.punch('checkin', key='punch-1')
+        record = IdempotencyKey.query.one()
+        record.created_at = datetime.utcnow() - timedelta(seconds=self.app.config['IDEMPOTENCY_KEY_TTL'] + 1)
+        db.session.commit()
+
+        # not replayed: the punch runs again and hits the one-open-punch guard
+        response = self.punch('checkin', key='punch-1')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(IdempotencyKey.query.count(), 0)
+
+    def test_double_check_in_keeps_the_first(self):
+        self.assertEqual(self.punch('checkin').status_code, 200)
+        check_in = self.rows()[0].check_in
+
+        response = self.punch('checkin')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'error': 'Already checked in today'})
+        db.session.expire_all()
+        self.assertEqual([r.check_in for r in self.rows()], [check_in])
+        self.assertEqual(self.counter(checkins_key(TODAY)), 1)
+        self.assertIsNone(punch_in(self.employee_id, TODAY, time(10, 0)))
+
+    def test_check_out_needs_an_open_check_in(self):
+        response = self.punch('checkout')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'error': 'No check-in found for today'})
+        self.assertEqual(self.rows(), [])
+
+        self.punch('checkin')
+        self.assertEqual(self.punch('checkout').status_code, 200)
+        again = self.punch('checkout')
+
+        self.assertEqual(again.status_code, 400)
+        self.assertEqual(again.get_json(), {'error': 'Already checked out today'})
+        self.assertFalse(punch_out(self.employee_id, TODAY, time(20, 0)))
+
+    def test_check_in_fills_an_existing_row(self):
+        day = TODAY - timedelta(days=1)
+        db.session.add(Attendance(employee_id=self.employee_id, date=day, status='Absent'))
+        db.session.commit()
+
+        self.assertEqual(punch_in(self.employee_id, day, time(9, 0)), 'updated')
+        self.assertTrue(punch_out(self.employee_id, day, time(11, 0)))
+        db.session.commit()
+
+        db.session.expire_all()
+        row = Attendance.query.filter_by(employee_id=self.employee_id, date=day).one()
+        self.assertEqual((row.status, row.check_in, row.check_out, float(row.work_hours)),
+                         ('Half-day', time(9, 0), time(11, 0), 2.0))
+        self.assertEqual(self.counter('attendance_records'), 1)
+        self.assertEqual(self.counter(checkins_key(day)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+Query Plan Regression Tests
+Run: python -m unittest test_query_plans
+
+Builds every hot query the routes issue, runs EXPLAIN (QUERY PLAN) against
+a freshly created and seeded database and fails if the filtered table is
+read with a full scan. Uses a throwaway SQLite file unless
+QUERY_PLAN_DATABASE_URL points at another (empty) database, e.g. MySQL.
+"""
+import os
+import re
+import unittest
+from datetime import date, datetime, time, timedelta
+
+from models import (db, User, Employee, Attendance, LeaveRequest, Payroll, Notification,
+                    IdempotencyKey, AttendanceRollup, LeaveBalance)
+from testing import AppTestCase
+from utils.attendance_board import _board
+
+TODAY = date.today()
+
+
+def seed():
+    """A few rows per table; no ANALYZE, so plans reflect the indexes rather than tiny stats"""
+    for i in range(1, 21):
+        user = User(email=f'plan{i}@company.com', password_hash='!', role='Employee')
+        db.session.add(user)
+        db.session.flush()
+        employee = Employee(user_id=user.id, employee_code=f'EMP{i:05d}', first_name='Plan',
+                            last_name=str(i), department='Engineering' if i % 2 else 'Sales',
+                            date_of_joining=date(2024, 1, 1))
+        db.session.add(employee)
+        db.session.flush()
+        db.session.add_all([
+            Attendance(employee_id=employee.id, date=TODAY - timedelta(days=d), check_in=time(9),
+                       status='Present')
+            for d in range(5)
+        ])
+        db.session.add(LeaveRequest(employee_id=employee.id, leave_type='Casual', start_date=TODAY,
+                                    end_date=TODAY, total_days=1, reason='plan', status='Pending'))
+        db.session.add(Payroll(employee_id=employee.id, month=TODAY.month, year=TODAY.year,
+                               basic_salary=1000, payment_status='Pending'))
+        db.session.add(Notification(employee_id=employee.id, title='plan', message='plan'))
+    db.session.commit()
+
+
+# name -> (table that must not be scanned, statement, whether an ordered index walk is fine)
+def hot_queries():
+    week_ago = TODAY - timedelta(days=7)
+    return {
+        # attendance
+        'attendance today': ('attendance', db.select(Attendance).where(
+            Attendance.employee_id == 1, Attendance.date == TODAY), False),
+        'attendance history': ('attendance', db.select(Attendance).where(
+            Attendance.employee_id == 1, Attendance.date >= week_ago, Attendance.date <= TODAY
+        ).order_by(Attendance.date.desc()), False),
+        'attendance board': ('attendance', _board(db.select(
+            db.func.coalesce(Attendance.status, 'Absent'), db.func.count()), TODAY
+        ).group_by(db.func.coalesce(Attendance.status, 'Absent')), False),
+        'attendance monthly report': ('attendance', db.select(
+            Attendance.employee_id, Attendance.date, Attendance.status
+        ).where(Attendance.employee_id.in_([1, 2, 3]), Attendance.date >= TODAY.replace(day=1),
+                Attendance.date <= TODAY), False),
+        'attendance open check-ins': ('attendance', db.select(Attendance.employee_id).where(
+            Attendance.date == TODAY, Attendance.check_in.isnot(None), Attendance.check_out.is_(None)), False),
+        'attendance check-in counters': ('attendance', db.select(Attendance.date, db.func.count()).where(
+            Attendance.check_in.isnot(None), Attendance.date >= week_ago).group_by(Attendance.date), False),
+        'attendance rollup': ('attendance_rollups', db.select(AttendanceRollup).where(
+            AttendanceRollup.employee_id == 1, AttendanceRollup.period == 'week',
+            AttendanceRollup.period_start == week_ago), False),
+
+        # leave requests
+        'leave overlap check': ('leave_requests', db.select(LeaveRequest).where(
+            LeaveRequest.employee_id == 1, LeaveRequest.status.in_(['Pending', 'Approved']),
+            LeaveRequest.start_date <= TODAY, LeaveRequest.end_date >= TODAY), False),
+        'my leaves': ('leave_requests', db.select(LeaveRequest).where(
+            LeaveRequest.employee_id == 1).order_by(LeaveRequest.created_at.desc()), False),
+        'my leaves by status': ('leave_requests', db.select(LeaveRequest).where(
+            LeaveRequest.employee_id == 1, LeaveRequest.status == 'Pending'), False),
+        'pending leaves': ('leave_requests', db.select(LeaveRequest).where(
+            LeaveRequest.status == 'Pending').order_by(LeaveRequest.created_at.asc()), False),
+        'pending leaves count': ('leave_requests', db.select(db.func.count()).select_from(LeaveRequest).where(
+            LeaveRequest.status == 'Pending'), False),
+        'leave calendar': ('leave_requests', db.select(LeaveRequest).where(
+            LeaveRequest.status.in_(['Approved', 'Pending']), LeaveRequest.start_date >= week_ago,
+            LeaveRequest.start_date <= TODAY, LeaveRequest.end_date >= TODAY), False),
+        'longest leave': ('leave_requests', db.select(db.func.max(LeaveRequest.total_days)), False),
+        'all leaves page': ('leave_requests', db.select(LeaveRequest).order_by(
+            LeaveRequest.created_at.desc(), LeaveRequest.id.desc()).limit(20), True),
+        'all leaves by status': ('leave_requests', db.select(LeaveRequest).where(
+            LeaveRequest.status == 'Approved').order_by(LeaveRequest.created_at.desc()).limit(20), False),
+        'leave balance': ('leave_balances', db.select(LeaveBalance).where(
+            LeaveBalance.employee_id == 1, LeaveBalance.year == TODAY.year), False),
+
+        # notifications
+        'notification feed': ('notifications', db.select(Notification).where(
+            Notification.employee_id == 1).order_by(Notification.created_at.desc()).limit(50), False),
+        'unread notifications': ('notifications', db.select(db.func.count()).select_from(Notification).where(
+            Notification.employee_id == 1, Notification.is_read == db.false()), False),
+
+        # payroll
+        'payroll by period and status': ('payroll', db.select(Payroll).where(
+            Payroll.year == TODAY.year, Payroll.month == TODAY.month, Payroll.payment_status == 'Pending'), False),
+        'payroll by year': ('payroll', db.select(Payroll).where(Payroll.year == TODAY.year), False),
+        'my payroll': ('payroll', db.select(Payroll).where(
+            Payroll.employee_id == 1, Payroll.year == TODAY.year).order_by(Payroll.month.desc()), False),
+        'previous payroll': ('payroll', db.select(Payroll).where(Payroll.employee_id == 1).order_by(
+            Payroll.year.desc(), Payroll.month.desc()).limit(1), False),
+        'unprocessed payroll count': ('payroll', db.select(db.func.count()).select_from(Payroll).where(
+            Payroll.payment_status == 'Pending'), False),
+
+        # employees and users
+        'employees by department': ('employees', db.select(Employee).where(
+            Employee.department == 'Engineering'), False),
+        'employee by user': ('employees', db.select(Employee).where(Employee.user_id == 1), False),
+        'user by email': ('users', db.select(User).where(User.email == 'plan1@company.com'), False),
+        'users by role': ('users', db.select(User).where(
+            User.role == 'Employee', User.is_active == db.true()).order_by(User.id), False),
+
+        # housekeeping
+        'expired idempotency keys': ('idempotency_keys', db.select(IdempotencyKey.id).where(
+            IdempotencyKey.created_at < datetime.utcnow()), False),
+    }
+
+
+def explain(connection, statement):
+    """Plan rows for `statement`: EXPLAIN QUERY PLAN on SQLite, EXPLAIN elsewhere"""
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+    # the plan does not depend on parameter values, only on their placement
+    params = {k: v.isoformat() if isinstance(v, (date, time)) else v for k, v in compiled.params.items()}
+    if compiled.positiontup is not None:
+        params = tuple(params[name] for name in compiled.positiontup)
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+    return connection.exec_driver_sql(prefix + str(compiled), params).mappings().all()
+
+def full_scans(connection, plan, table, ordered_ok):
+    """Plan steps that read every row of `table`"""
+    if connection.dialect.name == 'sqlite':
+        pattern = re.compile(rf'^SCAN {table}\b(?: AS \w+)?(?P<index> USING (?:COVERING )?INDEX\b.*)?$')
+        return [row['detail'] for row in plan
+                if (match := pattern.match(row['detail'])) and not (ordered_ok and match.group('index'))]
+    allowed = ('ALL',) if ordered_ok else ('ALL', 'index')
+    return [dict(row) for row in plan if row['table'] == table and row['type'] in allowed]
+
+
+class QueryPlanTest(AppTestCase):
+    config = ({'SQLALCHEMY_DATABASE_URI': os.environ['QUERY_PLAN_DATABASE_URL']}
+              if os.getenv('QUERY_PLAN_DATABASE_URL') else {})
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        db.drop_all()
+        db.create_all()
+        seed()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.drop_all()
+        super().tearDownClass()
+
+    def test_hot_queries_use_indexes(self):
+        connection = db.session.connection()
+        for name, (table, statement, ordered_ok) in hot_queries().items():
+            with self.subTest(query=name):
+                plan = explain(connection, statement)
+                scans = full_scans(connection, plan, table, ordered_ok)
+                self.assertFalse(scans, f'{name} scans {table}: {scans}')
+
+    def test_hot_queries_run(self):
+        for name, (table, statement, ordered_ok) in hot_queries().items():
+            with self.subTest(query=name):
+                db.session.execute(statement).all()
+
+
+if __name__ == '__main__':
+    unittest.main()
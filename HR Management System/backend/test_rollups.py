@@ -0,0 +1,104 @@
+"""
+Attendance Rollup Tests
+Run: python -m pytest test_rollups.py
+
+Checks on a throwaway SQLite database that punches and edits keep the
+day/week/month/year rollups equal to a rebuild, that reads write
+nothing, and that a rebuild folds in attendance written before the
+rollups existed.
+"""
+import unittest
+from datetime import date, time, timedelta
+
+from models import db, User, Employee, Attendance, AttendanceRollup
+from testing import AppTestCase, rollup_rows
+from utils.principal import Principal
+from utils.rollups import period_bounds, read_rollup, rebuild_attendance_rollups
+from utils.tokens import issue_tokens
+
+TODAY = date.today()
+WEEK_START = period_bounds('week', TODAY)[0]
+
+
+class RollupTest(AppTestCase):
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        user = User(email='rollup@company.com', password_hash='!', role='Employee')
+        db.session.add(user)
+        db.session.flush()
+        employee = Employee(user_id=user.id, employee_code='EMP00001', first_name='Rollup', last_name='Test',
+                            department='Engineering', date_of_joining=date(2024, 1, 1))
+        db.session.add(employee)
+        db.session.commit()
+        self.employee_id = employee.id
+        token = issue_tokens(Principal(user.id, 'Employee', True, employee.id))[0]
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client = self.app.test_client()
+
+    def add_days(self, days):
+        for n in days:
+            attendance = Attendance(employee_id=self.employee_id, date=TODAY - timedelta(days=n),
+                                    check_in=time(9, 0), check_out=time(17, 0), status='Present')
+            attendance.calculate_work_hours()
+            db.session.add(attendance)
+        db.session.commit()
+
+    def assertRollupsMatchRebuild(self):
+        maintained = rollup_rows()
+        with db.engine.begin() as connection:
+            rebuild_attendance_rollups(connection)
+        self.assertEqual(maintained, rollup_rows())
+
+    def test_punches_and_edits_keep_rollups_in_step(self):
+        self.add_days(range(1, 40))
+        self.assertEqual(self.client.post('/api/attendance/checkin', headers=self.headers).status_code, 200)
+        self.assertEqual(self.client.post('/api/attendance/checkout', headers=self.headers).status_code, 200)
+
+        edited = Attendance.query.filter_by(employee_id=self.employee_id, date=TODAY - timedelta(days=3)).one()
+        edited.status = 'Half-day'
+        edited.check_out = time(12, 0)
+        edited.calculate_work_hours()
+        db.session.delete(Attendance.query.filter_by(employee_id=self.employee_id,
+                                                     date=TODAY - timedelta(days=10)).one())
+        db.session.commit()
+
+        self.assertRollupsMatchRebuild()
+
+    def test_weekly_summary_includes_daily_records(self):
+        self.add_days(range(0, (TODAY - WEEK_START).days + 1))
+
+        body = self.client.get('/api/attendance/weekly-summary', headers=self.headers).get_json()
+
+        self.assertEqual(body['week_start'], WEEK_START.isoformat())
+        self.assertEqual(body['total_days'], len(body['daily_records']))
+        self.assertEqual(body['present'], body['total_days'])
+        lean = self.client.get('/api/attendance/weekly-summary?include_records=false', headers=self.headers)
+        self.assertNotIn('daily_records', lean.get_json())
+
+    def test_reads_write_nothing_and_a_rebuild_restores_old_rows(self):
+        self.add_days(range(1, 60))
+        # an upgraded database: no rollups, then one new write builds partial ones
+        AttendanceRollup.query.delete()
+        db.session.commit()
+        self.add_days([0])
+        partial = rollup_rows()
+
+        self.assertEqual(self.client.get('/api/attendance/weekly-summary', headers=self.headers).status_code, 200)
+        self.assertEqual(rollup_rows(), partial)
+
+        # the migration and `flask rebuild-attendance-rollups` fold the old rows in
+        with db.engine.begin() as connection:
+            rebuild_attendance_rollups(connection)
+        for period, day in (('week', TODAY - timedelta(days=20)), ('month', TODAY - timedelta(days=40)),
+                            ('year', TODAY)):
+            with self.subTest(period=period):
+                start, end = period_bounds(period, day)
+                rows = Attendance.query.filter(Attendance.employee_id == self.employee_id,
+                                               Attendance.date.between(start, end)).all()
+                rollup = read_rollup(self.employee_id, period, day)
+                self.assertEqual(rollup['total_days'], len(rows))
+                self.assertEqual(rollup['total_hours'], float(sum(r.work_hours for r in rows)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Employee Code Allocator Tests
+Run: python -m pytest test_sequences.py
+
+Reserves blocks from the sequences table of a throwaway SQLite database
+with several allocators (standing in for processes) and threads, and
+checks that no value is handed out twice, that blocks are reserved only
+when the previous one runs out, and that codes continue after existing ones.
+"""
+import threading
+import unittest
+from datetime import date
+
+from models import db, User, Employee, Sequence
+from testing import AppTestCase
+from utils import helpers
+from utils.helpers import generate_employee_code, allocate_employee_codes
+from utils.sequences import BlockAllocator
+
+
+class BlockAllocatorTest(AppTestCase):
+    config = {'EMPLOYEE_CODE_BLOCK_SIZE': 5, 'BCRYPT_LOG_ROUNDS': 4}
+
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        # the employee code allocator is process-wide; start each test from the table
+        helpers._employee_codes = None
+
+    def stored(self, name):
+        db.session.expire_all()
+        return db.session.get(Sequence, name).next_value
+
+    def test_values_come_from_one_block_until_it_runs_out(self):
+        allocator = BlockAllocator('test', block_size=4)
+
+        self.assertEqual([allocator.next() for _ in range(3)], [1, 2, 3])
+        self.assertEqual(self.stored('test'), 5)
+        self.assertEqual([allocator.next() for _ in range(2)], [4, 5])
+        self.assertEqual(self.stored('test'), 9)
+
+    def test_processes_get_disjoint_blocks(self):
+        first, second = BlockAllocator('test', block_size=3), BlockAllocator('test', block_size=3)
+
+        values = [first.next(), second.next(), first.next(), second.next(), first.next(), first.next()]
+
+        self.assertEqual(values, [1, 4, 2, 5, 3, 7])
+        # each keeps handing out its own block; values are unique, not ordered
+        self.assertEqual(second.next(), 6)
+        self.assertEqual(self.stored('test'), 10)
+
+    def test_allocate_uses_the_block_or_reserves_a_range(self):
+        allocator = BlockAllocator('test', block_size=5)
+        allocator.next()
+
+        self.assertEqual(allocator.allocate(3), [2, 3, 4])
+        self.assertEqual(allocator.allocate(10), list(range(6, 16)))
+        self.assertEqual(allocator.next(), 5)
+        self.assertEqual(self.stored('test'), 16)
+
+    def test_concurrent_threads_and_allocators_never_repeat(self):
+        allocators = [BlockAllocator('test', block_size=7) for _ in range(3)]
+        results, errors = [], []
+
+        def work(allocator):
+            with self.app.app_context():
+                try:
+                    values = [allocator.next() for _ in range(40)] + allocator.allocate(9)
+                except Exception as e:
+                    errors.append(e)
+                else:
+                    results.extend(values)
+
+        threads = [threading.Thread(target=work, args=(allocators[n % 3],)) for n in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 6 * 49)
+        self.assertEqual(len(set(results)), len(results))
+
+    def test_codes_continue_after_existing_employees(self):
+        for number in (3, 42):
+            user = User(email=f'seq{number}@company.com', password_hash='!', role='Employee')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Employee(user_id=user.id, employee_code=helpers.format_employee_code(number),
+                                    first_name='Seq', last_name=str(number), date_of_joining=date(2024, 1, 1)))
+        db.session.commit()
+
+        self.assertEqual(generate_employee_code(), 'EMP00043')
+        self.assertEqual(allocate_employee_codes(2), ['EMP00044', 'EMP00045'])
+
+    def test_registrations_across_commits_get_distinct_codes(self):
+        client = self.app.test_client()
+        codes = []
+        for n in range(7):
+            response = client.post('/api/auth/register', json={
+                'email': f'new{n}@company.com', 'password': 'secret123', 'first_name': 'New',
+                'last_name': str(n), 'date_of_joining': '2025-01-01'
+            })
+            self.assertEqual(response.status_code, 201)
+            codes.append(response.get_json()['employee']['employee_code'])
+
+        self.assertEqual(codes, [helpers.format_employee_code(n) for n in range(1, 8)])
+        self.assertEqual(sorted(e.employee_code for e in Employee.query), codes)
+
+
+if __name__ == '__main__':
+    unittest.main()
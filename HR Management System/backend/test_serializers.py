@@ -0,0 +1,91 @@
+"""
+Sparse Fieldset Tests
+Run: python -m pytest test_serializers.py
+
+Lists employees and leaves with ?fields= on a throwaway SQLite database
+and checks the statements issued: one SELECT per page, naming only the
+columns and relationships behind the requested keys.
+"""
+import unittest
+from datetime import date
+
+from models import db, User, Employee, LeaveRequest
+from testing import AppTestCase
+from utils.principal import Principal
+from utils.tokens import issue_tokens
+
+
+class SparseFieldsetTest(AppTestCase):
+    def setUp(self):
+        db.drop_all()
+        db.create_all()
+        for i in range(1, 6):
+            user = User(email=f'fields{i}@company.com', password_hash='!', role='Admin' if i == 1 else 'Employee')
+            db.session.add(user)
+            db.session.flush()
+            employee = Employee(user_id=user.id, employee_code=f'EMP{i:05d}', first_name='Field',
+                                last_name=str(i), department='Engineering', phone='555-0100',
+                                date_of_joining=date(2024, 1, 1))
+            db.session.add(employee)
+            db.session.flush()
+            db.session.add(LeaveRequest(employee_id=employee.id, leave_type='Casual', start_date=date(2025, 7, 1),
+                                        end_date=date(2025, 7, 1), total_days=1, reason='Test', status='Pending'))
+            if i == 1:
+                admin = Principal(user.id, 'Admin', True, employee.id)
+        db.session.commit()
+        self.headers = {'Authorization': f'Bearer {issue_tokens(admin)[0]}'}
+        self.client = self.app.test_client()
+
+    def get(self, url):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            # the token revocation index sync is not part of the page
+            if 'FROM token_revocations' not in statement:
+                statements.append(statement)
+        db.event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.get(url, headers=self.headers)
+        finally:
+            db.event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json(), statements
+
+    def selected(self, statements, table):
+        """The column list of the page's SELECT from `table`"""
+        pages = [s for s in statements if f'FROM {table}' in s and 'count(' not in s]
+        self.assertEqual(len(pages), 1, statements)
+        return pages[0].split(' FROM ')[0]
+
+    def test_employee_page_selects_only_requested_columns(self):
+        body, statements = self.get('/api/employees/?cursor=&per_page=3&fields=full_name,phone')
+
+        self.assertEqual(body['employees'][0], {'full_name': 'Field 1', 'phone': '555-0100'})
+        self.assertEqual(len(statements), 1)
+        columns = self.selected(statements, 'employees')
+        for column in ('employees.id', 'employees.first_name', 'employees.last_name', 'employees.phone'):
+            self.assertIn(column, columns)
+        for column in ('employees.address', 'employees.designation', 'users'):
+            self.assertNotIn(column, columns)
+
+    def test_relationship_keys_join_only_what_they_need(self):
+        body, statements = self.get('/api/leaves/all?cursor=&per_page=3&fields=status,employee_name')
+
+        self.assertEqual(body['leaves'][0], {'status': 'Pending', 'employee_name': 'Field 5'})
+        self.assertEqual(len(statements), 1)
+        columns = self.selected(statements, 'leave_requests')
+        self.assertIn('leave_requests.employee_id', columns)
+        self.assertIn('leave_requests.created_at', columns)   # the cursor is built from it
+        self.assertNotIn('leave_requests.reason', columns)
+        self.assertNotIn('reviewed_by', columns)
+
+    def test_without_fields_everything_is_returned(self):
+        body, _ = self.get('/api/employees/?cursor=&per_page=1')
+
+        self.assertEqual(body['employees'][0]['email'], 'fields1@company.com')
+        self.assertEqual(body['employees'][0]['role'], 'Admin')
+        self.assertEqual(body['employees'][0]['phone'], '555-0100')
+
+
+if __name__ == '__main__':
+    unittest.main()
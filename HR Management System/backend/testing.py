@@ -0,0 +1,49 @@
+"""
+Shared Test Setup
+Imported by the test_*.py suites.
+
+AppTestCase gives each test class its own app on a throwaway SQLite file
+(set through create_app's config, so classes never share a database) with
+the scheduler off. rollup_rows() lists every attendance rollup for
+comparing the maintained rows against a rebuild.
+"""
+import os
+import tempfile
+import unittest
+
+from app import create_app
+from models import db, AttendanceRollup
+
+
+class AppTestCase(unittest.TestCase):
+    # per-class config overrides, applied on top of the test database
+    config = {}
+
+    @classmethod
+    def setUpClass(cls):
+        fd, cls.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        cls.app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{cls.db_path}',
+            'SCHEDULER_ENABLED': False,
+            **cls.config,
+        })
+        cls.context = cls.app.app_context()
+        cls.context.push()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.engine.dispose()
+        cls.context.pop()
+        os.remove(cls.db_path)
+
+    def tearDown(self):
+        db.session.remove()
+
+
+def rollup_rows():
+    return sorted(
+        (r.employee_id, r.period, r.period_start, r.days, r.present, r.absent, r.half_day, r.leave, r.work_hours)
+        for r in db.session.execute(db.select(AttendanceRollup.__table__))
+    )
@@ -0,0 +1,181 @@
+import os
+from collections import defaultdict
+from datetime import date
+from flask import current_app
+from sqlalchemy import create_engine
+from models import db, Attendance, ArchiveSegment
+from utils.counters import apply_counter_deltas
+from utils.leases import lease, renew_lease
+
+# Cold tier: one SQLite file per year holding that year's attendance rows,
+# clustered on (employee_id, date) with no rowid or secondary indexes so a
+# file is little more than the rows themselves.
+archive_metadata = db.MetaData()
+archived_attendance = db.Table(
+    'attendance', archive_metadata,
+    db.Column('employee_id', db.Integer, primary_key=True),
+    db.Column('date', db.Date, primary_key=True),
+    db.Column('id', db.Integer),
+    db.Column('check_in', db.Time),
+    db.Column('check_out', db.Time),
+    db.Column('status', db.String(10)),
+    db.Column('work_hours', db.Numeric(4, 2)),
+    db.Column('notes', db.Text),
+    db.Column('created_at', db.DateTime),
+    db.Column('updated_at', db.DateTime),
+    sqlite_with_rowid=False
+)
+COLUMNS = [c.name for c in archived_attendance.columns]
+
+_engines = {}
+
+def archive_cutoff(months, today=None):
+    """First day of the month `months` whole months before today's; None if archiving is off"""
+    if months <= 0:
+        return None
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+def archive_path(year):
+    directory = current_app.config['ATTENDANCE_ARCHIVE_DIR']
+    if not os.path.isabs(directory):
+        directory = os.path.join(current_app.instance_path, directory)
+    return os.path.join(directory, f'attendance-{year}.db')
+
+def _engine(path):
+    engine = _engines.get(path)
+    if engine is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        engine = create_engine(f'sqlite:///{path}')
+        archive_metadata.create_all(engine)
+        _engines[path] = engine
+    return engine
+
+def _write_segment(year, rows):
+    """Store rows in the year's file and widen its segment (in the caller's transaction)"""
+    path = archive_path(year)
+    with _engine(path).begin() as connection:
+        # REPLACE keeps a re-run after an interrupted archive idempotent
+        connection.execute(archived_attendance.insert().prefix_with('OR REPLACE'), rows)
+
+    first, last = min(r['date'] for r in rows), max(r['date'] for r in rows)
+    segment = db.session.get(ArchiveSegment, year)
+    if segment is None:
+        db.session.add(ArchiveSegment(year=year, path=path, first_date=first, last_date=last,
+                                      row_count=len(rows)))
+    else:
+        segment.first_date = min(segment.first_date, first)
+        segment.last_date = max(segment.last_date, last)
+        segment.row_count += len(rows)
+
+def _recount(years):
+    for year in years:
+        segment = db.session.get(ArchiveSegment, year)
+        engine = _engine(segment.path)
+        with engine.connect() as connection:
+            segment.row_count = connection.execute(
+                db.select(db.func.count()).select_from(archived_attendance)
+            ).scalar()
+        with engine.connect() as connection:
+            connection.exec_driver_sql('VACUUM')
+    db.session.commit()
+
+LEASE = 'archive-attendance'
+
+def archive_attendance(before, batch_size=5000):
+    """Move attendance rows dated before `before` into the cold tier
+
+    Returns the number moved, or None if another process is archiving (only
+    the holder of the archive lease runs). Each batch is written to its
+    year's file first and only then deleted from the hot table, committing
+    both the delete and the widened segment bounds together, so readers
+    never miss a row. Deleting with Core keeps rollups untouched: archived
+    days still count in every summary.
+    """
+    with lease(LEASE) as token:
+        if token is None:
+            return None
+        return _archive(before, batch_size, token)
+
+def _archive(before, batch_size, token):
+    table = Attendance.__table__
+    moved = 0
+    years = set()
+
+    while True:
+        rows = db.session.execute(
+            db.select(*[table.c[c] for c in COLUMNS])
+            .where(table.c.date < before)
+            .order_by(table.c.date, table.c.employee_id)
+            .limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+
+        by_year = defaultdict(list)
+        for row in rows:
+            by_year[row['date'].year].append(dict(row))
+        for year, year_rows in by_year.items():
+            _write_segment(year, year_rows)
+            years.add(year)
+
+        deleted = db.session.execute(table.delete().where(table.c.id.in_([r['id'] for r in rows]))).rowcount
+        if deleted:
+            apply_counter_deltas(db.session, {'attendance_records': -deleted})
+        if not renew_lease(db.session.connection(), LEASE, token):
+            db.session.rollback()
+            break
+        db.session.commit()
+        moved += deleted
+
+    _recount(sorted(years))
+    return moved
+
+def archive_horizon():
+    """Last archived date, or None when nothing has been archived"""
+    return db.session.execute(db.select(db.func.max(ArchiveSegment.last_date))).scalar()
+
+def cold_segments(start, end):
+    """Segments holding rows between `start` and `end` (either may be None)"""
+    query = ArchiveSegment.query
+    if start:
+        query = query.filter(ArchiveSegment.last_date >= start)
+    if end:
+        query = query.filter(ArchiveSegment.first_date <= end)
+    return query.order_by(ArchiveSegment.year).all()
+
+def archived_rows(segments, employee_ids, start=None, end=None):
+    """Archived attendance rows for `employee_ids` from the given segments, oldest first"""
+    rows = []
+    for segment in segments:
+        if not os.path.exists(segment.path):
+            continue
+        statement = db.select(archived_attendance)\
+            .where(archived_attendance.c.employee_id.in_(employee_ids))
+        if start:
+            statement = statement.where(archived_attendance.c.date >= start)
+        if end:
+            statement = statement.where(archived_attendance.c.date <= end)
+        with _engine(segment.path).connect() as connection:
+            rows.extend(connection.execute(statement.order_by(archived_attendance.c.date)).all())
+    return rows
+
+def archived_dict(row, employee_name=None):
+    """An archived row in the shape of Attendance.to_dict()"""
+    return {
+        'id': row.id,
+        'employee_id': row.employee_id,
+        'employee_name': employee_name,
+        'date': row.date.isoformat(),
+        'check_in': row.check_in.strftime('%H:%M:%S') if row.check_in else None,
+        'check_out': row.check_out.strftime('%H:%M:%S') if row.check_out else None,
+        'status': row.status,
+        'work_hours': float(row.work_hours) if row.work_hours else None,
+        'notes': row.notes,
+        'archived': True
+    }
+
+def segments_version(segments):
+    """Values identifying the cold data behind a response, for its ETag"""
+    return tuple((s.year, s.row_count, s.archived_at) for s in segments)
@@ -0,0 +1,98 @@
+from flask import current_app
+from models import db, User, Employee, Attendance
+from utils.cache import TTLCache
+
+# summary key for each attendance status; employees without a row count as absent
+SUMMARY_KEYS = {
+    'Present': 'present',
+    'Absent': 'absent',
+    'Half-day': 'half_day',
+    'Leave': 'on_leave',
+    'Holiday': 'holiday',
+    'Weekend': 'weekend'
+}
+
+def _status():
+    return db.func.coalesce(Attendance.status, 'Absent')
+
+def _board(statement, day, department=None):
+    """Active employees on the payroll by `day`, LEFT JOINed to their attendance for it"""
+    statement = statement.select_from(Employee)\
+        .join(User, User.id == Employee.user_id)\
+        .outerjoin(Attendance, db.and_(Attendance.employee_id == Employee.id, Attendance.date == day))\
+        .where(User.is_active == db.true(), Employee.date_of_joining <= day)
+    if department:
+        statement = statement.where(Employee.department == department)
+    return statement
+
+_cache = None
+
+def _summary_cache():
+    global _cache
+    if _cache is None:
+        _cache = TTLCache(maxsize=256, ttl=current_app.config.get('ATTENDANCE_BOARD_CACHE_TTL', 5))
+    return _cache
+
+def board_summary(day, department=None):
+    """Per-status headcounts and the newest attendance update, from one GROUP BY
+
+    Returns (summary, version): `version` changes whenever an attendance row
+    on the board changes or an employee joins/leaves it, for building an ETag.
+    Results are cached for ATTENDANCE_BOARD_CACHE_TTL seconds so polling
+    dashboards share one aggregate per (day, department).
+    """
+    cache = _summary_cache()
+    cached = cache.get((day, department))
+    if cached is not None:
+        return cached
+
+    status = _status().label('status')
+    rows = db.session.execute(_board(db.select(
+        status,
+        db.func.count(),
+        db.func.max(Attendance.updated_at)
+    ), day, department).group_by(status).order_by(status)).all()
+
+    summary = dict.fromkeys(['total', *SUMMARY_KEYS.values()], 0)
+    for row in rows:
+        summary[SUMMARY_KEYS.get(row.status, row.status)] = row[1]
+        summary['total'] += row[1]
+
+    result = (summary, tuple(tuple(row) for row in rows))
+    cache.set((day, department), result)
+    return result
+
+def board_rows(day, department=None, status=None, page=1, per_page=100):
+    """One page of the board ordered by employee, as Attendance.to_dict()-shaped dicts"""
+    statement = _board(db.select(
+        Employee.id.label('employee_id'),
+        Employee.employee_code,
+        Employee.first_name,
+        Employee.last_name,
+        Employee.department,
+        Attendance.id,
+        Attendance.check_in,
+        Attendance.check_out,
+        _status().label('status'),
+        Attendance.work_hours,
+        Attendance.notes
+    ), day, department)
+    if status:
+        statement = statement.where(_status() == status)
+
+    rows = db.session.execute(
+        statement.order_by(Employee.id).limit(per_page).offset((page - 1) * per_page)
+    ).all()
+    return [{
+        'id': row.id,
+        'employee_id': row.employee_id,
+        'employee_code': row.employee_code,
+        'employee_name': f"{row.first_name} {row.last_name}",
+        'department': row.department,
+        'date': day.isoformat(),
+        'check_in': row.check_in.strftime('%H:%M:%S') if row.check_in else None,
+        'check_out': row.check_out.strftime('%H:%M:%S') if row.check_out else None,
+        'status': row.status,
+        'work_hours': float(row.work_hours) if row.work_hours else None,
+        'notes': row.notes
+    } for row in rows]
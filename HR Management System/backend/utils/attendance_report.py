@@ -0,0 +1,192 @@
+import calendar
+import csv
+import io
+from datetime import date
+import numpy as np
+from models import db, Employee, Attendance
+from utils.archive import cold_segments, archived_rows
+
+# Matrix cell codes; index 0 means "no attendance row for that day"
+STATUSES = ['Present', 'Absent', 'Half-day', 'Leave', 'Holiday', 'Weekend']
+CODES = ['-', 'P', 'A', 'H', 'L', 'HO', 'W']
+TOTAL_KEYS = ['unmarked', 'present', 'absent', 'half_day', 'leave', 'holiday', 'weekend']
+_STATUS_INDEX = {status: i + 1 for i, status in enumerate(STATUSES)}
+
+
+def month_bounds(year, month):
+    days = calendar.monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, days), days
+
+def _seconds(t):
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+class MatrixChunk:
+    """Employee x day arrays for a block of employees, filled from one attendance query"""
+
+    def __init__(self, employees, days, late_after):
+        self.employees = employees
+        self.index = {row.id: i for i, row in enumerate(employees)}
+        self.status = np.zeros((len(employees), days), dtype=np.int8)
+        self.hours = np.zeros((len(employees), days), dtype=np.float32)
+        self.late = np.zeros((len(employees), days), dtype=bool)
+        self.late_after = _seconds(late_after)
+
+    def fill(self, rows):
+        """Scatter (employee_id, date, status, work_hours, check_in) rows into the arrays"""
+        if not rows:
+            return
+        r = np.fromiter((self.index[row.employee_id] for row in rows), dtype=np.int64, count=len(rows))
+        d = np.fromiter((row.date.day - 1 for row in rows), dtype=np.int64, count=len(rows))
+        self.status[r, d] = np.fromiter((_STATUS_INDEX.get(row.status, 0) for row in rows),
+                                        dtype=np.int8, count=len(rows))
+        self.hours[r, d] = np.fromiter((float(row.work_hours or 0) for row in rows),
+                                       dtype=np.float32, count=len(rows))
+        check_in = np.fromiter((_seconds(row.check_in) if row.check_in else -1 for row in rows),
+                               dtype=np.int64, count=len(rows))
+        self.late[r, d] = check_in > self.late_after
+
+    def totals(self):
+        """Per-employee [status counts..., late days, work hours] as an (employees, 9) array"""
+        counts = (self.status[:, :, None] == np.arange(len(CODES), dtype=np.int8)).sum(axis=1)
+        return np.column_stack([counts, self.late.sum(axis=1), self.hours.sum(axis=1)])
+
+    def department_totals(self, totals):
+        """{department: summed totals} for the employees in this chunk"""
+        departments = np.array([row.department or '' for row in self.employees], dtype=object)
+        names, inverse = np.unique(departments, return_inverse=True)
+        sums = np.zeros((len(names), totals.shape[1]))
+        np.add.at(sums, inverse, totals)
+        return dict(zip(names, sums))
+
+
+def _employee_query(last_day, department):
+    statement = db.select(
+        Employee.id, Employee.employee_code, Employee.first_name, Employee.last_name, Employee.department
+    ).where(Employee.date_of_joining <= last_day)
+    if department:
+        statement = statement.where(Employee.department == department)
+    return statement.order_by(Employee.id)
+
+def _attendance_rows(employee_ids, first_day, last_day, segments=()):
+    rows = db.session.execute(
+        db.select(Attendance.employee_id, Attendance.date, Attendance.status,
+                  Attendance.work_hours, Attendance.check_in)
+        .where(Attendance.employee_id.in_(employee_ids),
+               Attendance.date >= first_day, Attendance.date <= last_day)
+    ).all()
+    if not segments:
+        return rows
+    # archived months: hot rows win over archived ones for the same day
+    merged = {(row.employee_id, row.date): row
+              for row in archived_rows(segments, employee_ids, first_day, last_day)}
+    merged.update(((row.employee_id, row.date), row) for row in rows)
+    return list(merged.values())
+
+def iter_chunks(year, month, late_after, department=None, chunk_size=1000, offset=0, limit=None):
+    """MatrixChunks covering the month's employees in id order, chunk_size at a time
+
+    Employees are paged by id and each chunk's attendance is fetched with one
+    indexed query, so memory is bounded by chunk_size whatever the headcount.
+    """
+    first_day, last_day, days = month_bounds(year, month)
+    statement = _employee_query(last_day, department)
+    segments = cold_segments(first_day, last_day)
+    remaining = limit
+    last_id = None
+
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        page = statement.limit(size)
+        if last_id is None:
+            page = page.offset(offset)
+        else:
+            page = page.where(Employee.id > last_id)
+        employees = db.session.execute(page).all()
+        if not employees:
+            return
+
+        chunk = MatrixChunk(employees, days, late_after)
+        chunk.fill(_attendance_rows([row.id for row in employees], first_day, last_day, segments))
+        yield chunk
+
+        last_id = employees[-1].id
+        if remaining is not None:
+            remaining -= len(employees)
+        if len(employees) < size:
+            return
+
+def _totals_dict(values):
+    result = {key: int(values[i]) for i, key in enumerate(TOTAL_KEYS)}
+    result['late'] = int(values[len(TOTAL_KEYS)])
+    result['work_hours'] = round(float(values[len(TOTAL_KEYS) + 1]), 2)
+    return result
+
+def _department_dict(sums, days):
+    # every employee contributes exactly one status count per day of the month
+    values = _totals_dict(sums)
+    return {'employees': sum(values[key] for key in TOTAL_KEYS) // days, **values}
+
+def matrix_rows(chunk):
+    """JSON rows (one per employee) for a chunk"""
+    totals = chunk.totals()
+    codes = np.array(CODES)[chunk.status]
+    return [{
+        'employee_id': row.id,
+        'employee_code': row.employee_code,
+        'employee_name': f"{row.first_name} {row.last_name}",
+        'department': row.department,
+        'days': codes[i].tolist(),
+        'work_hours': np.round(chunk.hours[i], 2).tolist(),
+        'late_days': (np.flatnonzero(chunk.late[i]) + 1).tolist(),
+        'totals': _totals_dict(totals[i])
+    } for i, row in enumerate(chunk.employees)]
+
+def department_totals(chunks):
+    """{department: totals} accumulated over `chunks`"""
+    running = {}
+    days = None
+    for chunk in chunks:
+        days = chunk.status.shape[1]
+        for name, sums in chunk.department_totals(chunk.totals()).items():
+            running[name] = running.get(name, 0) + sums
+    return {name or None: _department_dict(sums, days) for name, sums in sorted(running.items())}
+
+def iter_csv(year, month, late_after, department=None, chunk_size=1000):
+    """Yield the month's matrix as CSV text, one chunk of employees at a time
+
+    Employee rows come first, then a blank line and one total row per department.
+    """
+    days = month_bounds(year, month)[2]
+    totals_header = TOTAL_KEYS + ['late', 'work_hours']
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writerow(['employee_code', 'employee_name', 'department',
+                     *[str(day) for day in range(1, days + 1)], *totals_header])
+    yield flush()
+
+    running = {}
+    for chunk in iter_chunks(year, month, late_after, department, chunk_size):
+        totals = chunk.totals()
+        codes = np.array(CODES)[chunk.status]
+        for i, row in enumerate(chunk.employees):
+            values = _totals_dict(totals[i])
+            writer.writerow([row.employee_code, f"{row.first_name} {row.last_name}", row.department or '',
+                             *codes[i].tolist(), *[values[key] for key in totals_header]])
+        for name, sums in chunk.department_totals(totals).items():
+            running[name] = running.get(name, 0) + sums
+        yield flush()
+
+    writer.writerow([])
+    writer.writerow(['department', 'employees', *totals_header])
+    for name, sums in sorted(running.items()):
+        values = _department_dict(sums, days)
+        writer.writerow([name, values['employees'], *[values[key] for key in totals_header]])
+    yield flush()
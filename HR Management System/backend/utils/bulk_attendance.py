@@ -0,0 +1,178 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+import numpy as np
+from models import db, Employee, Attendance
+from utils.counters import apply_counter_deltas, checkins_key
+from utils.rollups import apply_rollups
+
+STATUSES = ('Present', 'Absent', 'Half-day', 'Leave', 'Holiday', 'Weekend')
+LOOKUP_BATCH = 500
+
+
+class RowError(ValueError):
+    """A single bulk attendance row that cannot be applied"""
+
+
+def _parse_time(data, field):
+    value = data.get(field)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%H:%M').time()
+    except (TypeError, ValueError):
+        raise RowError(f'{field} must be HH:MM')
+
+def validate_row(data):
+    """Normalize one input row into Attendance column values"""
+    if not isinstance(data, dict):
+        raise RowError('Expected a JSON object')
+    for field in ('employee_id', 'date', 'status'):
+        if not data.get(field):
+            raise RowError(f'{field} is required')
+    try:
+        employee_id = int(data['employee_id'])
+        day = datetime.strptime(data['date'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise RowError('employee_id must be an integer and date YYYY-MM-DD')
+    if data['status'] not in STATUSES:
+        raise RowError(f'status must be one of {", ".join(STATUSES)}')
+
+    return {
+        'employee_id': employee_id,
+        'date': day,
+        'status': data['status'],
+        'notes': data.get('notes'),
+        'check_in': _parse_time(data, 'check_in'),
+        'check_out': _parse_time(data, 'check_out')
+    }
+
+def _seconds(t):
+    return t.hour * 3600 + t.minute * 60 + t.second if t else -1
+
+def work_hours(check_ins, check_outs):
+    """round(check_out - check_in, 2) in hours for aligned lists of times (NaN where either is missing)"""
+    start = np.array([_seconds(t) for t in check_ins], dtype=np.int64)
+    end = np.array([_seconds(t) for t in check_outs], dtype=np.int64)
+    hours = np.round((end - start) / 3600, 2)
+    return np.where((start >= 0) & (end >= 0), hours, np.nan)
+
+
+class BulkAttendance:
+    """Validate and apply many manual attendance entries in one transaction
+
+    Rows follow /api/attendance/manual semantics: status and notes are
+    replaced, check_in/check_out only when given, and work_hours is
+    recomputed whenever check_out is given. Existing rows are looked up in
+    batches, hours are computed for all rows at once, and writes go out as
+    one executemany INSERT plus one executemany UPDATE per column shape.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.results = [None] * len(rows)
+
+    def _fail(self, index, message):
+        self.results[index] = {'error': message}
+
+    def _validate(self):
+        valid = {}
+        seen = {}
+        for index, data in enumerate(self.rows):
+            try:
+                row = validate_row(data)
+            except RowError as e:
+                self._fail(index, str(e))
+                continue
+            key = (row['employee_id'], row['date'])
+            if key in seen:
+                self._fail(index, f'Duplicate of row {seen[key]}')
+                continue
+            seen[key] = index
+            valid[index] = row
+
+        employee_ids = {row['employee_id'] for row in valid.values()}
+        known = set()
+        for ids in _batches(sorted(employee_ids)):
+            known.update(e for (e,) in db.session.execute(db.select(Employee.id).where(Employee.id.in_(ids))))
+        for index, row in list(valid.items()):
+            if row['employee_id'] not in known:
+                self._fail(index, 'Employee not found')
+                del valid[index]
+        return valid
+
+    def _existing(self, keys):
+        """{(employee_id, date): (id, check_in)} for the keys that already have a row"""
+        existing = {}
+        for batch in _batches(sorted(keys)):
+            existing.update(
+                ((row.employee_id, row.date), (row.id, row.check_in))
+                for row in db.session.execute(
+                    db.select(Attendance.id, Attendance.employee_id, Attendance.date, Attendance.check_in)
+                    .where(db.tuple_(Attendance.employee_id, Attendance.date).in_(batch))
+                )
+            )
+        return existing
+
+    def run(self):
+        """Apply every valid row; returns the summary (the caller commits)"""
+        valid = self._validate()
+        existing = self._existing([(r['employee_id'], r['date']) for r in valid.values()])
+
+        indexes = list(valid)
+        rows = [valid[i] for i in indexes]
+        previous = [existing.get((r['employee_id'], r['date'])) for r in rows]
+        check_ins = [r['check_in'] or (p[1] if p else None) for r, p in zip(rows, previous)]
+        hours = work_hours(check_ins, [r['check_out'] for r in rows])
+
+        inserts, updates = [], defaultdict(list)
+        counters = Counter()
+        keys = []
+        for index, row, before, check_in, worked in zip(indexes, rows, previous, check_ins, hours):
+            if worked < 0:
+                self._fail(index, 'check_out is before check_in')
+                continue
+            values = {'status': row['status'], 'notes': row['notes']}
+            if row['check_in']:
+                values['check_in'] = row['check_in']
+            if row['check_out']:
+                values['check_out'] = row['check_out']
+                if not np.isnan(worked):
+                    values['work_hours'] = float(worked)
+
+            if before:
+                updates[tuple(sorted(values))].append({'_' + c: v for c, v in dict(values, id=before[0]).items()})
+                self.results[index] = 'updated'
+            else:
+                inserts.append(dict(values, employee_id=row['employee_id'], date=row['date']))
+                counters['attendance_records'] += 1
+                self.results[index] = 'created'
+            counters[checkins_key(row['date'])] += bool(check_in) - bool(before and before[1])
+            keys.append((row['employee_id'], row['date']))
+
+        table = Attendance.__table__
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+        for columns, params in updates.items():
+            db.session.execute(
+                table.update().where(table.c.id == db.bindparam('_id'))
+                .values({c: db.bindparam('_' + c) for c in columns}),
+                params
+            )
+
+        # Core statements bypass the mapper events that maintain counters and rollups
+        apply_counter_deltas(db.session, {name: n for name, n in counters.items() if n})
+        apply_rollups(db.session, keys)
+        return self.summary()
+
+    def summary(self):
+        counts = Counter(r if isinstance(r, str) else 'failed' for r in self.results)
+        return {
+            'created': counts['created'],
+            'updated': counts['updated'],
+            'failed': counts['failed'],
+            'results': self.results
+        }
+
+def _batches(items):
+    for start in range(0, len(items), LOOKUP_BATCH):
+        yield items[start:start + LOOKUP_BATCH]
@@ -0,0 +1,105 @@
+from collections import Counter
+from datetime import datetime
+from models import db, LeaveRequest
+from utils.helpers import create_notifications
+from utils.leave_days import mark_leave_ranges
+
+DECISIONS = ('Approved', 'Rejected')
+LOOKUP_BATCH = 500
+
+
+class BulkLeaveReview:
+    """Validate and apply many leave decisions in one transaction
+
+    Items follow PUT /api/leaves/<id>/review semantics. Requests are loaded
+    with batched IN queries; status changes flush as one executemany
+    UPDATE (the counter and balance-ledger events still fire), approved
+    ranges become one attendance upsert and notifications one executemany
+    INSERT.
+    """
+
+    def __init__(self, items, reviewer_id):
+        self.items = items
+        self.reviewer_id = reviewer_id
+        self.results = [None] * len(items)
+
+    def _fail(self, index, leave_id, message):
+        self.results[index] = {'id': leave_id, 'error': message}
+
+    def _validate(self):
+        """{index: (leave_id, status, comment)} for well-formed, non-duplicate items"""
+        valid = {}
+        seen = {}
+        for index, item in enumerate(self.items):
+            if not isinstance(item, dict):
+                self._fail(index, None, 'Expected a JSON object')
+                continue
+            leave_id = item.get('id')
+            if not isinstance(leave_id, int) or isinstance(leave_id, bool):
+                self._fail(index, leave_id, 'id must be an integer')
+                continue
+            if item.get('status') not in DECISIONS:
+                self._fail(index, leave_id, 'status must be Approved or Rejected')
+                continue
+            if leave_id in seen:
+                self._fail(index, leave_id, f'Duplicate of item {seen[leave_id]}')
+                continue
+            seen[leave_id] = index
+            valid[index] = (leave_id, item['status'], item.get('comment'))
+        return valid
+
+    def _load(self, ids):
+        leaves = {}
+        for start in range(0, len(ids), LOOKUP_BATCH):
+            batch = ids[start:start + LOOKUP_BATCH]
+            leaves.update((leave.id, leave) for leave in LeaveRequest.query.filter(LeaveRequest.id.in_(batch)))
+        return leaves
+
+    def run(self):
+        """Apply every valid decision; returns the summary (the caller commits)"""
+        valid = self._validate()
+        leaves = self._load(sorted(leave_id for leave_id, _, _ in valid.values()))
+        now = datetime.utcnow()
+
+        reviewed = []
+        for index, (leave_id, status, comment) in valid.items():
+            leave = leaves.get(leave_id)
+            if leave is None:
+                self._fail(index, leave_id, 'Leave request not found')
+                continue
+            if leave.status != 'Pending':
+                self._fail(index, leave_id, 'Can only review pending requests')
+                continue
+            leave.status = status
+            leave.review_comment = comment
+            leave.reviewed_by = self.reviewer_id
+            leave.reviewed_at = now
+            reviewed.append(leave)
+            self.results[index] = {'id': leave_id, 'status': status}
+
+        mark_leave_ranges([
+            (leave.employee_id, leave.start_date, leave.end_date)
+            for leave in reviewed if leave.status == 'Approved'
+        ])
+        create_notifications([
+            {
+                'employee_id': leave.employee_id,
+                'title': f'Leave {leave.status}',
+                'message': f'Your {leave.leave_type} leave from {leave.start_date} to {leave.end_date} has been {leave.status.lower()}.',
+                'notification_type': 'Leave',
+                'reference_id': leave.id,
+                'reference_type': 'leave_requests'
+            }
+            for leave in reviewed
+        ])
+        db.session.flush()
+        return self.summary()
+
+    def summary(self):
+        counts = Counter(r.get('status', 'failed') for r in self.results)
+        return {
+            'approved': counts['Approved'],
+            'rejected': counts['Rejected'],
+            'failed': counts['failed'],
+            'results': self.results
+        }
@@ -0,0 +1,118 @@
+from datetime import datetime, date, timedelta
+from flask import current_app
+from models import db, User, Employee, Attendance, Holiday
+from utils.counters import apply_counter_deltas
+from utils.leases import lease
+from utils.punches import HALF_DAY_HOURS, work_hours_sql
+from utils.rollups import apply_rollups, add_day_rollups
+
+AUTO_FILL_NOTE = 'Auto-filled'
+AUTO_CLOSE_NOTE = 'Auto-closed: no check-out'
+LEASE = 'close-attendance-days'
+
+def day_status(day):
+    """Status for an employee with no attendance row on `day`"""
+    holiday = db.session.execute(db.select(Holiday.id).where(Holiday.date == day)).first()
+    if holiday:
+        return 'Holiday'
+    if day.weekday() in current_app.config['WEEKEND_DAYS']:
+        return 'Weekend'
+    return 'Absent'
+
+def _close_open_check_ins(day, at):
+    """Check out everyone still checked in on `day` at `at` (or their check-in, if later)"""
+    table = Attendance.__table__
+    connection = db.session.connection()
+    open_rows = (table.c.date == day, table.c.check_in.isnot(None), table.c.check_out.is_(None))
+    employee_ids = connection.execute(db.select(table.c.employee_id).where(*open_rows)).scalars().all()
+    if not employee_ids:
+        return 0
+
+    check_out = db.case((table.c.check_in > db.literal(at, db.Time), table.c.check_in), else_=db.literal(at, db.Time))
+    hours = work_hours_sql(connection.dialect.name, table.c.check_in, check_out)
+    if hours is None:
+        for attendance in Attendance.query.filter(*open_rows):
+            attendance.check_out = max(attendance.check_in, at)
+            attendance.calculate_work_hours()
+            if attendance.work_hours and attendance.work_hours < HALF_DAY_HOURS:
+                attendance.status = 'Half-day'
+            attendance.notes = attendance.notes or AUTO_CLOSE_NOTE
+        db.session.flush()
+        return len(employee_ids)
+
+    result = connection.execute(table.update().where(*open_rows).values(
+        check_out=check_out,
+        work_hours=hours,
+        status=db.case((db.and_(hours > 0, hours < HALF_DAY_HOURS), 'Half-day'), else_=table.c.status),
+        notes=db.func.coalesce(table.c.notes, AUTO_CLOSE_NOTE)
+    ))
+    apply_rollups(db.session, [(employee_id, day) for employee_id in employee_ids])
+    return result.rowcount
+
+def _fill_missing(day, status):
+    """INSERT ... SELECT a `status` row for every active employee without one on `day`
+
+    Rows that appear between the SELECT and the INSERT (a check-in racing
+    the close) are skipped, not an error; returns the rows inserted.
+    """
+    table = Attendance.__table__
+    now = datetime.utcnow()
+    missing = db.select(
+        Employee.id,
+        db.literal(day, db.Date),
+        db.literal(status),
+        db.literal(AUTO_FILL_NOTE),
+        db.literal(now, db.DateTime),
+        db.literal(now, db.DateTime)
+    ).join(User, User.id == Employee.user_id).where(
+        User.is_active == db.true(),
+        Employee.date_of_joining <= day,
+        ~db.exists().where(table.c.employee_id == Employee.id, table.c.date == day)
+    )
+    statement = table.insert().from_select(
+        ['employee_id', 'date', 'status', 'notes', 'created_at', 'updated_at'], missing
+    )
+    dialect = db.session.connection().dialect.name
+    if dialect == 'sqlite':
+        statement = statement.prefix_with('OR IGNORE')
+    elif dialect == 'mysql':
+        statement = statement.prefix_with('IGNORE')
+    return db.session.execute(statement).rowcount
+
+def close_day(day):
+    """Close one past day: check out open check-ins, then fill in everyone with no row
+
+    Returns {'date', 'status', 'closed', 'filled'}, or None if another
+    process is closing days (only the holder of the close lease runs).
+    Safe to re-run: a closed day has no open check-ins or missing rows
+    left, so nothing is written.
+    """
+    with lease(LEASE) as token:
+        if token is None:
+            return None
+        return _close_day(day)
+
+def _close_day(day):
+    at = datetime.strptime(current_app.config['ATTENDANCE_AUTO_CHECKOUT'], '%H:%M').time()
+    closed = _close_open_check_ins(day, at)
+
+    status = day_status(day)
+    filled = _fill_missing(day, status)
+    if filled:
+        # Core statements bypass the mapper events that maintain counters and rollups
+        apply_counter_deltas(db.session, {'attendance_records': filled})
+        add_day_rollups(db.session.connection(), day)
+
+    db.session.commit()
+    return {'date': day.isoformat(), 'status': status, 'closed': closed, 'filled': filled}
+
+def close_recent_days(lookback_days, today=None):
+    """Close each of the `lookback_days` days before today, oldest first
+
+    Returns the close_day() results, or None if another process holds the lease.
+    """
+    today = today or date.today()
+    with lease(LEASE) as token:
+        if token is None:
+            return None
+        return [_close_day(today - timedelta(days=n)) for n in range(lookback_days, 0, -1)]
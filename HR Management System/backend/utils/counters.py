@@ -0,0 +1,181 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session, attributes, object_session
+from models import db, User, Employee, Attendance, LeaveRequest, Payroll, StatCounter
+from utils.upsert import increment_or_seed, insert_ignore, upsert
+
+_DELTAS_KEY = 'counter_deltas'
+
+def checkins_key(day):
+    return f'checkins:{day.isoformat()}'
+
+# (model, attributes that can move a row between counters, counter name for a row or None)
+TRACKED = [
+    (User, (), lambda u: 'users'),
+    (User, ('is_active',), lambda u: 'active_users' if u.is_active else None),
+    (Employee, (), lambda e: 'employees'),
+    (Attendance, (), lambda a: 'attendance_records'),
+    (Attendance, ('date', 'check_in'), lambda a: checkins_key(a.date) if a.check_in and a.date else None),
+    (LeaveRequest, ('status',), lambda l: 'pending_leaves' if l.status == 'Pending' else None),
+    (Payroll, ('payment_status',), lambda p: 'unprocessed_payrolls' if p.payment_status == 'Pending' else None),
+]
+
+def adjust_counters(connection, deltas):
+    """Apply {name: delta} to the counters table in the caller's transaction
+
+    A counter without a row yet is counted from its table instead, so an
+    upgraded database never starts from a bare delta.
+    """
+    table = StatCounter.__table__
+    now = datetime.utcnow()
+    # fixed name order keeps concurrent transactions from deadlocking on the rows
+    for name in sorted(deltas):
+        if deltas[name]:
+            increment_or_seed(connection, table, {'name': name}, {'value': deltas[name]},
+                              lambda c, n=name: {'value': _actual_count(c, n)}, {'updated_at': now})
+
+def apply_counter_deltas(session, deltas):
+    """Adjust counters for writes made outside the ORM (e.g. Core bulk inserts)"""
+    adjust_counters(session.connection(), deltas)
+
+def read_counters(names):
+    """Current values for `names` with one primary-key lookup
+
+    Counters without a row yet are counted from their tables and stored.
+    """
+    rows = dict(db.session.query(StatCounter.name, StatCounter.value).filter(StatCounter.name.in_(names)))
+    missing = [name for name in names if name not in rows]
+    if missing:
+        rows.update(_seed_counters(missing))
+    return {name: rows[name] for name in names}
+
+# counter name -> (model, filters) counted for it; check-in counters are per day
+COUNTS = {
+    'users': (User, ()),
+    'active_users': (User, (User.is_active == db.true(),)),
+    'employees': (Employee, ()),
+    'attendance_records': (Attendance, ()),
+    'pending_leaves': (LeaveRequest, (LeaveRequest.status == 'Pending',)),
+    'unprocessed_payrolls': (Payroll, (Payroll.payment_status == 'Pending',)),
+}
+
+def _actual_count(connection, name):
+    if name.startswith('checkins:'):
+        day = date.fromisoformat(name.split(':', 1)[1])
+        model, where = Attendance, (Attendance.date == day, Attendance.check_in.isnot(None))
+    else:
+        model, where = COUNTS[name]
+    return connection.execute(db.select(db.func.count()).select_from(model).where(*where)).scalar()
+
+def _seed_counters(names):
+    """Count and store counters that have no row yet; returns {name: value}"""
+    table = StatCounter.__table__
+    values = {}
+    with db.engine.begin() as connection:
+        for name in sorted(names):
+            value = _actual_count(connection, name)
+            if not insert_ignore(connection, table, {'name': name, 'value': value,
+                                                     'updated_at': datetime.utcnow()}, ['name']):
+                # created concurrently; theirs is current
+                value = connection.execute(db.select(table.c.value).where(table.c.name == name)).scalar()
+            values[name] = value
+    return values
+
+def _actual_counts(connection, since):
+    values = {name: _actual_count(connection, name) for name in COUNTS}
+    checkins = connection.execute(
+        db.select(Attendance.date, db.func.count())
+        .where(Attendance.check_in.isnot(None), Attendance.date >= since)
+        .group_by(Attendance.date)
+    )
+    for day, n in checkins:
+        values[checkins_key(day)] = n
+    return values
+
+def reconcile_counters(checkin_days=7):
+    """Recount every counter (check-ins for the last `checkin_days` days) and fix drift
+
+    Returns {name: (stored, actual)} for the counters that were corrected.
+    """
+    with db.engine.begin() as connection:
+        return recount_counters(connection, date.today() - timedelta(days=checkin_days))
+
+def recount_counters(connection, since):
+    """reconcile_counters() in the caller's transaction, recounting check-ins from `since`"""
+    table = StatCounter.__table__
+    now = datetime.utcnow()
+    stored = dict(connection.execute(db.select(table.c.name, table.c.value)).all())
+    actual = _actual_counts(connection, since)
+    for name in stored:
+        if name.startswith('checkins:') and name >= checkins_key(since):
+            actual.setdefault(name, 0)
+
+    drift = {}
+    for name, value in actual.items():
+        if stored.get(name) != value:
+            values = {'value': value, 'updated_at': now}
+            upsert(connection, table, {'name': name}, values, values)
+            drift[name] = (stored.get(name), value)
+    return drift
+
+
+# Incremental maintenance: mapper events collect deltas per session and
+# after_flush writes them in the same transaction as the change itself.
+
+class _Previous:
+    """Read-only view of a flushed object with its pre-flush attribute values"""
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, attr):
+        history = attributes.get_history(self._target, attr)
+        return history.deleted[0] if history.deleted else getattr(self._target, attr)
+
+def _tracked(mapper):
+    return [(attrs, counter) for model, attrs, counter in TRACKED if model is mapper.class_]
+
+def _record(target, name, n):
+    session = object_session(target)
+    if name is not None and session is not None:
+        session.info.setdefault(_DELTAS_KEY, Counter())[name] += n
+
+def _inserted(mapper, connection, target):
+    for _, counter in _tracked(mapper):
+        _record(target, counter(target), 1)
+
+def _updated(mapper, connection, target):
+    previous = _Previous(target)
+    for attrs, counter in _tracked(mapper):
+        if not attrs:
+            continue
+        old, new = counter(previous), counter(target)
+        if old != new:
+            _record(target, old, -1)
+            _record(target, new, 1)
+
+def _deleted(mapper, connection, target):
+    previous = _Previous(target)
+    for _, counter in _tracked(mapper):
+        _record(target, counter(previous), -1)
+
+for _model in dict.fromkeys(model for model, _, _ in TRACKED):
+    db.event.listen(_model, 'after_insert', _inserted)
+    db.event.listen(_model, 'after_update', _updated)
+    db.event.listen(_model, 'after_delete', _deleted)
+
+# active_history makes the previous value available even if it was expired
+for _model, _attrs, _ in TRACKED:
+    for _attr in _attrs:
+        db.event.listen(getattr(_model, _attr), 'set', lambda target, value, oldvalue, initiator: value,
+                        active_history=True, retval=True)
+
+@db.event.listens_for(Session, 'after_flush')
+def _apply_flush_deltas(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas:
+        apply_counter_deltas(session, deltas)
+
+@db.event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_DELTAS_KEY, None)
@@ -1,7 +1,7 @@
 from functools import wraps
 from flask import jsonify
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from models import User
+from utils.principal import current_principal
 
 def role_required(*roles):
     def decorator(fn):
@@ -9,15 +9,18 @@ def role_required(*roles):
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
             try:
-                user_id = int(get_jwt_identity())
+                int(get_jwt_identity())
             except Exception:
                 return jsonify({'error': 'Invalid token'}), 401
 
-            user = User.query.get(user_id)
-            if not user:
+            principal = current_principal()
+            if not principal:
                 return jsonify({'error': 'User not found'}), 404
 
-            if user.role not in roles:
+            if not principal.is_active:
+                return jsonify({'error': 'Account is deactivated'}), 403
+
+            if principal.role not in roles:
                 return jsonify({'error': 'Access denied'}), 403
 
             return fn(*args, **kwargs)
@@ -0,0 +1,190 @@
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.orm import Session, attributes, object_session
+from models import db, User, Employee, DepartmentSummary
+from utils.cache import TTLCache
+from utils.upsert import increment_or_seed
+
+TYPE_COLUMNS = {'Full-time': 'full_time', 'Part-time': 'part_time', 'Contract': 'contract'}
+
+_DELTAS_KEY = 'department_deltas'
+_CHANGED_KEY = 'departments_changed'
+
+_seeded = False
+
+def _increments(deltas):
+    """Fold {(department, employment_type, active): n} into per-department column increments"""
+    columns = {}
+    for (department, employment_type, active), n in deltas.items():
+        if not department or not n:
+            continue
+        row = columns.setdefault(department, Counter())
+        row['employee_count'] += n
+        if active:
+            row['headcount'] += n
+            if employment_type in TYPE_COLUMNS:
+                row[TYPE_COLUMNS[employment_type]] += n
+    return columns
+
+def adjust_headcounts(connection, deltas):
+    """Apply headcount deltas to department_summaries in the caller's transaction
+
+    A department without a row yet (new, or from before the table existed)
+    is counted from employees instead.
+    """
+    now = datetime.utcnow()
+    for department, increments in _increments(deltas).items():
+        if any(increments.values()):
+            increment_or_seed(connection, DepartmentSummary.__table__, {'department': department},
+                              increments, lambda c, d=department: _count_department(c, d), {'updated_at': now})
+
+def apply_headcount_deltas(session, deltas):
+    """Adjust the summary for writes made outside the ORM (e.g. Core bulk inserts)"""
+    adjust_headcounts(session.connection(), deltas)
+    session.info[_CHANGED_KEY] = True
+
+SUMMARY_COLUMNS = ['employee_count', 'headcount', *TYPE_COLUMNS.values()]
+
+def _summary_select():
+    """department + SUMMARY_COLUMNS per department, counted from employees"""
+    active = User.is_active == db.true()
+
+    def count_if(condition):
+        return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+
+    return db.select(
+        Employee.department,
+        db.func.count(Employee.id),
+        count_if(active),
+        *[count_if(db.and_(active, Employee.employment_type == t)) for t in TYPE_COLUMNS]
+    ).join(User, User.id == Employee.user_id)\
+     .where(Employee.department.isnot(None), Employee.department != '')
+
+def _count_department(connection, department):
+    row = connection.execute(_summary_select().where(Employee.department == department)).first()
+    return dict(zip(SUMMARY_COLUMNS, row[1:]))
+
+def rebuild_department_summary(connection):
+    """Recompute department_summaries from employees; returns the number of departments"""
+    table = DepartmentSummary.__table__
+    summary = _summary_select().add_columns(db.literal(datetime.utcnow(), db.DateTime))\
+        .group_by(Employee.department)
+
+    connection.execute(table.delete())
+    connection.execute(table.insert().from_select(['department', *SUMMARY_COLUMNS, 'updated_at'], summary))
+    return connection.execute(db.select(db.func.count()).select_from(table)).scalar()
+
+def _ensure_seeded():
+    """Rebuild the summary once per process if any department has no row
+
+    Databases upgraded from before department_summaries existed start with
+    an empty table; this fills it the first time the directory is read.
+    """
+    global _seeded
+    if _seeded:
+        return
+    table = DepartmentSummary.__table__
+    with db.engine.begin() as connection:
+        missing = connection.execute(
+            db.select(Employee.department)
+            .where(Employee.department.isnot(None), Employee.department != '',
+                   ~db.exists().where(table.c.department == Employee.department))
+            .limit(1)
+        ).first()
+        if missing:
+            rebuild_department_summary(connection)
+    _seeded = True
+
+
+_summary_cache = None
+
+def _cache():
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = TTLCache(maxsize=1, ttl=current_app.config.get('DEPARTMENT_CACHE_TTL', 300))
+    return _summary_cache
+
+def department_summary():
+    """Departments with headcounts, served from the in-process cache"""
+    rows = _cache().get('all')
+    if rows is None:
+        _ensure_seeded()
+        rows = [s.to_dict() for s in DepartmentSummary.query
+                .filter(DepartmentSummary.employee_count > 0)
+                .order_by(DepartmentSummary.department)]
+        _cache().set('all', rows)
+    return rows
+
+def invalidate_department_summary():
+    if _summary_cache is not None:
+        _summary_cache.clear()
+
+
+# Incremental maintenance: mapper events collect deltas per session and
+# after_flush writes them in the same transaction as the change itself.
+
+def _record(target, key, n):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_DELTAS_KEY, Counter())[key] += n
+
+def _previous(target, attr):
+    history = attributes.get_history(target, attr)
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+def _is_active(connection, user_id):
+    return bool(connection.execute(db.select(User.is_active).where(User.id == user_id)).scalar())
+
+# active_history makes the previous value available even if it was expired
+for _attr in (Employee.department, Employee.employment_type, User.is_active):
+    db.event.listen(_attr, 'set', lambda target, value, oldvalue, initiator: value,
+                    active_history=True, retval=True)
+
+@db.event.listens_for(Employee, 'after_insert')
+def _employee_inserted(mapper, connection, target):
+    active = _is_active(connection, target.user_id)
+    _record(target, (target.department, target.employment_type, active), 1)
+
+@db.event.listens_for(Employee, 'after_update')
+def _employee_updated(mapper, connection, target):
+    old = (_previous(target, 'department'), _previous(target, 'employment_type'))
+    new = (target.department, target.employment_type)
+    if old != new:
+        active = _is_active(connection, target.user_id)
+        _record(target, (*old, active), -1)
+        _record(target, (*new, active), 1)
+
+@db.event.listens_for(Employee, 'after_delete')
+def _employee_deleted(mapper, connection, target):
+    active = _is_active(connection, target.user_id)
+    old = (_previous(target, 'department'), _previous(target, 'employment_type'))
+    _record(target, (*old, active), -1)
+
+@db.event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    was_active, is_active = bool(_previous(target, 'is_active')), bool(target.is_active)
+    if was_active == is_active:
+        return
+    row = connection.execute(
+        db.select(Employee.department, Employee.employment_type).where(Employee.user_id == target.id)
+    ).first()
+    if row:
+        _record(target, (row.department, row.employment_type, was_active), -1)
+        _record(target, (row.department, row.employment_type, is_active), 1)
+
+@db.event.listens_for(Session, 'after_flush')
+def _apply_flush_deltas(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas:
+        apply_headcount_deltas(session, deltas)
+
+@db.event.listens_for(Session, 'after_commit')
+def _refresh_after_commit(session):
+    if session.info.pop(_CHANGED_KEY, False):
+        invalidate_department_summary()
+
+@db.event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_DELTAS_KEY, None)
+    session.info.pop(_CHANGED_KEY, None)
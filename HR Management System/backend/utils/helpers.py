@@ -1,9 +1,11 @@
 from datetime import datetime, date
+from flask import current_app
 from models import db, Notification
+from utils.sequences import BlockAllocator
 
 def create_notification(employee_id, title, message, notification_type='General', 
-                       reference_id=None, reference_type=None):
-    """Helper to create notifications"""
+                       reference_id=None, reference_type=None, commit=True):
+    """Helper to create notifications; commit=False leaves committing to the caller"""
     notification = Notification(
         employee_id=employee_id,
         title=title,
@@ -13,9 +15,28 @@ def create_notification(employee_id, title, message, notification_type='General'
         reference_type=reference_type
     )
     db.session.add(notification)
-    db.session.commit()
+    if commit:
+        db.session.commit()
     return notification
 
+def create_notifications(notifications):
+    """Insert many notifications (create_notification() keyword dicts) with one executemany
+
+    Writes in the caller's transaction; the caller commits.
+    """
+    if notifications:
+        db.session.execute(Notification.__table__.insert(), [
+            {
+                'employee_id': n['employee_id'],
+                'title': n['title'],
+                'message': n['message'],
+                'type': n.get('notification_type', 'General'),
+                'reference_id': n.get('reference_id'),
+                'reference_type': n.get('reference_type')
+            }
+            for n in notifications
+        ])
+
 def calculate_business_days(start_date, end_date):
     """Calculate number of business days between two dates"""
     if isinstance(start_date, str):
@@ -31,11 +52,34 @@ def calculate_business_days(start_date, end_date):
         current = current + timedelta(days=1)
     return days
 
+def _next_employee_number(connection):
+    """Seed for the employee code sequence: one past the highest existing code"""
+    from models import Employee
+    table = Employee.__table__
+    highest = connection.execute(
+        db.select(db.func.max(db.cast(db.func.substr(table.c.employee_code, 4), db.Integer)))
+    ).scalar()
+    return (highest or 0) + 1
+
+_employee_codes = None
+
+def _employee_code_allocator():
+    global _employee_codes
+    if _employee_codes is None:
+        _employee_codes = BlockAllocator(
+            'employee_code',
+            block_size=current_app.config.get('EMPLOYEE_CODE_BLOCK_SIZE', 20),
+            initial_value=_next_employee_number
+        )
+    return _employee_codes
+
+def format_employee_code(number):
+    return f"EMP{str(number).zfill(5)}"
+
 def generate_employee_code():
     """Generate unique employee code"""
-    from models import Employee
-    last_emp = Employee.query.order_by(Employee.id.desc()).first()
-    if last_emp:
-        last_num = int(last_emp.employee_code.replace('EMP', ''))
-        return f"EMP{str(last_num + 1).zfill(5)}"
-    return "EMP00001"
\ No newline at end of file
+    return format_employee_code(_employee_code_allocator().next())
+
+def allocate_employee_codes(n):
+    """Generate `n` unique employee codes in one reservation"""
+    return [format_employee_code(number) for number in _employee_code_allocator().allocate(n)]
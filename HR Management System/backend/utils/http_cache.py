@@ -0,0 +1,65 @@
+import hashlib
+from collections import namedtuple
+from datetime import datetime, timezone
+from flask import current_app, request
+from models import db
+
+Validator = namedtuple('Validator', ['etag', 'last_modified'])
+
+def make_validator(values):
+    """Weak ETag over the request URL and `values`; Last-Modified from the newest datetime"""
+    digest = hashlib.sha1(repr((request.full_path, values)).encode()).hexdigest()
+    stamps = [v for v in values if isinstance(v, datetime)]
+    last_modified = max(stamps).replace(tzinfo=timezone.utc, microsecond=0) if stamps else None
+    return Validator(digest, last_modified)
+
+def row_validator(statement):
+    """(row, validator) for a SELECT of one row's key and updated_at columns
+
+    Only the selected columns are read, so a matching If-None-Match is
+    answered without loading or serializing the row. A missing row yields
+    (None, validator) so "no row yet" responses can be validated too.
+    """
+    row = db.session.execute(statement).first()
+    return row, make_validator(tuple(row) if row is not None else (None,))
+
+def collection_validator(query, *columns, extra=()):
+    """Validator for a filtered listing from COUNT(*) and MAX() of its updated_at columns
+
+    Changes that only touch related rows (e.g. a renamed employee) are picked
+    up once one of the listed columns changes for a row in the listing.
+    `extra` adds values for data that is not behind `query` (e.g. archives).
+    """
+    row = query.order_by(None).with_entities(
+        db.func.count(), *[db.func.max(c) for c in columns]
+    ).one()
+    return make_validator(tuple(row) + tuple(extra))
+
+def body_validator(body):
+    """Validator from a response body that is built anyway, e.g. a keyset page
+
+    Avoids collection_validator()'s COUNT/MAX over the whole listing; a
+    matching request still gets a 304 instead of the body.
+    """
+    return make_validator((body,))
+
+def not_modified(validator):
+    """A 304 response when the request's conditional headers match, else None"""
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(validator.etag)
+    elif request.if_modified_since and validator.last_modified:
+        matched = validator.last_modified <= request.if_modified_since
+    else:
+        matched = False
+
+    if matched:
+        return with_validators(current_app.response_class(status=304), validator)
+    return None
+
+def with_validators(response, validator):
+    """Attach ETag/Last-Modified; clients must revalidate before reusing the body"""
+    response.set_etag(validator.etag, weak=True)
+    if validator.last_modified:
+        response.last_modified = validator.last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
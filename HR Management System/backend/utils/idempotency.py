@@ -0,0 +1,58 @@
+import json
+from datetime import datetime, timedelta
+from flask import current_app, jsonify, request
+from models import db, IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 64
+
+def request_key():
+    """The request's Idempotency-Key header (None if absent); raises ValueError if malformed"""
+    key = request.headers.get(HEADER, '').strip()
+    if not key:
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValueError(f'{HEADER} must be at most {MAX_KEY_LENGTH} characters')
+    return key
+
+def replay(user_id, key, endpoint):
+    """The stored response for a key this user already used, or None
+
+    Keys older than IDEMPOTENCY_KEY_TTL are forgotten so they can be reused.
+    """
+    record = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+    if record is None:
+        return None
+
+    ttl = timedelta(seconds=current_app.config.get('IDEMPOTENCY_KEY_TTL', 86400))
+    if record.created_at < datetime.utcnow() - ttl:
+        db.session.delete(record)
+        db.session.flush()
+        return None
+
+    if record.endpoint != endpoint:
+        return jsonify({'error': f'{HEADER} was already used for a different request'}), 422
+
+    response = current_app.response_class(
+        record.response_body, status=record.status_code, mimetype='application/json'
+    )
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def remember(user_id, key, endpoint, body, status_code=200):
+    """Store a response under `key`; it commits (or rolls back) with the request's changes"""
+    db.session.add(IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        endpoint=endpoint,
+        status_code=status_code,
+        response_body=json.dumps(body)
+    ))
+
+def purge_expired_keys(ttl_seconds):
+    """Delete idempotency keys older than `ttl_seconds`; returns the number removed"""
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff)\
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
@@ -0,0 +1,200 @@
+import csv
+import json
+from collections import Counter
+from datetime import datetime
+from models import db, User, Employee
+from utils.helpers import allocate_employee_codes
+from utils.departments import apply_headcount_deltas
+from utils.counters import apply_counter_deltas
+from utils.passwords import password_hasher
+
+REQUIRED_FIELDS = ['email', 'password', 'first_name', 'last_name', 'date_of_joining']
+ROLES = ('Employee', 'HR', 'Admin')
+GENDERS = ('Male', 'Female', 'Other')
+EMPLOYMENT_TYPES = ('Full-time', 'Part-time', 'Contract')
+EMPLOYEE_FIELDS = ['phone', 'address', 'department', 'designation', 'emergency_contact']
+
+
+class RowError(ValueError):
+    """A single import row that cannot be imported"""
+
+
+def iter_csv_rows(lines):
+    """(row_number, data, error) for each CSV record after the header"""
+    for number, row in enumerate(csv.DictReader(lines), 1):
+        yield number, row, None
+
+def iter_ndjson_rows(lines):
+    """(row_number, data, error) for each non-empty NDJSON line"""
+    number = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(data, dict):
+            yield number, None, 'Expected a JSON object'
+            continue
+        yield number, data, None
+
+def _parse_date(data, field, required=False):
+    value = data.get(field)
+    if isinstance(value, str):
+        value = value.strip()
+    if not value:
+        if required:
+            raise RowError(f'{field} is required')
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise RowError(f'{field} must be YYYY-MM-DD')
+
+def _choice(data, field, choices, default=None):
+    value = data.get(field) or default
+    if value is not None and value not in choices:
+        raise RowError(f'{field} must be one of {", ".join(choices)}')
+    return value
+
+def validate_row(data):
+    """Normalize one input row into (user, employee) column dicts"""
+    for field in REQUIRED_FIELDS:
+        if not data.get(field):
+            raise RowError(f'{field} is required')
+
+    email = str(data['email']).strip()
+    if '@' not in email or len(email) > 100:
+        raise RowError('email is invalid')
+    if len(str(data['password'])) < 6:
+        raise RowError('Password must be at least 6 characters')
+
+    user = {
+        'email': email,
+        'password': str(data['password']),
+        'role': _choice(data, 'role', ROLES, 'Employee')
+    }
+    employee = {
+        'first_name': str(data['first_name']).strip()[:50],
+        'last_name': str(data['last_name']).strip()[:50],
+        'date_of_joining': _parse_date(data, 'date_of_joining', required=True),
+        'date_of_birth': _parse_date(data, 'date_of_birth'),
+        'gender': _choice(data, 'gender', GENDERS),
+        'employment_type': _choice(data, 'employment_type', EMPLOYMENT_TYPES, 'Full-time')
+    }
+    for field in EMPLOYEE_FIELDS:
+        employee[field] = data.get(field) or None
+    return user, employee
+
+
+class EmployeeImport:
+    """Incremental, batched import of users + employee profiles
+
+    Rows are validated as they stream in and written batch_size at a time:
+    passwords are hashed in parallel on the hashing pool and users and
+    employees go in with executemany INSERTs, one transaction per batch.
+    Invalid rows are reported and skipped; they never abort a batch.
+    """
+
+    def __init__(self, batch_size=500, max_reported_errors=1000):
+        self.batch_size = batch_size
+        self.max_reported_errors = max_reported_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self._seen_emails = set()
+        self._batch = []
+
+    def _error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < self.max_reported_errors:
+            self.errors.append({'row': row_number, 'error': message})
+
+    def add(self, row_number, data, error=None):
+        if error:
+            return self._error(row_number, error)
+        try:
+            user, employee = validate_row(data)
+        except RowError as e:
+            return self._error(row_number, str(e))
+
+        if user['email'] in self._seen_emails:
+            return self._error(row_number, 'Duplicate email in import')
+        self._seen_emails.add(user['email'])
+
+        self._batch.append((row_number, user, employee))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def run(self, rows):
+        for row_number, data, error in rows:
+            self.add(row_number, data, error)
+        self.flush()
+        return self.summary()
+
+    def flush(self):
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        existing = {email for (email,) in db.session.query(User.email).filter(
+            User.email.in_([user['email'] for _, user, _ in batch])
+        )}
+        pending = []
+        for row_number, user, employee in batch:
+            if user['email'] in existing:
+                self._error(row_number, 'Email already registered')
+            else:
+                pending.append((row_number, user, employee))
+        if not pending:
+            return
+
+        # Reserve codes and hash before the batch transaction starts writing
+        codes = allocate_employee_codes(len(pending))
+        hashes = password_hasher.hash_many([user['password'] for _, user, _ in pending])
+
+        try:
+            self._insert(pending, codes, hashes)
+            db.session.commit()
+            self.imported += len(pending)
+        except Exception:
+            db.session.rollback()
+            # Isolate the offending rows instead of failing the whole batch
+            for item, code, password_hash in zip(pending, codes, hashes):
+                try:
+                    self._insert([item], [code], [password_hash])
+                    db.session.commit()
+                    self.imported += 1
+                except Exception as e:
+                    db.session.rollback()
+                    self._error(item[0], str(getattr(e, 'orig', e)))
+
+    def _insert(self, items, codes, hashes):
+        db.session.execute(db.insert(User), [
+            {'email': user['email'], 'password_hash': password_hash, 'role': user['role']}
+            for (_, user, _), password_hash in zip(items, hashes)
+        ])
+        user_ids = dict(db.session.query(User.email, User.id).filter(
+            User.email.in_([user['email'] for _, user, _ in items])
+        ))
+        db.session.execute(db.insert(Employee), [
+            dict(employee, user_id=user_ids[user['email']], employee_code=code)
+            for (_, user, employee), code in zip(items, codes)
+        ])
+        # Core inserts bypass the mapper events that maintain headcounts and counters
+        apply_headcount_deltas(db.session, Counter(
+            (employee['department'], employee['employment_type'], True) for _, _, employee in items
+        ))
+        apply_counter_deltas(db.session, {'users': len(items), 'active_users': len(items), 'employees': len(items)})
+
+    def summary(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors)
+        }
@@ -0,0 +1,50 @@
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, JobLease
+from utils.upsert import insert_ignore
+
+
+def acquire_lease(name, seconds=None):
+    """Take the `name` lease for `seconds`; returns a holder token, or None if it is held
+
+    A lease left behind by a crashed process is taken over once it expires.
+    Runs in its own short transaction, so call it before the session writes.
+    """
+    seconds = seconds or current_app.config['JOB_LEASE_SECONDS']
+    table = JobLease.__table__
+    token = uuid.uuid4().hex
+    now = datetime.utcnow()
+    values = {'holder': token, 'expires_at': now + timedelta(seconds=seconds), 'acquired_at': now}
+    with db.engine.begin() as connection:
+        taken = connection.execute(
+            table.update().where(table.c.name == name, table.c.expires_at < now).values(**values)
+        ).rowcount
+        if taken or insert_ignore(connection, table, dict(values, name=name), ['name']):
+            return token
+    return None
+
+def renew_lease(connection, name, token, seconds=None):
+    """Extend a held lease in the caller's transaction; False if it was lost"""
+    seconds = seconds or current_app.config['JOB_LEASE_SECONDS']
+    table = JobLease.__table__
+    return connection.execute(
+        table.update().where(table.c.name == name, table.c.holder == token)
+        .values(expires_at=datetime.utcnow() + timedelta(seconds=seconds))
+    ).rowcount == 1
+
+def release_lease(name, token):
+    table = JobLease.__table__
+    with db.engine.begin() as connection:
+        connection.execute(table.delete().where(table.c.name == name, table.c.holder == token))
+
+@contextmanager
+def lease(name, seconds=None):
+    """with lease(name) as token: ... - token is None when another process holds it"""
+    token = acquire_lease(name, seconds)
+    try:
+        yield token
+    finally:
+        if token is not None:
+            release_lease(name, token)
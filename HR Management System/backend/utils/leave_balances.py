@@ -0,0 +1,234 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy.orm import Session, object_session
+from models import db, LeaveRequest, LeavePolicy, LeaveBalance
+from utils.cache import TTLCache
+from utils.counters import _Previous
+from utils.upsert import upsert, upsert_many
+
+# Used for leave types that have no row in leave_policies (None = unlimited)
+DEFAULT_QUOTAS = {
+    'Casual': 12,
+    'Sick': 12,
+    'Earned': 15,
+    'Maternity': 180,
+    'Paternity': 15,
+    'Unpaid': None
+}
+KEY_COLUMNS = ('employee_id', 'year', 'leave_type')
+
+_DELTAS_KEY = 'leave_balance_deltas'
+_POLICIES = 'policies'
+
+_cache = None
+_seeded = set()
+
+def _policy_cache():
+    global _cache
+    if _cache is None:
+        _cache = TTLCache(maxsize=1, ttl=current_app.config.get('LEAVE_POLICY_CACHE_TTL', 300))
+    return _cache
+
+def load_policies():
+    """{leave_type: {'annual_quota', 'accrual'}} for every leave type (cached)"""
+    cache = _policy_cache()
+    policies = cache.get(_POLICIES)
+    if policies is not None:
+        return policies
+
+    policies = {t: {'annual_quota': q, 'accrual': 'Yearly'} for t, q in DEFAULT_QUOTAS.items()}
+    for policy in LeavePolicy.query.all():
+        policies[policy.leave_type] = {'annual_quota': policy.annual_quota, 'accrual': policy.accrual}
+    cache.set(_POLICIES, policies)
+    return policies
+
+def invalidate_policies():
+    if _cache is not None:
+        _cache.clear()
+
+def save_policy(leave_type, annual_quota, accrual):
+    """Create or replace the policy for `leave_type` (the caller commits)"""
+    values = {'annual_quota': annual_quota, 'accrual': accrual, 'updated_at': datetime.utcnow()}
+    upsert(db.session.connection(), LeavePolicy.__table__, {'leave_type': leave_type}, values, values)
+    invalidate_policies()
+
+def accrued(policy, year, today=None):
+    """Days of `policy` available in `year` as of `today`; None if unlimited"""
+    quota = policy['annual_quota']
+    if quota is None or policy['accrual'] == 'Yearly':
+        return quota
+    today = today or date.today()
+    if year < today.year:
+        return quota
+    if year > today.year:
+        return 0
+    return quota * today.month // 12
+
+def read_balance(employee_id, year, today=None):
+    """{leave_type: {'total', 'used', 'pending', 'remaining'}} from the ledger"""
+    _ensure_seeded(employee_id, year)
+    rows = {
+        row.leave_type: row for row in db.session.execute(
+            db.select(LeaveBalance.leave_type, LeaveBalance.used, LeaveBalance.pending)
+            .where(LeaveBalance.employee_id == employee_id, LeaveBalance.year == year)
+        )
+    }
+    balance = {}
+    for leave_type, policy in load_policies().items():
+        row = rows.get(leave_type)
+        used, pending = (row.used, row.pending) if row else (0, 0)
+        total = accrued(policy, year, today)
+        balance[leave_type] = {
+            'total': total if total is not None else 'Unlimited',
+            'used': used,
+            'pending': pending,
+            'remaining': (total - used) if total is not None else 'Unlimited'
+        }
+    return balance
+
+
+# Ledger maintenance
+
+def days_by_year(start, end):
+    """{year: days} for the calendar days from `start` to `end`"""
+    days = {}
+    while start <= end:
+        last = min(end, date(start.year, 12, 31))
+        days[start.year] = (last - start).days + 1
+        start = last + timedelta(days=1)
+    return days
+
+def _contribution(leave):
+    """{(employee_id, year, leave_type): Counter(used=, pending=)} that `leave` adds to the ledger"""
+    column = {'Approved': 'used', 'Pending': 'pending'}.get(leave.status)
+    if column is None or not leave.start_date or not leave.end_date:
+        return {}
+    return {
+        (leave.employee_id, year, leave.leave_type): Counter({column: days})
+        for year, days in days_by_year(leave.start_date, leave.end_date).items()
+    }
+
+def apply_balance_deltas(session, deltas):
+    """Add {(employee_id, year, leave_type): {'used', 'pending'}} to the ledger in the caller's transaction"""
+    _add_deltas(session.connection(), deltas)
+
+def _add_deltas(connection, deltas):
+    now = datetime.utcnow()
+    rows = [
+        dict(zip(KEY_COLUMNS, key), used=delta.get('used', 0), pending=delta.get('pending', 0), updated_at=now)
+        # fixed key order keeps concurrent transactions from deadlocking on the rows
+        for key, delta in sorted(deltas.items()) if any(delta.values())
+    ]
+    upsert_many(connection, LeaveBalance.__table__, KEY_COLUMNS, rows, increments=('used', 'pending'))
+
+def _record(target, contribution, sign):
+    session = object_session(target)
+    if session is None:
+        return
+    deltas = session.info.setdefault(_DELTAS_KEY, defaultdict(Counter))
+    for key, values in contribution.items():
+        for column, days in values.items():
+            deltas[key][column] += sign * days
+
+@db.event.listens_for(LeaveRequest, 'after_insert')
+def _leave_inserted(mapper, connection, target):
+    _record(target, _contribution(target), 1)
+
+@db.event.listens_for(LeaveRequest, 'after_update')
+def _leave_updated(mapper, connection, target):
+    _record(target, _contribution(_Previous(target)), -1)
+    _record(target, _contribution(target), 1)
+
+@db.event.listens_for(LeaveRequest, 'after_delete')
+def _leave_deleted(mapper, connection, target):
+    _record(target, _contribution(_Previous(target)), -1)
+
+# active_history makes the previous values available even if they were expired
+for _attr in ('employee_id', 'leave_type', 'start_date', 'end_date', 'status'):
+    db.event.listen(getattr(LeaveRequest, _attr), 'set', lambda target, value, oldvalue, initiator: value,
+                    active_history=True, retval=True)
+
+@db.event.listens_for(Session, 'after_flush')
+def _apply_flush_deltas(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas:
+        apply_balance_deltas(session, deltas)
+
+@db.event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_DELTAS_KEY, None)
+
+def _ensure_seeded(employee_id, year):
+    """Fold leave requests that predate the ledger into the employee's `year` rows
+
+    Checked once per process for each employee and year. The difference
+    between leave_requests and the stored rows is added as a delta, so
+    changes committed concurrently are not overwritten.
+    """
+    if (employee_id, year) in _seeded:
+        return
+    leaves = LeaveRequest.__table__
+    table = LeaveBalance.__table__
+    with db.engine.begin() as connection:
+        actual = defaultdict(Counter)
+        rows = connection.execute(
+            db.select(leaves.c.employee_id, leaves.c.leave_type, leaves.c.start_date,
+                      leaves.c.end_date, leaves.c.status)
+            .where(leaves.c.employee_id == employee_id, leaves.c.status.in_(['Pending', 'Approved']),
+                   leaves.c.start_date <= date(year, 12, 31), leaves.c.end_date >= date(year, 1, 1))
+        )
+        for row in rows:
+            for key, values in _contribution(row).items():
+                if key[1] == year:
+                    actual[key].update(values)
+
+        # actual - stored, per leave type
+        for row in connection.execute(db.select(table).where(table.c.employee_id == employee_id,
+                                                             table.c.year == year)):
+            actual[(row.employee_id, row.year, row.leave_type)].subtract({'used': row.used, 'pending': row.pending})
+        _add_deltas(connection, actual)
+    _seeded.add((employee_id, year))
+
+
+def recompute_leave_balances():
+    """Rebuild the ledger from leave_requests and fix drift
+
+    Returns {(employee_id, year, leave_type): (stored, actual)} for the rows
+    that were corrected, each as a (used, pending) pair.
+    """
+    with db.engine.begin() as connection:
+        return rebuild_leave_balances(connection)
+
+def rebuild_leave_balances(connection):
+    """recompute_leave_balances() in the caller's transaction"""
+    table = LeaveBalance.__table__
+    leaves = LeaveRequest.__table__
+    now = datetime.utcnow()
+
+    actual = defaultdict(Counter)
+    rows = connection.execute(
+        db.select(leaves.c.employee_id, leaves.c.leave_type, leaves.c.start_date,
+                  leaves.c.end_date, leaves.c.status)
+        .where(leaves.c.status.in_(['Pending', 'Approved']))
+        .execution_options(yield_per=5000)
+    )
+    for row in rows:
+        for key, values in _contribution(row).items():
+            actual[key].update(values)
+
+    stored = {
+        (row.employee_id, row.year, row.leave_type): (row.used, row.pending)
+        for row in connection.execute(db.select(table))
+    }
+    drift = {}
+    for key in sorted(set(stored) | set(actual)):
+        value = (actual[key]['used'], actual[key]['pending']) if key in actual else (0, 0)
+        if stored.get(key, (0, 0)) != value:
+            drift[key] = (stored.get(key), value)
+
+    upsert_many(connection, table, KEY_COLUMNS, [
+        dict(zip(KEY_COLUMNS, key), used=value[0], pending=value[1], updated_at=now)
+        for key, (_, value) in drift.items()
+    ])
+    return drift
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+import numpy as np
+from flask import current_app
+from models import db, Employee, LeaveRequest
+from utils.cache import TTLCache
+
+_cache = None
+
+def _ical_cache():
+    global _cache
+    if _cache is None:
+        _cache = TTLCache(maxsize=64, ttl=current_app.config.get('LEAVE_CALENDAR_CACHE_TTL', 300))
+    return _cache
+
+def max_leave_days():
+    """Longest leave on record in days (an index-only MAX over total_days)"""
+    return db.session.execute(db.select(db.func.max(LeaveRequest.total_days))).scalar() or 0
+
+def overlapping(start, end, statuses=('Approved',), department=None):
+    """Query for leave requests overlapping [start, end]
+
+    A plain overlap test (start_date <= end AND end_date >= start) can only
+    seek on one side, so it reads every older leave. Bounding start_date
+    from below by the longest leave on record turns it into one range of
+    ix_leave_requests_status_start_end per status, whose size depends on
+    the window rather than on how much history there is.
+    """
+    earliest = start - timedelta(days=max(max_leave_days() - 1, 0))
+    query = LeaveRequest.query.filter(
+        LeaveRequest.status.in_(statuses),
+        LeaveRequest.start_date >= earliest,
+        LeaveRequest.start_date <= end,
+        LeaveRequest.end_date >= start
+    )
+    if department:
+        query = query.join(Employee, LeaveRequest.employee_id == Employee.id)\
+            .filter(Employee.department == department)
+    return query
+
+def occupancy(leaves, start, end):
+    """Number of people out on each day from `start` to `end`"""
+    length = (end - start).days + 1
+    changes = np.zeros(length + 1, dtype=np.int32)
+    first = np.array([max((l.start_date - start).days, 0) for l in leaves], dtype=np.int64)
+    last = np.array([min((l.end_date - start).days, length - 1) for l in leaves], dtype=np.int64)
+    np.add.at(changes, first, 1)
+    np.add.at(changes, last + 1, -1)
+    return np.cumsum(changes[:-1]).tolist()
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+def _fold(line):
+    """Split content lines longer than 75 characters (RFC 5545 section 3.1)"""
+    return '\r\n '.join(line[i:i + 74] for i in range(0, len(line), 74)) if len(line) > 75 else line
+
+def to_ical(leaves, host):
+    """iCalendar (RFC 5545) text with one all-day event per leave"""
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//HR Management System//Leave Calendar//EN',
+             'CALSCALE:GREGORIAN', 'X-WR-CALNAME:Team leave']
+    for leave in leaves:
+        name = f'{leave.employee.first_name} {leave.employee.last_name}' if leave.employee else 'Employee'
+        summary = f'{name} - {leave.leave_type} leave'
+        if leave.status != 'Approved':
+            summary += f' ({leave.status.lower()})'
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:leave-{leave.id}@{host}',
+            f'DTSTAMP:{stamp}',
+            f'DTSTART;VALUE=DATE:{leave.start_date:%Y%m%d}',
+            f'DTEND;VALUE=DATE:{leave.end_date + timedelta(days=1):%Y%m%d}',
+            f'SUMMARY:{_escape(summary)}',
+            'TRANSP:TRANSPARENT',
+            'END:VEVENT'
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+def cached_ical(validator, leaves, host):
+    """to_ical() of `leaves()`, rendered once per validator ETag"""
+    cache = _ical_cache()
+    body = cache.get(validator.etag)
+    if body is None:
+        body = to_ical(leaves(), host)
+        cache.set(validator.etag, body)
+    return body
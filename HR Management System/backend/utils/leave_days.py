@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, Attendance, Holiday
+from utils.counters import apply_counter_deltas
+from utils.rollups import apply_rollups
+from utils.upsert import upsert_many
+
+RANGE_BATCH = 200
+
+def _non_working_days(start, end):
+    """(weekdays, holiday dates) that leave from `start` to `end` skips, per policy"""
+    config = current_app.config
+    weekend = set(config['WEEKEND_DAYS']) if config['LEAVE_SKIP_WEEKENDS'] else set()
+    holidays = set()
+    if config['LEAVE_SKIP_HOLIDAYS']:
+        holidays = set(db.session.execute(
+            db.select(Holiday.date).where(Holiday.date >= start, Holiday.date <= end)
+        ).scalars())
+    return weekend, holidays
+
+def _days(start, end, weekend, holidays):
+    days = []
+    day = start
+    while day <= end:
+        if day.weekday() not in weekend and day not in holidays:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+def leave_dates(start, end):
+    """Days from `start` to `end` that approved leave covers
+
+    Weekends (WEEKEND_DAYS) and holidays are left out when
+    LEAVE_SKIP_WEEKENDS / LEAVE_SKIP_HOLIDAYS are set.
+    """
+    return _days(start, end, *_non_working_days(start, end))
+
+def mark_leave_ranges(ranges):
+    """Upsert a Leave attendance row for every leave day of each (employee_id, start, end)
+
+    All ranges go out as one upsert_many() executemany that sets status on
+    rows that already exist, in the caller's transaction. Returns the
+    (employee_id, date) keys written.
+    """
+    if not ranges:
+        return []
+    first, last = min(r[1] for r in ranges), max(r[2] for r in ranges)
+    weekend, holidays = _non_working_days(first, last)
+    keys = sorted({
+        (employee_id, day)
+        for employee_id, start, end in ranges
+        for day in _days(start, end, weekend, holidays)
+    })
+    if not keys:
+        return keys
+
+    # one (employee_id, date range) predicate per leave, each an index range
+    # scan; batched to stay under SQLite's expression depth limit
+    table = Attendance.__table__
+    wanted = set(keys)
+    ranges = sorted(set(ranges))
+    existing = set()
+    for batch in range(0, len(ranges), RANGE_BATCH):
+        existing.update(key for key in map(tuple, db.session.execute(
+            db.select(table.c.employee_id, table.c.date).where(db.or_(*[
+                db.and_(table.c.employee_id == employee_id, table.c.date.between(start, end))
+                for employee_id, start, end in ranges[batch:batch + RANGE_BATCH]
+            ]))
+        )) if key in wanted)
+
+    now = datetime.utcnow()
+    upsert_many(db.session.connection(), table, ['employee_id', 'date'], [
+        {'employee_id': employee_id, 'date': day, 'status': 'Leave', 'updated_at': now}
+        for employee_id, day in keys
+    ])
+
+    # Core statements bypass the mapper events that maintain counters and rollups
+    if len(keys) > len(existing):
+        apply_counter_deltas(db.session, {'attendance_records': len(keys) - len(existing)})
+    apply_rollups(db.session, keys)
+    return keys
+
+def mark_leave_days(employee_id, start, end):
+    """mark_leave_ranges() for a single leave; returns the days written"""
+    return [day for _, day in mark_leave_ranges([(employee_id, start, end)])]
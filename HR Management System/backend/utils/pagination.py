@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy.orm import undefer
+from models import db
+from utils.cache import TTLCache
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor token that cannot be decoded"""
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _load_value(value, column):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+def encode_cursor(values, direction):
+    payload = json.dumps({'k': [_dump_value(v) for v in values], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token, columns):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload['k']
+        direction = payload['d']
+        if len(values) != len(columns) or direction not in ('next', 'prev'):
+            raise ValueError(token)
+        return [_load_value(v, c) for v, c in zip(values, columns)], direction
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+def _after(columns, values, descending):
+    """Row-value comparison (c1, c2, ...) > (v1, v2, ...) spelled out so indexes apply"""
+    column, value = columns[0], values[0]
+    beyond = column < value if descending else column > value
+    if len(columns) == 1:
+        return beyond
+    return db.or_(beyond, db.and_(column == value, _after(columns[1:], values[1:], descending)))
+
+def keyset_paginate(query, columns, cursor=None, per_page=20, descending=False):
+    """Page through `query` ordered by `columns` (unique as a whole) using opaque cursors
+
+    Each page is one indexed range scan of per_page + 1 rows, so deep pages
+    cost the same as the first one; no COUNT(*) or OFFSET is issued.
+    """
+    columns = list(columns)
+    # the cursor is read from these, even when a sparse fieldset left them out
+    query = query.options(*(undefer(c) for c in columns))
+    direction = 'next'
+    if cursor:
+        values, direction = decode_cursor(cursor, columns)
+        # walking backwards = walking forwards over the reversed order
+        reverse = descending if direction == 'next' else not descending
+        query = query.filter(_after(columns, values, reverse))
+
+    backwards = direction == 'prev'
+    scan_descending = descending != backwards
+    order = [c.desc() if scan_descending else c.asc() for c in columns]
+    rows = query.order_by(*order).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def key(row):
+        return [getattr(row, c.key) for c in columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = encode_cursor(key(rows[-1]), 'next')
+        if cursor and (has_more or not backwards):
+            prev_cursor = encode_cursor(key(rows[0]), 'prev')
+
+    return KeysetPage(rows, next_cursor, prev_cursor)
+
+
+_count_cache = None
+
+def cached_value(cache_key, compute):
+    """compute() for a listing-wide value (count, totals), cached briefly so cursor pages stay cheap"""
+    global _count_cache
+    if _count_cache is None:
+        _count_cache = TTLCache(maxsize=256, ttl=current_app.config.get('PAGINATION_COUNT_CACHE_TTL', 60))
+
+    value = _count_cache.get(cache_key)
+    if value is None:
+        value = compute()
+        _count_cache.set(cache_key, value)
+    return value
+
+def cached_count(query, cache_key):
+    """COUNT(*) for a filtered listing, cached briefly so cursor pages stay cheap"""
+    return cached_value(cache_key, lambda: query.order_by(None).count())
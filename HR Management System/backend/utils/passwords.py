@@ -0,0 +1,115 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+
+# Pool workers are spawned, never forked: the pool is created from a web
+# process whose other threads may hold locks a forked child would inherit
+_mp_context = multiprocessing.get_context('spawn')
+
+
+class HasherBusy(Exception):
+    """Raised when too many hashing jobs are already queued"""
+
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _check_password(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+def hash_cost(password_hash):
+    """Cost factor encoded in a bcrypt hash ($2b$<cost>$...)"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """bcrypt hashing/verification off the request thread
+
+    Work is sent to a process pool so a burst of logins does not pin the
+    web workers' CPU; a pool size of 0 (the default) runs everything
+    inline. The pool is created by init_app(), at app start. At most
+    `max_pending` jobs may be queued or running, beyond that callers get
+    HasherBusy immediately instead of waiting.
+    """
+
+    def __init__(self, rounds=12, pool_size=0, max_pending=32, timeout=30):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.configure(rounds, pool_size, max_pending, timeout)
+
+    def configure(self, rounds, pool_size, max_pending, timeout):
+        self.shutdown()
+        self.rounds = rounds
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def init_app(self, app):
+        self.configure(
+            rounds=app.config.get('BCRYPT_LOG_ROUNDS', 12),
+            pool_size=app.config.get('PASSWORD_HASH_POOL_SIZE', 0),
+            max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 32),
+            timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 30)
+        )
+        if self.pool_size:
+            self._get_executor()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.pool_size, mp_context=_mp_context)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.pool_size:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            return self._get_executor().submit(fn, *args).result(timeout=self.timeout)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash_password, password, self.rounds)
+
+    def check(self, password_hash, password):
+        return self._run(_check_password, password, password_hash)
+
+    def hash_many(self, passwords):
+        """Hash a batch across a process pool (bulk imports only)
+
+        Uses the request pool when there is one, otherwise a pool of one
+        process per CPU for just this batch: an import is never hashed
+        serially, whatever PASSWORD_HASH_POOL_SIZE says.
+        """
+        if self.pool_size:
+            return self._map(self._get_executor(), self.pool_size, passwords)
+        workers = min(os.cpu_count() or 1, len(passwords))
+        if workers <= 1:
+            return [_hash_password(p, self.rounds) for p in passwords]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context) as executor:
+            return self._map(executor, workers, passwords)
+
+    def _map(self, executor, workers, passwords):
+        return list(executor.map(
+            _hash_password, passwords, [self.rounds] * len(passwords),
+            chunksize=max(1, len(passwords) // (workers * 4))
+        ))
+
+    def needs_rehash(self, password_hash):
+        return hash_cost(password_hash) != self.rounds
+
+
+password_hasher = PasswordHasher()
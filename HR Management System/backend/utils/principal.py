@@ -0,0 +1,60 @@
+from collections import namedtuple
+from flask import g, current_app
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from models import db, User, Employee
+from utils.cache import TTLCache
+
+Principal = namedtuple('Principal', ['user_id', 'role', 'is_active', 'employee_id'])
+
+_cache = None
+
+def _principal_cache():
+    global _cache
+    if _cache is None:
+        _cache = TTLCache(
+            maxsize=current_app.config.get('PRINCIPAL_CACHE_SIZE', 4096),
+            ttl=current_app.config.get('PRINCIPAL_CACHE_TTL', 60)
+        )
+    return _cache
+
+def load_principal(user_id):
+    """Resolve user, role and employee profile with one joined query (cached)"""
+    cache = _principal_cache()
+    principal = cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    row = db.session.query(User.id, User.role, User.is_active, Employee.id)\
+        .outerjoin(Employee, Employee.user_id == User.id)\
+        .filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    principal = Principal(*row)
+    cache.set(user_id, principal)
+    return principal
+
+def principal_from_claims(user_id, claims):
+    """Build the principal from token claims; None for tokens issued without them"""
+    if 'role' not in claims:
+        return None
+    return Principal(user_id, claims['role'], claims.get('is_active', True), claims.get('employee_id'))
+
+def current_principal():
+    """Principal for the request's JWT, resolved once and kept on flask.g"""
+    if 'principal' not in g:
+        try:
+            user_id = int(get_jwt_identity())
+        except (TypeError, ValueError):
+            g.principal = None
+        else:
+            g.principal = principal_from_claims(user_id, get_jwt()) or load_principal(user_id)
+    return g.principal
+
+def invalidate_principal(user_id):
+    """Drop a cached principal after its role or active flag changed"""
+    if _cache is not None:
+        _cache.pop(user_id)
+    principal = g.get('principal')
+    if principal and principal.user_id == user_id:
+        g.pop('principal')
@@ -0,0 +1,85 @@
+from models import db, Attendance
+from utils.counters import apply_counter_deltas, checkins_key
+from utils.rollups import apply_rollups
+from utils.upsert import insert_ignore
+
+HALF_DAY_HOURS = 4
+
+def punch_in(employee_id, day, at):
+    """Record a check-in; returns 'inserted', 'updated' or None if already checked in
+
+    The common case (first punch of the day) is a single INSERT that ignores
+    a unique_employee_date conflict, so concurrent duplicates never raise.
+    Only when a row already exists (manual entry, approved leave) is it
+    followed by an UPDATE guarded on check_in IS NULL.
+    """
+    table = Attendance.__table__
+    connection = db.session.connection()
+
+    inserted = insert_ignore(connection, table, {
+        'employee_id': employee_id,
+        'date': day,
+        'check_in': at,
+        'status': 'Present'
+    }, ['employee_id', 'date'])
+
+    if inserted:
+        outcome = 'inserted'
+    else:
+        result = connection.execute(
+            table.update()
+            .where(table.c.employee_id == employee_id, table.c.date == day, table.c.check_in.is_(None))
+            .values(check_in=at, status='Present')
+        )
+        outcome = 'updated' if result.rowcount == 1 else None
+
+    # Core statements bypass the mapper events that maintain the counters.
+    # Rollups are left to punch_out: an open day is counted once it is closed.
+    if outcome:
+        apply_counter_deltas(db.session, {checkins_key(day): 1, 'attendance_records': int(inserted)})
+    return outcome
+
+def work_hours_sql(dialect, check_in, check_out):
+    """SQL for round(check_out - check_in in hours, 2), or None if the dialect is not supported"""
+    if dialect == 'sqlite':
+        return db.func.round((db.func.julianday(check_out) - db.func.julianday(check_in)) * 24, 2)
+    if dialect == 'mysql':
+        return db.func.round(db.func.time_to_sec(db.func.timediff(check_out, check_in)) / 3600, 2)
+    return None
+
+def punch_out(employee_id, day, at):
+    """Record a check-out with one guarded UPDATE; returns False if there is no open check-in"""
+    table = Attendance.__table__
+    connection = db.session.connection()
+    hours = work_hours_sql(connection.dialect.name, table.c.check_in, db.literal(at, db.Time))
+
+    if hours is None:
+        attendance = Attendance.query.filter_by(employee_id=employee_id, date=day)\
+            .with_for_update().first()
+        if not attendance or not attendance.check_in or attendance.check_out:
+            return False
+        attendance.check_out = at
+        attendance.calculate_work_hours()
+        if attendance.work_hours and attendance.work_hours < HALF_DAY_HOURS:
+            attendance.status = 'Half-day'
+        db.session.flush()
+        return True
+
+    result = connection.execute(
+        table.update()
+        .where(
+            table.c.employee_id == employee_id,
+            table.c.date == day,
+            table.c.check_in.isnot(None),
+            table.c.check_out.is_(None)
+        )
+        .values(
+            check_out=at,
+            work_hours=hours,
+            status=db.case((db.and_(hours > 0, hours < HALF_DAY_HOURS), 'Half-day'), else_=table.c.status)
+        )
+    )
+    if result.rowcount != 1:
+        return False
+    apply_rollups(db.session, [(employee_id, day)])
+    return True
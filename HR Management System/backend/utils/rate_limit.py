@@ -0,0 +1,166 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, jsonify, request
+
+
+class TokenBucket:
+    """Holds up to `capacity` tokens, refilled at `rate` tokens per second"""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated_at')
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def consume(self):
+        """Take one token; returns 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token buckets keyed by client (IP, email, ...), least recently used evicted first"""
+
+    def __init__(self, capacity, period, max_keys=10000):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.rejected = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """Returns 0 if the request may proceed, else the suggested retry delay"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.capacity, self.rate)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+
+            wait = bucket.consume()
+            if wait:
+                self.rejected += 1
+            else:
+                self.allowed += 1
+            return wait
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'refill_per_second': round(self.rate, 4),
+            'tracked_keys': len(self._buckets),
+            'allowed': self.allowed,
+            'rejected': self.rejected
+        }
+
+
+class ConcurrencyLimiter:
+    """Caps how many requests may run a section at the same time"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.peak = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.active >= self.limit:
+                self.rejected += 1
+                return False
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'active': self.active,
+            'peak': self.peak,
+            'rejected': self.rejected
+        }
+
+
+_limiters = None
+_init_lock = threading.Lock()
+
+def _parse_rate(value):
+    """'10/60' -> (10, 60.0): 10 requests per 60 seconds"""
+    count, period = str(value).split('/')
+    return int(count), float(period)
+
+def get_auth_limiters():
+    global _limiters
+    if _limiters is None:
+        with _init_lock:
+            if _limiters is None:
+                config = current_app.config
+                _limiters = {
+                    'ip': RateLimiter(*_parse_rate(config.get('AUTH_RATE_LIMIT_PER_IP', '30/60'))),
+                    'subject': RateLimiter(*_parse_rate(config.get('AUTH_RATE_LIMIT_PER_SUBJECT', '5/60'))),
+                    'hashing': ConcurrencyLimiter(config.get('AUTH_HASHING_CONCURRENCY', 8))
+                }
+    return _limiters
+
+def auth_limiter_stats():
+    return {name: limiter.stats() for name, limiter in get_auth_limiters().items()}
+
+def _too_many_requests(retry_after):
+    response = jsonify({'error': 'Too many requests, please retry later'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def email_from_body():
+    data = request.get_json(silent=True) or {}
+    email = data.get('email')
+    return f"email:{email.strip().lower()}" if isinstance(email, str) and email else None
+
+def auth_rate_limited(subject=email_from_body):
+    """Throttle a CPU-heavy auth endpoint before it touches the DB or bcrypt
+
+    Applies a per-IP bucket, a per-subject bucket (email by default) and a
+    global cap on concurrent hashing requests; rejections are plain 429s.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            limiters = get_auth_limiters()
+
+            wait = limiters['ip'].hit(request.remote_addr or 'unknown')
+            if wait:
+                return _too_many_requests(wait)
+
+            key = subject()
+            if key:
+                wait = limiters['subject'].hit(key)
+                if wait:
+                    return _too_many_requests(wait)
+
+            if not limiters['hashing'].acquire():
+                return _too_many_requests(1)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                limiters['hashing'].release()
+        return wrapper
+    return decorator
@@ -0,0 +1,315 @@
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, attributes, object_session
+from models import db, Attendance, AttendanceRollup, ArchiveSegment
+from utils.upsert import upsert_many
+
+PERIODS = ('day', 'week', 'month', 'year')
+COUNT_COLUMNS = ('days', 'present', 'absent', 'half_day', 'leave')
+KEY_COLUMNS = ('employee_id', 'period', 'period_start')
+STATUS_COLUMNS = {'Present': 'present', 'Absent': 'absent', 'Half-day': 'half_day', 'Leave': 'leave'}
+
+_KEYS = 'rollup_keys'
+LOOKUP_BATCH = 500
+
+def period_bounds(period, day):
+    """(first, last) day of the `period` containing `day`; weeks start on Monday"""
+    if period == 'day':
+        return day, day
+    if period == 'week':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if period == 'month':
+        start = day.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    if period == 'year':
+        return date(day.year, 1, 1), date(day.year, 12, 31)
+    raise ValueError(f'Unknown period: {period}')
+
+def _contribution(row):
+    """Rollup values one attendance row adds to every period containing its date"""
+    values = dict.fromkeys(COUNT_COLUMNS, 0)
+    values['work_hours'] = Decimal('0')
+    if row is not None:
+        values['days'] = 1
+        if row.status in STATUS_COLUMNS:
+            values[STATUS_COLUMNS[row.status]] = 1
+        values['work_hours'] = Decimal(str(row.work_hours or 0))
+    return values
+
+def _stored(row):
+    values = dict.fromkeys(COUNT_COLUMNS, 0)
+    values['work_hours'] = Decimal('0')
+    if row is not None:
+        values.update({c: row._mapping[c] for c in COUNT_COLUMNS})
+        values['work_hours'] = Decimal(str(row.work_hours or 0))
+    return values
+
+def _lookup(connection, keys):
+    """({key: day rollup row}, {key: attendance row}) for (employee_id, date) keys
+
+    Keys are grouped along whichever of employee and date has fewer distinct
+    values (a day's punches, or one employee's leave range), so each group
+    is one indexed lookup per batch.
+    """
+    table = AttendanceRollup.__table__
+    attendance = Attendance.__table__
+    by_day, by_employee = defaultdict(set), defaultdict(set)
+    for employee_id, day in keys:
+        by_day[day].add(employee_id)
+        by_employee[employee_id].add(day)
+
+    stored, current = {}, {}
+    if len(by_employee) < len(by_day):
+        for employee_id, days in by_employee.items():
+            for batch in _batches(sorted(days)):
+                stored.update(((employee_id, row.period_start), row) for row in connection.execute(
+                    db.select(table.c.period_start, *[table.c[c] for c in COUNT_COLUMNS], table.c.work_hours)
+                    .where(table.c.employee_id == employee_id, table.c.period == 'day',
+                           table.c.period_start.in_(batch))
+                ))
+                current.update(((employee_id, row.date), row) for row in connection.execute(
+                    db.select(attendance.c.date, attendance.c.status, attendance.c.work_hours)
+                    .where(attendance.c.employee_id == employee_id, attendance.c.date.in_(batch))
+                ))
+    else:
+        for day, employee_ids in by_day.items():
+            for batch in _batches(sorted(employee_ids)):
+                stored.update(((row.employee_id, day), row) for row in connection.execute(
+                    db.select(table.c.employee_id, *[table.c[c] for c in COUNT_COLUMNS], table.c.work_hours)
+                    .where(table.c.period == 'day', table.c.period_start == day, table.c.employee_id.in_(batch))
+                ))
+                current.update(((row.employee_id, day), row) for row in connection.execute(
+                    db.select(attendance.c.employee_id, attendance.c.status, attendance.c.work_hours)
+                    .where(attendance.c.date == day, attendance.c.employee_id.in_(batch))
+                ))
+    return stored, current
+
+def refresh_rollups(connection, keys):
+    """Bring the rollups for the given (employee_id, date) pairs in line with attendance
+
+    Each pair's day rollup is compared with its attendance row and only the
+    difference is added to the week, month and year rollups, so a change
+    costs a few row upserts however large the period is. Writes for all
+    pairs go out as one executemany per statement.
+    """
+    table = AttendanceRollup.__table__
+    keys = sorted(set(keys), key=lambda key: (key[1], key[0]))
+    stored, current = _lookup(connection, keys)
+    now = datetime.utcnow()
+
+    day_rows, removed = [], []
+    periods = defaultdict(lambda: _stored(None))
+    for employee_id, day in keys:
+        before, after = _stored(stored.get((employee_id, day))), _contribution(current.get((employee_id, day)))
+        if after == before:
+            continue
+
+        key = {'employee_id': employee_id, 'period': 'day', 'period_start': day}
+        if (employee_id, day) in current:
+            day_rows.append(dict(key, **after, updated_at=now))
+        else:
+            removed.append({'_employee_id': employee_id, '_period_start': day})
+
+        for period in PERIODS[1:]:
+            totals = periods[(employee_id, period, period_bounds(period, day)[0])]
+            for c in totals:
+                totals[c] += after[c] - before[c]
+
+    upsert_many(connection, table, KEY_COLUMNS, day_rows)
+    if removed:
+        connection.execute(table.delete().where(
+            table.c.employee_id == db.bindparam('_employee_id'),
+            table.c.period == 'day',
+            table.c.period_start == db.bindparam('_period_start')
+        ), removed)
+    upsert_many(connection, table, KEY_COLUMNS, [
+        dict(zip(KEY_COLUMNS, key), **delta, updated_at=now)
+        for key, delta in sorted(periods.items()) if any(delta.values())
+    ], increments=(*COUNT_COLUMNS, 'work_hours'))
+
+def _batches(items):
+    for start in range(0, len(items), LOOKUP_BATCH):
+        yield items[start:start + LOOKUP_BATCH]
+
+def apply_rollups(session, keys):
+    """Refresh rollups for writes made outside the ORM (e.g. the punch fast path)"""
+    refresh_rollups(session.connection(), keys)
+
+def add_day_rollups(connection, day):
+    """Set-based rollups for attendance rows on `day` that have no day rollup yet
+
+    For bulk inserts such as the nightly close: week/month/year rows are
+    incremented and day rows inserted with one INSERT ... SELECT per period
+    instead of a round trip per employee. Other dialects use refresh_rollups().
+    """
+    table = AttendanceRollup.__table__
+    attendance = Attendance.__table__
+    existing = table.alias('existing')
+    where = (
+        attendance.c.date == day,
+        ~db.exists().where(
+            existing.c.employee_id == attendance.c.employee_id,
+            existing.c.period == 'day',
+            existing.c.period_start == day
+        )
+    )
+
+    dialect = connection.dialect.name
+    if dialect not in ('sqlite', 'mysql'):
+        employee_ids = connection.execute(db.select(attendance.c.employee_id).where(*where)).scalars().all()
+        refresh_rollups(connection, [(employee_id, day) for employee_id in employee_ids])
+        return
+
+    columns = [*KEY_COLUMNS, *COUNT_COLUMNS, 'work_hours', 'updated_at']
+    values = [
+        db.literal(1),
+        *[db.case((attendance.c.status == status, 1), else_=0) for status in STATUS_COLUMNS],
+        db.func.coalesce(attendance.c.work_hours, 0),
+        db.literal(datetime.utcnow(), db.DateTime)
+    ]
+
+    for period in PERIODS[1:]:
+        select = db.select(
+            attendance.c.employee_id, db.literal(period), db.literal(period_bounds(period, day)[0], db.Date), *values
+        ).where(*where)
+        if dialect == 'sqlite':
+            statement = sqlite_insert(table).from_select(columns, select)
+            new = statement.excluded
+        else:
+            statement = mysql_insert(table).from_select(columns, select)
+            new = statement.inserted
+        updates = {c: table.c[c] + new[c] for c in (*COUNT_COLUMNS, 'work_hours')}
+        updates['updated_at'] = new.updated_at
+        if dialect == 'sqlite':
+            statement = statement.on_conflict_do_update(index_elements=list(KEY_COLUMNS), set_=updates)
+        else:
+            statement = statement.on_duplicate_key_update(**updates)
+        connection.execute(statement)
+
+    connection.execute(table.insert().from_select(columns, db.select(
+        attendance.c.employee_id, db.literal('day'), attendance.c.date, *values
+    ).where(*where)))
+
+def read_rollup(employee_id, period, day):
+    """Rollup dict for the `period` containing `day`; zeros if nothing is recorded"""
+    start, end = period_bounds(period, day)
+    rollup = db.session.get(AttendanceRollup, (employee_id, period, start))\
+        or AttendanceRollup(employee_id=employee_id, period=period, period_start=start,
+                            work_hours=0, **dict.fromkeys(COUNT_COLUMNS, 0))
+    return dict(rollup.to_dict(), period_end=end.isoformat())
+
+
+# Backfill
+
+def _period_start(dialect, period, column):
+    """SQL for the first day of the period containing `column`, or None if unsupported"""
+    if dialect == 'sqlite':
+        if period == 'week':
+            return db.func.date(column, '-' + db.cast((db.func.strftime('%w', column) + 6) % 7, db.String) + ' days')
+        return db.func.date(column, 'start of month' if period == 'month' else 'start of year')
+    if dialect == 'mysql':
+        if period == 'week':
+            return db.func.subdate(column, db.func.weekday(column))
+        if period == 'month':
+            return db.func.subdate(column, db.func.dayofmonth(column) - 1)
+        return db.func.makedate(db.func.year(column), 1)
+    return None
+
+def rebuild_attendance_rollups(connection):
+    """Recompute every rollup from the attendance table; returns the number of rows written
+
+    Day rollups up to the archive horizon are kept as they are (their rows
+    now live in the archive files) and feed the week/month/year rebuild.
+    """
+    table = AttendanceRollup.__table__
+    attendance = Attendance.__table__
+    now = db.literal(datetime.utcnow(), db.DateTime)
+    columns = ['employee_id', 'period', 'period_start', *COUNT_COLUMNS, 'work_hours', 'updated_at']
+    horizon = connection.execute(db.select(db.func.max(ArchiveSegment.last_date))).scalar()
+
+    if horizon:
+        connection.execute(table.delete().where(db.or_(table.c.period != 'day', table.c.period_start > horizon)))
+    else:
+        connection.execute(table.delete())
+    connection.execute(table.insert().from_select(columns, db.select(
+        attendance.c.employee_id,
+        db.literal('day'),
+        attendance.c.date,
+        db.literal(1),
+        *[db.case((attendance.c.status == status, 1), else_=0) for status in STATUS_COLUMNS],
+        db.func.coalesce(attendance.c.work_hours, 0),
+        now
+    ).where(attendance.c.date > horizon if horizon else db.true())))
+
+    days = table.alias('days')
+    for period in PERIODS[1:]:
+        start = _period_start(connection.dialect.name, period, days.c.period_start)
+        if start is None:
+            _rebuild_period_in_python(connection, period)
+            continue
+        connection.execute(table.insert().from_select(columns, db.select(
+            days.c.employee_id,
+            db.literal(period),
+            start,
+            *[db.func.sum(days.c[c]) for c in COUNT_COLUMNS],
+            db.func.sum(days.c.work_hours),
+            now
+        ).where(days.c.period == 'day').group_by(days.c.employee_id, start)))
+
+    return connection.execute(db.select(db.func.count()).select_from(table)).scalar()
+
+def _rebuild_period_in_python(connection, period):
+    table = AttendanceRollup.__table__
+    totals = defaultdict(lambda: _stored(None))
+    rows = connection.execution_options(yield_per=5000).execute(
+        db.select(table).where(table.c.period == 'day')
+    )
+    for row in rows:
+        bucket = totals[(row.employee_id, period_bounds(period, row.period_start)[0])]
+        for c, value in _stored(row).items():
+            bucket[c] += value
+
+    now = datetime.utcnow()
+    if totals:
+        connection.execute(table.insert(), [
+            dict(values, employee_id=employee_id, period=period, period_start=start, updated_at=now)
+            for (employee_id, start), values in totals.items()
+        ])
+
+
+# Incremental maintenance: any ORM write to attendance marks its
+# (employee, date) and after_flush refreshes those rollups in the same
+# transaction.
+
+def _mark(target, *keys):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_KEYS, set()).update(keys)
+
+def _previous(target, attr):
+    history = attributes.get_history(target, attr)
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+@db.event.listens_for(Attendance, 'after_insert')
+@db.event.listens_for(Attendance, 'after_delete')
+def _attendance_written(mapper, connection, target):
+    _mark(target, (target.employee_id, target.date))
+
+@db.event.listens_for(Attendance, 'after_update')
+def _attendance_updated(mapper, connection, target):
+    _mark(target, (target.employee_id, target.date),
+          (_previous(target, 'employee_id'), _previous(target, 'date')))
+
+@db.event.listens_for(Session, 'after_flush')
+def _refresh_after_flush(session, flush_context):
+    keys = session.info.pop(_KEYS, None)
+    if keys:
+        apply_rollups(session, keys)
+
+@db.event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_KEYS, None)
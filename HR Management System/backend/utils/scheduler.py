@@ -0,0 +1,89 @@
+import threading
+import time
+from models import db
+
+
+class Job:
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.due = time.monotonic() + interval
+
+
+class Scheduler:
+    """Runs registered jobs periodically inside an app context
+
+    Nothing starts on app creation: start() runs the jobs on a daemon thread
+    when SCHEDULER_ENABLED is set and run_forever() runs them in the calling
+    thread (`flask run-jobs`). Run them in one process; jobs that must not
+    overlap also take a lease.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._jobs = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    def add_job(self, name, interval, func):
+        """Run func() every `interval` seconds; an interval of 0 disables the job"""
+        if interval and interval > 0:
+            self._jobs[name] = Job(name, interval, func)
+
+    def job_names(self):
+        return sorted(self._jobs)
+
+    def start(self):
+        with self._lock:
+            if self._thread or not self._jobs or not self.app.config.get('SCHEDULER_ENABLED', False):
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='scheduler', daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            thread.join()
+
+    def run_forever(self):
+        """Run the jobs in the calling thread until shutdown() or Ctrl-C"""
+        if not self._jobs:
+            return
+        self._stop.clear()
+        try:
+            self._run()
+        except KeyboardInterrupt:
+            pass
+
+    def run_job(self, name):
+        """Run a registered job now, in the calling thread"""
+        self._execute(self._jobs[name])
+
+    def _run(self):
+        while not self._stop.is_set():
+            for job in list(self._jobs.values()):
+                if time.monotonic() >= job.due:
+                    job.due = time.monotonic() + job.interval
+                    self._execute(job)
+            next_due = min(job.due for job in self._jobs.values())
+            self._stop.wait(max(0, next_due - time.monotonic()))
+
+    def _execute(self, job):
+        with self.app.app_context():
+            try:
+                job.func()
+            except Exception:
+                self.app.logger.exception('Scheduled job %s failed', job.name)
+            finally:
+                db.session.remove()
+
+
+scheduler = Scheduler()
@@ -0,0 +1,169 @@
+import re
+from models import db, Employee
+
+SEARCH_COLUMNS = ('first_name', 'last_name', 'employee_code', 'department', 'designation')
+
+SEARCH_TABLE = 'employee_search'
+MYSQL_INDEX = 'ft_employees_search'
+
+# SQLite: external-content FTS5 table over `employees`, kept in sync by triggers
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        {', '.join(SEARCH_COLUMNS)},
+        content='employees', content_rowid='id',
+        tokenize='unicode61', prefix='2 3 4'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS employees_search_ai AFTER INSERT ON employees BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS employees_search_ad AFTER DELETE ON employees BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS employees_search_au AFTER UPDATE OF {', '.join(SEARCH_COLUMNS)} ON employees BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in SEARCH_COLUMNS)});
+        INSERT INTO {SEARCH_TABLE}(rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in SEARCH_COLUMNS)});
+    END""",
+]
+
+# bm25 column weights: names and code rank above department/designation
+_SQLITE_RANK = f"bm25({SEARCH_TABLE}, 10.0, 10.0, 8.0, 2.0, 2.0)"
+_MYSQL_MATCH = f"MATCH({', '.join('e.' + c for c in SEARCH_COLUMNS)}) AGAINST (:match IN BOOLEAN MODE)"
+
+_installed = set()
+
+def _dialect(bind=None):
+    return (bind or db.engine).dialect.name
+
+def _tokens(term):
+    return re.findall(r'\w+', (term or '').lower())
+
+def _index_exists(connection):
+    if _dialect(connection) == 'sqlite':
+        return connection.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': SEARCH_TABLE}).first() is not None
+    return connection.execute(db.text(
+        "SELECT 1 FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = 'employees' AND index_name = :name LIMIT 1"
+    ), {'name': MYSQL_INDEX}).first() is not None
+
+def install_search_index(connection):
+    """Create the dialect's search index if missing and (re)build it from employees"""
+    dialect = _dialect(connection)
+    if dialect == 'sqlite':
+        for statement in _SQLITE_DDL:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+    elif dialect == 'mysql':
+        if not _index_exists(connection):
+            # InnoDB maintains FULLTEXT indexes on every insert/update itself
+            connection.exec_driver_sql(
+                f"ALTER TABLE employees ADD FULLTEXT INDEX {MYSQL_INDEX} "
+                f"({', '.join(SEARCH_COLUMNS)}) WITH PARSER ngram"
+            )
+
+@db.event.listens_for(Employee.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    install_search_index(connection)
+
+def _search_dialect():
+    """Dialect to search with: the index's, or None (LIKE) while the index is missing
+
+    Databases created before the index existed get it here on first use
+    on SQLite, where building the FTS table is cheap. On MySQL adding a
+    FULLTEXT index rebuilds the table, so that is left to the migration or
+    `flask rebuild-search-index`; until then search falls back to LIKE.
+    """
+    dialect = _dialect()
+    if dialect not in ('sqlite', 'mysql'):
+        return None
+    key = str(db.engine.url)
+    if key not in _installed:
+        with db.engine.begin() as connection:
+            if not _index_exists(connection):
+                if dialect != 'sqlite':
+                    return None
+                install_search_index(connection)
+        _installed.add(key)
+    return dialect
+
+def _match_expression(tokens, dialect):
+    if dialect == 'sqlite':
+        # every token must match as a prefix of some column
+        return ' '.join(f'"{t}"*' for t in tokens)
+    return ' '.join(f'+"{t}"' for t in tokens)
+
+def _fallback_filter(tokens):
+    return db.and_(*[
+        db.or_(*[getattr(Employee, c).ilike(f'{t}%') for c in SEARCH_COLUMNS])
+        for t in tokens
+    ])
+
+def employee_search_filter(term):
+    """WHERE clause restricting Employee to index matches for `term`"""
+    tokens = _tokens(term)
+    if not tokens:
+        return db.true()
+
+    dialect = _search_dialect()
+    if dialect == 'sqlite':
+        matches = db.text(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match")\
+            .bindparams(match=_match_expression(tokens, dialect))\
+            .columns(db.column('rowid', db.Integer))
+        return Employee.id.in_(matches)
+    if dialect == 'mysql':
+        return db.text(f"MATCH({', '.join(SEARCH_COLUMNS)}) AGAINST (:match IN BOOLEAN MODE)")\
+            .bindparams(match=_match_expression(tokens, dialect))
+    return _fallback_filter(tokens)
+
+def search_employees(term, limit=10, department=None):
+    """Ranked prefix matches over name, code, department and designation"""
+    tokens = _tokens(term)
+    if not tokens:
+        return []
+
+    dialect = _search_dialect()
+    columns = 'e.id, e.employee_code, e.first_name, e.last_name, e.department, e.designation'
+    params = {'match': _match_expression(tokens, dialect), 'limit': limit, 'department': department}
+    department_filter = 'AND e.department = :department' if department else ''
+
+    if dialect == 'sqlite':
+        sql = f"""
+            SELECT {columns} FROM {SEARCH_TABLE}
+            JOIN employees e ON e.id = {SEARCH_TABLE}.rowid
+            WHERE {SEARCH_TABLE} MATCH :match {department_filter}
+            ORDER BY {_SQLITE_RANK}
+            LIMIT :limit
+        """
+    elif dialect == 'mysql':
+        sql = f"""
+            SELECT {columns} FROM employees e
+            WHERE {_MYSQL_MATCH} {department_filter}
+            ORDER BY {_MYSQL_MATCH} DESC
+            LIMIT :limit
+        """
+    else:
+        query = db.session.query(
+            Employee.id, Employee.employee_code, Employee.first_name,
+            Employee.last_name, Employee.department, Employee.designation
+        ).filter(_fallback_filter(tokens))
+        if department:
+            query = query.filter(Employee.department == department)
+        rows = query.order_by(Employee.first_name, Employee.last_name).limit(limit).all()
+        return [_search_result(row) for row in rows]
+
+    rows = db.session.execute(db.text(sql), params).all()
+    return [_search_result(row) for row in rows]
+
+def _search_result(row):
+    return {
+        'id': row.id,
+        'employee_code': row.employee_code,
+        'full_name': f"{row.first_name} {row.last_name}",
+        'department': row.department,
+        'designation': row.designation
+    }
@@ -0,0 +1,78 @@
+import threading
+from sqlalchemy.exc import IntegrityError
+from models import db, Sequence
+
+
+class BlockAllocator:
+    """Process-local allocator for a named row in the `sequences` table
+
+    Values are reserved from the database `block_size` at a time with a
+    single UPDATE in its own short transaction; the row lock (InnoDB) or
+    write lock (SQLite) makes that safe across processes. Within a process
+    values are handed out from the reserved block under a thread lock, so
+    most calls never touch the database. Values of a block that is not used
+    up before the process exits are skipped, leaving gaps.
+
+    The reservation runs on its own connection: on SQLite, callers must not
+    hold uncommitted writes in the session while allocating.
+    """
+
+    def __init__(self, name, block_size=20, initial_value=None):
+        self.name = name
+        self.block_size = block_size
+        self.initial_value = initial_value
+        self._next = 0
+        self._end = 0
+        self._row_ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_row(self):
+        table = Sequence.__table__
+        try:
+            with db.engine.begin() as connection:
+                exists = connection.execute(
+                    db.select(table.c.name).where(table.c.name == self.name)
+                ).first()
+                if not exists:
+                    start = self.initial_value(connection) if self.initial_value else 1
+                    connection.execute(table.insert().values(name=self.name, next_value=start))
+        except IntegrityError:
+            pass  # another process created it first
+        self._row_ready = True
+
+    def _reserve(self, count):
+        """Reserve `count` consecutive values; returns the first one"""
+        if not self._row_ready:
+            self._ensure_row()
+
+        table = Sequence.__table__
+        with db.engine.begin() as connection:
+            connection.execute(
+                table.update()
+                .where(table.c.name == self.name)
+                .values(next_value=table.c.next_value + count)
+            )
+            end = connection.execute(
+                db.select(table.c.next_value).where(table.c.name == self.name)
+            ).scalar_one()
+        return end - count
+
+    def next(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next = self._reserve(self.block_size)
+                self._end = self._next + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+    def allocate(self, n):
+        """Return `n` values, reserving one contiguous range for large requests"""
+        with self._lock:
+            available = self._end - self._next
+            if n <= available:
+                values = list(range(self._next, self._next + n))
+                self._next += n
+                return values
+            start = self._reserve(n)
+            return list(range(start, start + n))
@@ -0,0 +1,75 @@
+from flask import request
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only
+from models import Employee, Attendance, LeaveRequest, Payroll
+
+
+class _LoadedOnly:
+    """Stands in for a row in to_dict(): columns left unloaded read as None instead of lazy-loading"""
+
+    def __init__(self, obj):
+        self._obj = obj
+        self._unloaded = inspect(obj).unloaded
+
+    def __getattr__(self, name):
+        if name in self._unloaded:
+            return None
+        return getattr(self._obj, name)
+
+
+class ModelSerializer:
+    """List serialization for a model whose to_dict() follows relationships
+
+    `relations` maps each to_dict() key to the relationship it reads. For a
+    list query the relationships behind the requested keys are eager-loaded
+    in the same SELECT and the rest are not loaded at all, so a page costs a
+    constant number of queries instead of one lazy load per row and
+    relationship. `?fields=a,b,c` limits the output to those keys and
+    selects only the columns behind them; `columns` maps the keys that are
+    not named after a single column to the columns they are built from.
+    """
+
+    def __init__(self, model, relations, columns=None):
+        self.model = model
+        self.relations = relations
+        self.columns = columns or {}
+
+    def requested_fields(self):
+        value = request.args.get('fields')
+        if not value:
+            return None
+        return {f.strip() for f in value.split(',') if f.strip()}
+
+    def eager(self, query, fields=None):
+        needed = {rel for field, rel in self.relations.items() if fields is None or field in fields}
+        # the other relationships stay unloaded: dump() reads them as None
+        options = [joinedload(getattr(self.model, rel)) for rel in sorted(needed)]
+        if fields is not None:
+            options.append(load_only(*self.loaded_columns(fields, needed)))
+        return query.options(*options)
+
+    def loaded_columns(self, fields, relations):
+        """Primary key, the columns behind `fields` and the foreign keys of `relations`"""
+        mapper = inspect(self.model)
+        names = {c.key for c in mapper.primary_key}
+        for field in fields:
+            names.update(self.columns.get(field, (field,)))
+        for rel in relations:
+            names.update(c.key for c in mapper.relationships[rel].local_columns)
+        return [getattr(self.model, name) for name in sorted(names) if name in mapper.column_attrs]
+
+    def dump(self, obj, fields=None):
+        if fields is None:
+            return obj.to_dict()
+        data = type(obj).to_dict(_LoadedOnly(obj))
+        return {k: v for k, v in data.items() if k in fields}
+
+    def dump_many(self, objs, fields=None):
+        return [self.dump(obj, fields) for obj in objs]
+
+
+employee_serializer = ModelSerializer(Employee, {'email': 'user', 'role': 'user'},
+                                      {'full_name': ('first_name', 'last_name')})
+attendance_serializer = ModelSerializer(Attendance, {'employee_name': 'employee'})
+leave_serializer = ModelSerializer(LeaveRequest, {'employee_name': 'employee', 'reviewer_name': 'reviewer'})
+payroll_serializer = ModelSerializer(Payroll, {'employee_name': 'employee'})
@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import datetime, timezone
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy.orm import Session
+from models import db, TokenRevocation
+
+# user_id -> unix time before which that user's tokens are dead
+_revoked = {}
+_synced_at = None
+_lock = threading.Lock()
+
+_PENDING_KEY = 'pending_revocations'
+
+def principal_claims(principal):
+    """Authorization claims embedded in every token we issue"""
+    return {
+        'role': principal.role,
+        'employee_id': principal.employee_id,
+        'is_active': bool(principal.is_active)
+    }
+
+def issue_tokens(principal):
+    """Create an access/refresh token pair carrying the principal's claims"""
+    claims = principal_claims(principal)
+    identity = str(principal.user_id)
+    return (
+        create_access_token(identity=identity, additional_claims=claims),
+        create_refresh_token(identity=identity, additional_claims=claims)
+    )
+
+def _to_timestamp(value):
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+def _sync_revocations():
+    """Reload the revocation index from the table every few seconds"""
+    global _synced_at
+    interval = current_app.config.get('TOKEN_REVOCATION_SYNC_SECONDS', 30)
+    now = time.monotonic()
+    if _synced_at is not None and now - _synced_at < interval:
+        return
+
+    # Anything revoked before the longest token lifetime can no longer matter
+    cutoff = datetime.utcnow() - current_app.config['JWT_REFRESH_TOKEN_EXPIRES']
+    rows = db.session.query(TokenRevocation.user_id, TokenRevocation.revoked_at)\
+        .filter(TokenRevocation.revoked_at >= cutoff).all()
+
+    with _lock:
+        _revoked.clear()
+        _revoked.update((user_id, _to_timestamp(revoked_at)) for user_id, revoked_at in rows)
+        _synced_at = now
+
+def revoke_user_tokens(user_id, reason=None):
+    """Invalidate every token issued to `user_id` so far (caller commits)"""
+    # `iat` has whole-second resolution, so tokens issued in the same second
+    # as the revocation are treated as revoked too
+    revoked_at = datetime.utcnow().replace(microsecond=0)
+
+    revocation = TokenRevocation.query.filter_by(user_id=user_id).first()
+    if revocation:
+        revocation.revoked_at = revoked_at
+        revocation.reason = reason
+    else:
+        db.session.add(TokenRevocation(user_id=user_id, revoked_at=revoked_at, reason=reason))
+
+    # the local index only learns about the revocation once it is committed
+    db.session.info.setdefault(_PENDING_KEY, {})[user_id] = _to_timestamp(revoked_at)
+
+def is_token_revoked(jwt_payload):
+    """True for access tokens issued before their user's last revocation
+
+    Refresh tokens are exempt: /refresh re-reads the principal, so it hands
+    out an access token with the new role, and refuses deactivated users.
+    """
+    if jwt_payload.get('type') == 'refresh':
+        return False
+    _sync_revocations()
+    try:
+        user_id = int(jwt_payload['sub'])
+    except (KeyError, TypeError, ValueError):
+        return True
+    revoked_at = _revoked.get(user_id)
+    return revoked_at is not None and jwt_payload.get('iat', 0) <= revoked_at
+
+@db.event.listens_for(Session, 'after_commit')
+def _apply_after_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        with _lock:
+            _revoked.update(pending)
+
+@db.event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+def register_jwt_callbacks(jwt):
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return is_token_revoked(jwt_payload)
@@ -0,0 +1,88 @@
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+
+def upsert(connection, table, key, values, updates):
+    """INSERT key + values, or apply `updates` to the existing row with that key
+
+    A single statement on SQLite (ON CONFLICT) and MySQL (ON DUPLICATE KEY);
+    other dialects fall back to UPDATE-then-INSERT.
+    """
+    row = dict(values, **key)
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        connection.execute(sqlite_insert(table).values(**row).on_conflict_do_update(
+            index_elements=list(key), set_=updates
+        ))
+    elif dialect == 'mysql':
+        connection.execute(mysql_insert(table).values(**row).on_duplicate_key_update(**updates))
+    else:
+        where = [table.c[k] == v for k, v in key.items()]
+        result = connection.execute(table.update().where(*where).values(**updates))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+def increment(connection, table, key, increments, values=None):
+    """Add `increments` ({column: n}) to a row, creating it if missing"""
+    values = values or {}
+    updates = {c: table.c[c] + n for c, n in increments.items()}
+    updates.update(values)
+    upsert(connection, table, key, dict(increments, **values), updates)
+
+def increment_or_seed(connection, table, key, increments, seed, values=None):
+    """Add `increments` to an existing row; create a missing one from `seed(connection)`
+
+    For derived rows that may predate their table (an upgraded database):
+    a missing row is computed from the source data, which already includes
+    the change being counted, rather than started from the delta alone.
+    """
+    values = values or {}
+    where = [table.c[k] == v for k, v in key.items()]
+    updates = {c: table.c[c] + n for c, n in increments.items()}
+    updates.update(values)
+    if connection.execute(table.update().where(*where).values(**updates)).rowcount:
+        return
+    if not insert_ignore(connection, table, dict(seed(connection), **values, **key), list(key)):
+        # created concurrently since the UPDATE: it did not see our change yet
+        connection.execute(table.update().where(*where).values(**updates))
+
+def upsert_many(connection, table, keys, rows, increments=()):
+    """upsert() for many rows with the same columns in one executemany
+
+    On a key conflict the other columns are overwritten with the new row's
+    values, except those listed in `increments`, which are added to.
+    """
+    if not rows:
+        return
+    columns = [c for c in rows[0] if c not in keys]
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'mysql'):
+        statement = sqlite_insert(table) if dialect == 'sqlite' else mysql_insert(table)
+        new = statement.excluded if dialect == 'sqlite' else statement.inserted
+        updates = {c: table.c[c] + new[c] if c in increments else new[c] for c in columns}
+        if dialect == 'sqlite':
+            statement = statement.on_conflict_do_update(index_elements=list(keys), set_=updates)
+        else:
+            statement = statement.on_duplicate_key_update(**updates)
+        connection.execute(statement, rows)
+    else:
+        for row in rows:
+            updates = {c: table.c[c] + row[c] if c in increments else row[c] for c in columns}
+            upsert(connection, table, {k: row[k] for k in keys}, row, updates)
+
+def insert_ignore(connection, table, values, conflict_columns):
+    """INSERT a row unless it collides with a unique key; returns True if a row was inserted"""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        statement = sqlite_insert(table).values(**values).on_conflict_do_nothing(index_elements=conflict_columns)
+    elif dialect == 'mysql':
+        statement = mysql_insert(table).values(**values).prefix_with('IGNORE')
+    else:
+        try:
+            with connection.begin_nested():
+                connection.execute(table.insert().values(**values))
+            return True
+        except IntegrityError:
+            return False
+    return connection.execute(statement).rowcount == 1